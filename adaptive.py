@@ -0,0 +1,188 @@
+"""
+Cuestionario adaptativo: deja de preguntar cuando el resultado ya no puede cambiar.
+
+Se llevan las sumas parciales por dimensión (scoring.ScoreAccumulator, con
+los ítems inversos ya invertidos) y cuántos ítems faltan en cada una. Como
+cada ítem aporta entre 1 y 5, el crudo final de cada dimensión puede ser
+cualquier entero de [suma + 1·faltan, suma + 5·faltan]: el conjunto de
+resultados posibles es una caja en el espacio D/I/S/C. Con la tabla
+precalculada de lookup.py se mira si primary y secondary (en orden) son los
+mismos en toda la caja; si lo son, los ítems D/I/S/C restantes ya no se
+preguntan. La alerta de validez queda fija cuando el umbral ya se alcanzó o
+ya no se puede alcanzar, y entonces tampoco se preguntan los ítems V que
+faltan. Si solo falta decidir la validez se siguen preguntando únicamente
+ítems V.
+
+Los ítems no preguntados se completan con NEUTRAL (3) para score_disc: como el
+resultado es el mismo para cualquier respuesta posible, primary, secondary y
+la alerta de validez coinciden con los del cuestionario completo; los crudos,
+porcentajes y la nota de "poco diferenciado" son aproximados.
+
+    session = AdaptiveSession(items)
+    while (it := session.next_item()) is not None:
+        session.answer(it.id, preguntar(it))
+    res = score_disc(items, session.completed_answers())
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lookup import ClassificationTable, PERMS, N_CODES, get_table
+from questionnaire import Item
+from scoring import DIMS, LIKERT_MAX, LIKERT_MIN, NEUTRAL, _SLOTS, ScoreAccumulator, get_scoring_plan
+
+_V = _SLOTS["V"]
+
+# código de la tabla -> id de (primary, secondary en orden); ignora el orden
+# del resto y el bit de "poco diferenciado", que no forman parte de la decisión
+_OUTCOMES: List[Tuple[int, Tuple[int, ...]]] = []
+_OUTCOME_OF_CODE = np.zeros(N_CODES, dtype=np.uint8)
+for _code in range(N_CODES):
+    _perm = PERMS[_code >> 3]
+    _key = (_perm[0], _perm[1:1 + ((_code >> 1) & 3)])
+    if _key not in _OUTCOMES:
+        _OUTCOMES.append(_key)
+    _OUTCOME_OF_CODE[_code] = _OUTCOMES.index(_key)
+
+_grids: Dict[int, np.ndarray] = {}
+
+def outcome_grid(table: ClassificationTable) -> np.ndarray:
+    """(w, w, w, w) uint8 con el id de resultado por crudos D/I/S/C; uno por tabla."""
+    grid = _grids.get(id(table))
+    if grid is None:
+        w = table.width
+        grid = _OUTCOME_OF_CODE[table.codes].reshape(w, w, w, w)
+        grid.setflags(write=False)
+        _grids.clear()          # alcanza con la última tabla usada
+        _grids[id(table)] = grid
+    return grid
+
+def interleaved(items: Sequence[Item]) -> List[Item]:
+    """
+    D01, I01, S01, C01, D02, ... y los ítems V al final: todas las dimensiones se
+    acotan a la vez, así el resultado se decide antes que en el orden por bloques.
+    """
+    by_dim: Dict[str, List[Item]] = {}
+    for it in items:
+        by_dim.setdefault(it.dim, []).append(it)
+    groups = [by_dim.get(d, []) for d in DIMS]
+    out = [it for row in _zip_longest(groups) for it in row]
+    return out + [it for it in items if it.dim not in DIMS]
+
+def _zip_longest(groups: List[List[Item]]):
+    for k in range(max((len(g) for g in groups), default=0)):
+        yield [g[k] for g in groups if k < len(g)]
+
+class AdaptiveSession:
+    """
+    Estado de una evaluación adaptativa. answer() es O(1) (ScoreAccumulator);
+    la decisión se recalcula (una vez) después de cada cambio de respuesta,
+    incluso si se vuelve atrás y se corrige: una corrección puede reabrirla.
+    """
+
+    def __init__(self, items: Sequence[Item], order: Optional[Sequence[Item]] = None,
+                 blend_ratio: float = 0.90, blend_abs: int = 2, validity_threshold: int = 24,
+                 table: Optional[ClassificationTable] = None):
+        self.items = list(items)
+        self.order = list(order) if order is not None else self.items
+        self.validity_threshold = validity_threshold
+        self.table = table or get_table(self.items, blend_ratio, blend_abs)
+        self.table.check_params(blend_ratio, blend_abs)
+        self._grid = outcome_grid(self.table)
+
+        self.acc = ScoreAccumulator(self.items)
+        self._slot = {item_id: slot for item_id, slot, _ in get_scoring_plan(self.items).columns}
+        self._decision: Optional[Tuple[bool, bool]] = None
+
+    # -----------------------------
+    # Respuestas
+    # -----------------------------
+    def answer(self, item_id: str, value: int) -> None:
+        """Registra (o corrige) una respuesta."""
+        if self.acc.set(item_id, value):
+            self._decision = None
+
+    @property
+    def answers(self) -> Dict[str, int]:
+        return self.acc.answers
+
+    def completed_answers(self) -> Dict[str, int]:
+        """Respuestas para score_disc: las no preguntadas se completan con NEUTRAL."""
+        return {it.id: self.answers.get(it.id, NEUTRAL) for it in self.items}
+
+    # -----------------------------
+    # Decisión
+    # -----------------------------
+    def bounds(self) -> List[Tuple[int, int]]:
+        """Rango posible del puntaje final por dimensión D/I/S/C/V."""
+        return [(s + LIKERT_MIN * r, s + LIKERT_MAX * r) for s, r in zip(self.acc.sums, self.acc.remaining)]
+
+    def _decide(self) -> Tuple[bool, bool]:
+        if self._decision is None:
+            b = self.bounds()
+            lo_v, hi_v = b[_V]
+            validity = lo_v >= self.validity_threshold or hi_v < self.validity_threshold
+            self._decision = (self._box_constant(b[:4]), validity)
+        return self._decision
+
+    def _box_constant(self, box: List[Tuple[int, int]]) -> bool:
+        if not any(self.acc.remaining[:4]):
+            return True
+        off = self.table.lo
+        # primero las 16 esquinas (barato); si difieren no hace falta mirar la caja entera
+        corners = tuple(slice(lo - off, hi - off + 1, max(hi - lo, 1)) for lo, hi in box)
+        c = self._grid[corners]
+        if c.min() != c.max():
+            return False
+        full = self._grid[tuple(slice(lo - off, hi - off + 1) for lo, hi in box)]
+        return full.min() == full.max()
+
+    @property
+    def disc_decided(self) -> bool:
+        """primary y secondary ya no pueden cambiar con las respuestas que faltan."""
+        return self._decide()[0]
+
+    @property
+    def validity_decided(self) -> bool:
+        return self._decide()[1]
+
+    @property
+    def done(self) -> bool:
+        disc, validity = self._decide()
+        return disc and validity
+
+    def needed(self, item: Item) -> bool:
+        """Si todavía hace falta preguntar el ítem."""
+        if item.id in self.answers:
+            return False
+        slot = self._slot[item.id]
+        if slot < 0:
+            return False
+        disc, validity = self._decide()
+        return not validity if slot == _V else not disc
+
+    def next_index(self, start: int = 0) -> Optional[int]:
+        """Posición en `order` del próximo ítem a preguntar desde start, o None si ya no hace falta."""
+        for k in range(start, len(self.order)):
+            if self.needed(self.order[k]):
+                return k
+        return None
+
+    def next_item(self) -> Optional[Item]:
+        k = self.next_index()
+        return None if k is None else self.order[k]
+
+    @property
+    def asked(self) -> int:
+        return len(self.answers)
+
+    @property
+    def skipped(self) -> int:
+        return sum(1 for it in self.items if it.id not in self.answers)
+
+    def provisional(self) -> Optional[Tuple[str, List[str]]]:
+        """(primary, secondary) si ya está decidido, si no None."""
+        if not self.disc_decided:
+            return None
+        primary, secondary = _OUTCOMES[int(self._grid[tuple(lo - self.table.lo for lo, _ in self.bounds()[:4])])]
+        return DIMS[primary], [DIMS[j] for j in secondary]
@@ -0,0 +1,253 @@
+"""
+Calidad psicométrica del instrumento sobre grandes volúmenes de respuestas.
+
+Se recorre la matriz N×n_items en bloques acumulando estadísticos suficientes
+(n, suma por ítem, XᵀX y conteos por valor Likert), así que la memoria no
+depende de N y los acumuladores de distintos bloques/procesos se combinan con
+merge(). Con eso se obtiene, sin volver a leer los datos:
+
+  - alfa de Cronbach por escala D/I/S/C (y alfa si se elimina cada ítem),
+  - correlación ítem-total corregida de cada ítem (ya invertidos los inversos),
+  - chequeo de los ítems inversos (D10, I08, S10, C10): sin invertir deben
+    correlacionar en negativo con el resto de su escala,
+  - distribución de los ítems de validez V01–V06 y de su suma.
+
+    python analytics.py respuestas.csv            # también .jsonl / .discr / '-'
+    python analytics.py respuestas.discr --json
+"""
+import argparse
+import json
+import sys
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from questionnaire import Item, get_items
+from scoring import DIMS, LIKERT_MAX, LIKERT_MIN
+
+N_LEVELS = LIKERT_MAX - LIKERT_MIN + 1
+
+@dataclass
+class ResponseStats:
+    """Estadísticos suficientes de una matriz de respuestas (columnas en el orden de items)."""
+    n_items: int
+    n: int = 0
+    total: np.ndarray = None    # (k,) suma por ítem
+    cross: np.ndarray = None    # (k, k) XᵀX
+    counts: np.ndarray = None   # (k, N_LEVELS) cantidad de cada valor 1..5
+
+    def __post_init__(self):
+        k = self.n_items
+        if self.total is None:
+            self.total = np.zeros(k)
+        if self.cross is None:
+            self.cross = np.zeros((k, k))
+        if self.counts is None:
+            self.counts = np.zeros((k, N_LEVELS), dtype=np.int64)
+
+    def update(self, answers_matrix) -> "ResponseStats":
+        x = np.asarray(answers_matrix)
+        if x.ndim != 2 or x.shape[1] != self.n_items:
+            raise ValueError(f"Se esperaba una matriz N×{self.n_items}, se recibió {x.shape}")
+        if len(x) == 0:
+            return self
+        if x.min() < LIKERT_MIN or x.max() > LIKERT_MAX:
+            raise ValueError("Respuesta fuera de rango (1..5)")
+        xf = x.astype(np.float64)
+        # float64 usa BLAS; exacto mientras la suma del bloque no pase de 2**53
+        self.total += xf.sum(axis=0)
+        self.cross += xf.T @ xf
+        # conteos por valor: un bincount sobre (columna, valor) codificados juntos
+        codes = (x - LIKERT_MIN).astype(np.int64) + np.arange(self.n_items) * N_LEVELS
+        self.counts += np.bincount(codes.ravel(), minlength=self.n_items * N_LEVELS
+                                   ).reshape(self.n_items, N_LEVELS)
+        self.n += len(x)
+        return self
+
+    def merge(self, other: "ResponseStats") -> "ResponseStats":
+        if other.n_items != self.n_items:
+            raise ValueError("Los acumuladores tienen distinta cantidad de ítems")
+        self.n += other.n
+        self.total += other.total
+        self.cross += other.cross
+        self.counts += other.counts
+        return self
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self.total / self.n
+
+    def covariance(self) -> np.ndarray:
+        """Covarianza muestral (k, k)."""
+        if self.n < 2:
+            raise ValueError("Se necesitan al menos 2 respuestas")
+        mu = self.mean
+        return (self.cross - self.n * np.outer(mu, mu)) / (self.n - 1)
+
+# -----------------------------
+# Reporte
+# -----------------------------
+@dataclass
+class ItemReport:
+    id: str
+    dim: str
+    reverse: bool
+    mean: float                  # media sin invertir
+    sd: float
+    item_total_r: float          # correlación con el resto de la escala (ítem ya invertido si corresponde)
+    alpha_if_deleted: float
+
+@dataclass
+class ScaleReport:
+    dim: str
+    n_items: int
+    alpha: float
+    items: List[ItemReport] = field(default_factory=list)
+
+@dataclass
+class ReverseCheck:
+    id: str
+    dim: str
+    raw_rest_r: float            # sin invertir vs resto de la escala: se espera < 0
+    ok: bool
+
+@dataclass
+class ValidityReport:
+    distribution: Dict[str, List[float]]   # id -> % de respuestas 1..5
+    mean: Dict[str, float]
+    sum_mean: float
+    sum_sd: float
+
+@dataclass
+class AnalyticsReport:
+    n: int
+    scales: List[ScaleReport]
+    reverse_checks: List[ReverseCheck]
+    validity: Optional[ValidityReport]
+
+    def to_dict(self) -> dict:
+        from dataclasses import asdict
+        return asdict(self)
+
+def _alpha(cov: np.ndarray) -> float:
+    k = len(cov)
+    total_var = cov.sum()
+    if k < 2 or total_var <= 0:
+        return float("nan")
+    return k / (k - 1) * (1.0 - np.trace(cov) / total_var)
+
+def _safe_r(num: float, var_a: float, var_b: float) -> float:
+    den = var_a * var_b
+    return float(num / np.sqrt(den)) if den > 0 else float("nan")
+
+def build_report(stats: ResponseStats, items: Sequence[Item]) -> AnalyticsReport:
+    cov = stats.covariance()
+    mean = stats.mean
+    # Invertir un ítem (x -> 6 - x) solo cambia el signo de sus covarianzas
+    sign = np.array([-1.0 if it.reverse else 1.0 for it in items])
+    keyed = cov * np.outer(sign, sign)
+
+    scales, checks = [], []
+    for d in DIMS:
+        idx = [i for i, it in enumerate(items) if it.dim == d]
+        if not idx:
+            continue
+        c = keyed[np.ix_(idx, idx)]
+        scale = ScaleReport(dim=d, n_items=len(idx), alpha=float(_alpha(c)))
+        var_total = c.sum()
+        row_sums = c.sum(axis=1)
+        for j, i in enumerate(idx):
+            it = items[i]
+            var_i = c[j, j]
+            # cov(i, total - i) y var(total - i) a partir de la matriz de la escala
+            cov_rest = row_sums[j] - var_i
+            var_rest = var_total - 2 * row_sums[j] + var_i
+            rest = [m for m in range(len(idx)) if m != j]
+            scale.items.append(ItemReport(
+                id=it.id, dim=d, reverse=it.reverse,
+                mean=float(mean[i]), sd=float(np.sqrt(cov[i, i])),
+                item_total_r=_safe_r(cov_rest, var_i, var_rest),
+                alpha_if_deleted=float(_alpha(c[np.ix_(rest, rest)])),
+            ))
+            if it.reverse:
+                raw_r = _safe_r(-cov_rest, var_i, var_rest)
+                checks.append(ReverseCheck(id=it.id, dim=d, raw_rest_r=raw_r, ok=raw_r < 0))
+        scales.append(scale)
+
+    validity = None
+    v_idx = [i for i, it in enumerate(items) if it.dim == "V"]
+    if v_idx:
+        pct = stats.counts[v_idx] / stats.n * 100.0
+        cv = cov[np.ix_(v_idx, v_idx)]
+        validity = ValidityReport(
+            distribution={items[i].id: pct[j].tolist() for j, i in enumerate(v_idx)},
+            mean={items[i].id: float(mean[i]) for i in v_idx},
+            sum_mean=float(mean[v_idx].sum()),
+            sum_sd=float(np.sqrt(cv.sum())),
+        )
+    return AnalyticsReport(n=stats.n, scales=scales, reverse_checks=checks, validity=validity)
+
+def analyze(chunks: Iterable[np.ndarray], items: Sequence[Item]) -> AnalyticsReport:
+    """chunks: matrices (n, len(items)) de respuestas 1..5."""
+    stats = ResponseStats(len(items))
+    for x in chunks:
+        stats.update(x)
+    return build_report(stats, items)
+
+def format_report(rep: AnalyticsReport) -> str:
+    lines = [f"Respuestas analizadas: {rep.n}", ""]
+    lines.append("Confiabilidad por escala (alfa de Cronbach)")
+    for s in rep.scales:
+        lines.append(f"  {s.dim}: alfa = {s.alpha:.3f} ({s.n_items} ítems)")
+    lines.append("")
+    lines.append("Ítems: media, sd, r ítem-total corregida, alfa si se elimina")
+    for s in rep.scales:
+        for it in s.items:
+            mark = " (inv)" if it.reverse else ""
+            warn = "  <- r baja" if not it.item_total_r >= 0.2 else ""
+            lines.append(f"  {it.id}{mark:<6} {it.mean:5.2f} {it.sd:5.2f}  "
+                         f"r={it.item_total_r:6.3f}  alfa-i={it.alpha_if_deleted:.3f}{warn}")
+    lines.append("")
+    lines.append("Ítems inversos (sin invertir vs resto de la escala, se espera r < 0)")
+    for c in rep.reverse_checks:
+        lines.append(f"  {c.id}: r = {c.raw_rest_r:6.3f}  {'OK' if c.ok else 'REVISAR'}")
+    if rep.validity:
+        v = rep.validity
+        lines.append("")
+        lines.append("Validez: % de respuestas 1..5 y media")
+        for vid, dist in v.distribution.items():
+            cells = " ".join(f"{p:5.1f}" for p in dist)
+            lines.append(f"  {vid}: {cells}   media {v.mean[vid]:.2f}")
+        lines.append(f"  Suma V: media {v.sum_mean:.2f}, sd {v.sum_sd:.2f}")
+    return "\n".join(lines)
+
+def main(argv=None) -> None:
+    from batch import DEFAULT_CHUNK_SIZE, guess_format, iter_chunks, open_text, read_rows, store_chunks
+
+    p = argparse.ArgumentParser(description="Reporte psicométrico (alfa, ítem-total, inversos, validez).")
+    p.add_argument("input", help="CSV/JSONL/.discr con respuestas ('-' = stdin).")
+    p.add_argument("--input-format", choices=["csv", "jsonl", "store"],
+                   help="Formato de entrada (por defecto según la extensión, o csv).")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE * 10, help="Filas por bloque.")
+    p.add_argument("--json", action="store_true", help="Salida en JSON en vez de texto.")
+    args = p.parse_args(argv)
+
+    items = get_items()
+    fmt = args.input_format or guess_format(args.input)
+    with (nullcontext() if fmt == "store" else open_text(args.input, "r")) as f:
+        if fmt == "store":
+            chunks = (x for _, x in store_chunks(args.input, items, args.chunk_size))
+        else:
+            chunks = (x for _, x in iter_chunks(read_rows(f, items, fmt), args.chunk_size))
+        rep = analyze(chunks, items)
+
+    if args.json:
+        json.dump(rep.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print(format_report(rep))
+
+if __name__ == "__main__":
+    main()
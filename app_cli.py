@@ -1,8 +1,10 @@
+import argparse
 import os
+import sys
+from collections import deque
+from typing import Optional
 from questionnaire import get_items
 from scoring import score_disc
-from charts import bar_chart, radar_chart, quadrant_chart
-from report_pdf import build_pdf
 
 def ask_likert(prompt: str) -> int:
     while True:
@@ -14,23 +16,38 @@ def ask_likert(prompt: str) -> int:
             pass
         print("Ingresa un número 1–5.")
 
-def main():
+def interactive(adaptive: bool = False, db_path: Optional[str] = None):
     items = get_items()
     print("DISC (1–5): 1=Totalmente en desacuerdo ... 5=Totalmente de acuerdo\n")
 
     person = input("Nombre evaluado: ").strip() or "N/A"
     role = input("Rol/Área: ").strip() or "N/A"
 
-    answers = {}
-    for it in items:
-        if it.dim == "V":
-            # opcional: puedes preguntar también validez; aquí sí la preguntamos.
-            pass
-        q = f"[{it.id}] {it.text}\n  1 2 3 4 5 -> "
-        answers[it.id] = ask_likert(q)
+    if adaptive:
+        # Se deja de preguntar cuando primary/secondary/validez ya no pueden cambiar
+        from adaptive import AdaptiveSession, interleaved
+        session = AdaptiveSession(items, interleaved(items))
+        while (it := session.next_item()) is not None:
+            q = f"[{it.id}] {it.text}\n  1 2 3 4 5 -> "
+            session.answer(it.id, ask_likert(q))
+        answers = session.completed_answers()
+        if session.skipped:
+            print(f"\nResultado decidido: se omitieron {session.skipped} de {len(items)} preguntas.")
+    else:
+        answers = {}
+        for it in items:
+            if it.dim == "V":
+                # opcional: puedes preguntar también validez; aquí sí la preguntamos.
+                pass
+            q = f"[{it.id}] {it.text}\n  1 2 3 4 5 -> "
+            answers[it.id] = ask_likert(q)
 
     res = score_disc(items, answers)
 
+    # matplotlib y reportlab se cargan recién aquí: la primera pregunta aparece sin esperarlos
+    from charts import bar_chart, radar_chart, quadrant_chart
+    from report_pdf import build_pdf
+
     os.makedirs("out", exist_ok=True)
     img_bar = "out/disc_bar.png"
     img_radar = "out/disc_radar.png"
@@ -59,5 +76,167 @@ def main():
     print("Validez:", res.validity_score, "Flag:", res.validity_flag)
     print("\nPDF generado:", out_pdf)
 
+    if db_path:
+        from storage import ResultStore
+        with ResultStore(db_path, items) as db:
+            rid = db.add(res, answers, person_name=person, role=role, report_path=out_pdf)
+        print(f"Guardado en {db_path} (id {rid})")
+
+def bulk(args) -> None:
+    from batch import run_batch
+    n, secs = run_batch(args.batch, args.output,
+                        in_format=args.input_format, out_format=args.output_format,
+                        chunk_size=args.chunk_size, store_path=args.store,
+                        norms_path=args.norms, update_norms_path=args.update_norms,
+                        use_lookup=args.lookup, db_path=args.db, export_path=args.export)
+    rate = n / secs if secs > 0 else float("inf")
+    print(f"Procesadas {n} filas en {secs:.2f} s ({rate:,.0f} filas/s)", file=sys.stderr)
+
+def reports(args) -> None:
+    import time
+    from cohort_reports import generate_reports, read_jobs
+
+    def progress(o):
+        status = "ok" if o.ok else "ERROR"
+        print(f"[{o.index + 1}] {o.respondent_id}: {status} ({o.seconds:.2f} s)", file=sys.stderr)
+        if not o.ok:
+            print(o.error, file=sys.stderr)
+
+    t0 = time.perf_counter()
+    jobs = read_jobs(args.reports, args.input_format)
+    db = None
+    if args.db:
+        from storage import ResultStore
+        db = ResultStore(args.db, get_items())
+        jobs = _remember(jobs, sent := deque())
+    outcomes = generate_reports(jobs, args.out_dir, workers=args.workers, progress=progress,
+                                cache_dir=args.cache_dir, vector=not args.png_charts)
+    if db is not None:
+        # los resultados llegan en orden de entrada: cada uno corresponde al trabajo más viejo enviado
+        outcomes = _stored(outcomes, sent, db)
+    try:
+        outcomes = list(outcomes)
+    finally:
+        if db is not None:
+            db.close()
+    secs = time.perf_counter() - t0
+    failed = sum(1 for o in outcomes if not o.ok)
+    print(f"Informes: {len(outcomes) - failed} ok, {failed} con error, en {secs:.2f} s "
+          f"-> {args.out_dir}", file=sys.stderr)
+
+def _remember(jobs, sent):
+    for job in jobs:
+        sent.append(job)
+        yield job
+
+def _stored(outcomes, sent, db, batch_size: int = 500):
+    """Guarda en db cada informe generado (resultado, respuestas y ruta del PDF), por lotes."""
+    from cache import cached_score_disc
+
+    items = get_items()
+    rows = []
+    for o in outcomes:
+        job = sent.popleft()
+        if o.ok:
+            res = cached_score_disc(items, job.answers)
+            rows.append(db.result_row(res, job.answers, job.person_name, job.role,
+                                      job.respondent_id, o.pdf_path))
+            if len(rows) >= batch_size:
+                db.add_rows(rows)
+                rows = []
+        yield o
+    db.add_rows(rows)
+
+def team(args) -> None:
+    import time
+    from team_report import run_team_report
+
+    out_pdf = args.output if args.output != "-" else "out/informe_equipo.pdf"
+    if os.path.dirname(out_pdf):
+        os.makedirs(os.path.dirname(out_pdf), exist_ok=True)
+    t0 = time.perf_counter()
+    summary = run_team_report(args.team_report, out_pdf,
+                              in_format=args.input_format, chunk_size=args.chunk_size)
+    print(f"Informe de equipo: {summary.n} personas en {time.perf_counter() - t0:.2f} s "
+          f"-> {out_pdf}", file=sys.stderr)
+
+def binder(args) -> None:
+    from binder import build_binder
+    from cohort_reports import read_jobs
+
+    out_pdf = args.output if args.output != "-" else "out/carpeta_cohorte.pdf"
+    if os.path.dirname(out_pdf):
+        os.makedirs(os.path.dirname(out_pdf), exist_ok=True)
+    st = build_binder(out_pdf, read_jobs(args.binder, args.input_format), vector=not args.png_charts)
+    print(f"Carpeta: {st.pages} páginas, {st.unique_profiles} perfiles distintos, "
+          f"{st.bytes / 1024:,.0f} KiB en {st.seconds:.2f} s -> {out_pdf}", file=sys.stderr)
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="Cuestionario DISC (interactivo o por lotes).")
+    p.add_argument("--adaptive", action="store_true",
+                   help="Modo interactivo abreviado: deja de preguntar cuando el resultado ya está decidido.")
+    p.add_argument("--batch", metavar="ENTRADA",
+                   help="Modo por lotes: archivo CSV/JSONL/.discr con respuestas ('-' = stdin).")
+    p.add_argument("--output", default="-", help="Salida del modo por lotes ('-' = stdout).")
+    p.add_argument("--input-format", choices=["csv", "jsonl"],
+                   help="Formato de entrada (por defecto según la extensión, o csv).")
+    p.add_argument("--output-format", choices=["csv", "jsonl"],
+                   help="Formato de salida (por defecto según la extensión, o csv).")
+    p.add_argument("--chunk-size", type=int, default=10_000, help="Filas por bloque.")
+    p.add_argument("--store", metavar="ARCHIVO.discr",
+                   help="Agrega las respuestas del lote a un almacén compacto (response_store).")
+    p.add_argument("--norms", metavar="NORMAS.json",
+                   help="Normas poblacionales: agrega z y percentil poblacional a la salida del lote.")
+    p.add_argument("--update-norms", metavar="NORMAS.json",
+                   help="Actualiza (o crea) esas normas con los puntajes del lote.")
+    p.add_argument("--lookup", action="store_true",
+                   help="Clasifica el lote con la tabla precalculada de lookup.py (sin ordenar por fila).")
+    p.add_argument("--export", metavar="CARPETA",
+                   help="Agrega los resultados del lote a un export columnar (.npz, export.py) para análisis.")
+    p.add_argument("--reports", metavar="ENTRADA",
+                   help="Genera un PDF por persona (CSV/JSONL con id, name, role y respuestas).")
+    p.add_argument("--team-report", metavar="ENTRADA",
+                   help="PDF agregado del equipo (blends, perfil y mapa de densidad); "
+                        "se escribe en --output o en out/informe_equipo.pdf.")
+    p.add_argument("--binder", metavar="ENTRADA",
+                   help="Un solo PDF con el informe de cada persona (mismo formato que --reports); "
+                        "se escribe en --output o en out/carpeta_cohorte.pdf.")
+    p.add_argument("--out-dir", default="out/informes", help="Carpeta de salida de --reports.")
+    p.add_argument("--workers", type=int, default=None,
+                   help="Procesos para --reports (por defecto, núcleos disponibles).")
+    p.add_argument("--png-charts", action="store_true",
+                   help="En --reports y --binder, insertar gráficos PNG (matplotlib) en vez de vectoriales.")
+    p.add_argument("--cache-dir", default=None,
+                   help="Caché en disco de resultados y gráficos, compartida entre procesos.")
+    p.add_argument("--db", metavar="ARCHIVO.sqlite",
+                   help="Guarda respuestas y resultados en ese almacén SQLite (storage.py): "
+                        "modo interactivo, --batch y --reports.")
+    p.add_argument("--metrics", metavar="ARCHIVO",
+                   help="Mide cada etapa (scoring, gráficos, PDF) y guarda las métricas al terminar "
+                        "(.prom = formato Prometheus, si no JSON).")
+    p.add_argument("--metrics-memory", action="store_true",
+                   help="Con --metrics, registra también el pico de memoria (tracemalloc).")
+    args = p.parse_args(argv)
+
+    import instrumentation
+    instrumentation.configure_from_env()
+    if args.metrics:
+        instrumentation.enable(memory=args.metrics_memory)
+
+    try:
+        if args.batch:
+            bulk(args)
+        elif args.reports:
+            reports(args)
+        elif args.team_report:
+            team(args)
+        elif args.binder:
+            binder(args)
+        else:
+            interactive(adaptive=args.adaptive, db_path=args.db)
+    finally:
+        if args.metrics:
+            instrumentation.write_metrics(args.metrics)
+
 if __name__ == "__main__":
     main()
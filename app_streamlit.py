@@ -1,25 +1,26 @@
 import io
 import math
+import os
 import time
 import random
 from dataclasses import dataclass
-from typing import Dict, List, Literal, Tuple
+from functools import partial
+from typing import Dict, List, Literal, Optional, Tuple
 
 import streamlit as st
-import matplotlib.pyplot as plt
-
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import cm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import (
-    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
-)
+
+# matplotlib y reportlab se importan dentro de las funciones de gráficos/PDF:
+# no se cargan mientras la persona está respondiendo.
+
+from cache import memoize_png
+from instrumentation import configure_from_env, instrumented, span
+from scoring import DIMS, NEUTRAL, ScoreAccumulator, get_scoring_plan
 
 # -----------------------------
 # Config (sin parámetros visibles)
 # -----------------------------
 st.set_page_config(page_title="DISC — Cuestionario + Informe", layout="wide")
+configure_from_env()   # DISC_INSTRUMENT / DISC_METRICS_PORT; el servidor se abre una sola vez
 
 LIKERT_MIN, LIKERT_MAX = 1, 5
 Dim = Literal["D", "I", "S", "C", "V"]
@@ -28,6 +29,13 @@ Dim = Literal["D", "I", "S", "C", "V"]
 BLEND_RATIO_DEFAULT = 0.90
 BLEND_ABS_DEFAULT = 2
 VALIDITY_THRESHOLD_DEFAULT = 24  # 6 ítems * max 5 = 30
+# Modo adaptativo (adaptive.py): deja de preguntar cuando primary/secondary/validez
+# ya no pueden cambiar. También se activa con ?adaptive=1 en la URL.
+ADAPTIVE_DEFAULT = False
+# Vista previa en vivo del perfil parcial mientras se responde (sin gráficos)
+LIVE_PREVIEW_DEFAULT = True
+# Almacén SQLite de resultados (storage.py); vacío = no se guarda nada
+DB_PATH_DEFAULT = os.environ.get("DISC_DB", "")
 
 # Colores internos (solo para resultados/informe)
 COLOR_HEX = {
@@ -175,21 +183,17 @@ def blend_insights(primary: str, secondary: List[str]) -> List[str]:
 def reverse_score(x: int) -> int:
     return (LIKERT_MAX + LIKERT_MIN) - x
 
+@instrumented("app_streamlit.score_disc")
 def score_disc(items: List[Item], answers: Dict[str, int]) -> Dict:
+    # Plan compilado compartido con scoring.py (cacheado por cuestionario)
+    raw, validity = get_scoring_plan(items).sums(answers)
+    return score_from_sums(raw, validity)
+
+def score_from_sums(raw: Dict[str, int], validity: int) -> Dict:
+    """Resultado a partir de sumas ya calculadas (p. ej. del ScoreAccumulator de la sesión)."""
     dims = ["D", "I", "S", "C"]
-    raw = {d: 0 for d in dims}
-    validity = 0
     notes = []
 
-    for it in items:
-        x = answers[it.id]
-        if it.reverse:
-            x = reverse_score(x)
-        if it.dim in raw:
-            raw[it.dim] += x
-        elif it.dim == "V":
-            validity += x
-
     total = sum(raw.values())
     pct = {d: (raw[d] / total * 100.0) if total else 0.0 for d in dims}
 
@@ -226,13 +230,22 @@ def score_disc(items: List[Item], answers: Dict[str, int]) -> Dict:
 # -----------------------------
 # Charts (bytes)
 # -----------------------------
+def _plt():
+    import matplotlib.pyplot as plt
+    return plt
+
+@instrumented("app_streamlit.fig_to_png_bytes")
 def fig_to_png_bytes(fig) -> bytes:
+    plt = _plt()
     buf = io.BytesIO()
     fig.savefig(buf, format="png", dpi=200, bbox_inches="tight")
     plt.close(fig)
     return buf.getvalue()
 
+@instrumented("app_streamlit.bar_chart_bytes")
+@memoize_png("st_bar")
 def bar_chart_bytes(raw: Dict[str, int]) -> bytes:
+    plt = _plt()
     dims = ["D", "I", "S", "C"]
     vals = [raw[d] for d in dims]
     colors_ = [COLOR_HEX[d] for d in dims]
@@ -243,7 +256,10 @@ def bar_chart_bytes(raw: Dict[str, int]) -> bytes:
     plt.ylabel("Puntaje")
     return fig_to_png_bytes(fig)
 
+@instrumented("app_streamlit.radar_chart_bytes")
+@memoize_png("st_radar")
 def radar_chart_bytes(pct: Dict[str, float]) -> bytes:
+    plt = _plt()
     dims = ["D", "I", "S", "C"]
     vals = [pct[d] for d in dims]
     vals += vals[:1]
@@ -258,7 +274,10 @@ def radar_chart_bytes(pct: Dict[str, float]) -> bytes:
     ax.set_ylim(0, 100)
     return fig_to_png_bytes(fig)
 
+@instrumented("app_streamlit.quadrant_chart_bytes")
+@memoize_png("st_quadrant")
 def quadrant_chart_bytes(z: Dict[str, float], primary: str) -> bytes:
+    plt = _plt()
     x = (z["D"] + z["I"]) - (z["S"] + z["C"])
     y = (z["D"] + z["C"]) - (z["I"] + z["S"])
     fig = plt.figure()
@@ -272,7 +291,10 @@ def quadrant_chart_bytes(z: Dict[str, float], primary: str) -> bytes:
     plt.ylabel("Tarea  ←→  Personas")
     return fig_to_png_bytes(fig)
 
+@instrumented("app_streamlit.donut_chart_bytes")
+@memoize_png("st_donut")
 def donut_chart_bytes(pct: Dict[str, float]) -> bytes:
+    plt = _plt()
     dims = ["D", "I", "S", "C"]
     vals = [pct[d] for d in dims]
     colors_ = [COLOR_HEX[d] for d in dims]
@@ -288,15 +310,27 @@ def donut_chart_bytes(pct: Dict[str, float]) -> bytes:
 # -----------------------------
 # PDF (Platypus)
 # -----------------------------
-def _img_from_bytes(png_bytes: bytes, width_cm: float) -> Image:
+def _img_from_bytes(png_bytes: bytes, width_cm: float) -> "Image":
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Image
     bio = io.BytesIO(png_bytes)
     img = Image(bio)
     img.drawWidth = width_cm * cm
     img.drawHeight = img.drawWidth * 0.62
     return img
 
+@instrumented("app_streamlit.build_pdf_bytes")
 def build_pdf_bytes(person_name: str, role: str, result: Dict,
-                    img_bar: bytes, img_radar: bytes, img_quad: bytes, img_donut: bytes) -> bytes:
+                    img_bar: Optional[bytes] = None, img_radar: Optional[bytes] = None,
+                    img_quad: Optional[bytes] = None, img_donut: Optional[bytes] = None,
+                    vector: bool = False) -> bytes:
+    """vector=True dibuja los gráficos con vector_charts (sin PNG); si no, usa los img_* recibidos."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib import colors
+    from reportlab.lib.units import cm
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
     buf = io.BytesIO()
     doc = SimpleDocTemplate(buf, pagesize=A4, leftMargin=1.6*cm, rightMargin=1.6*cm, topMargin=1.6*cm, bottomMargin=1.6*cm)
 
@@ -360,16 +394,51 @@ def build_pdf_bytes(person_name: str, role: str, result: Dict,
     story.append(Spacer(1, 10))
 
     story.append(Paragraph("Gráficos", H2))
-    story.append(_img_from_bytes(img_bar, width_cm=17.0))
+    if vector:
+        from vector_charts import bar_drawing, radar_drawing, quadrant_drawing, donut_drawing
+        chart_bar = bar_drawing(raw, width=17*cm, height=17*cm*0.62, title="DISC — Puntajes crudos",
+                                colors_by_dim=COLOR_HEX)
+        chart_radar = radar_drawing(pct, width=8.2*cm, height=8.2*cm*0.62,
+                                    title="DISC — Araña (0–100% internos)", color="#333333")
+        chart_donut = donut_drawing(pct, width=8.2*cm, height=8.2*cm*0.62, colors_by_dim=COLOR_HEX)
+        chart_quad = quadrant_drawing(z, width=17*cm, height=17*cm*0.62, color=COLOR_HEX[primary])
+    else:
+        chart_bar = _img_from_bytes(img_bar, width_cm=17.0)
+        chart_radar = _img_from_bytes(img_radar, 8.2)
+        chart_donut = _img_from_bytes(img_donut, 8.2)
+        chart_quad = _img_from_bytes(img_quad, width_cm=17.0)
+    story.append(chart_bar)
     story.append(Spacer(1, 6))
-    row = Table([[_img_from_bytes(img_radar, 8.2), _img_from_bytes(img_donut, 8.2)]], colWidths=[8.2*cm, 8.2*cm])
+    row = Table([[chart_radar, chart_donut]], colWidths=[8.2*cm, 8.2*cm])
     story.append(row)
     story.append(Spacer(1, 6))
-    story.append(_img_from_bytes(img_quad, width_cm=17.0))
+    story.append(chart_quad)
 
-    doc.build(story)
+    with span("app_streamlit.pdf_layout"):
+        doc.build(story)
     return buf.getvalue()
 
+# -----------------------------
+# Resultados memoizados (entre reruns y sesiones)
+# -----------------------------
+def raw_key(result: Dict) -> Tuple[int, int, int, int]:
+    # Los 4 gráficos dependen solo de los puntajes crudos (pct, z y primario derivan de ellos)
+    return tuple(result["raw"][d] for d in ["D", "I", "S", "C"])
+
+@st.cache_data(max_entries=1024, show_spinner=False)
+def result_chart_bytes(raw: Tuple[int, int, int, int], _result: Dict) -> Tuple[bytes, bytes, bytes, bytes]:
+    return (
+        bar_chart_bytes(_result["raw"]),
+        radar_chart_bytes(_result["pct"]),
+        quadrant_chart_bytes(_result["z"], primary=_result["primary"]),
+        donut_chart_bytes(_result["pct"]),
+    )
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def result_pdf_bytes(person: str, role: str, answers_key: Tuple[int, ...], _result: Dict) -> bytes:
+    imgs = result_chart_bytes(raw_key(_result), _result)
+    return build_pdf_bytes(person, role, _result, *imgs)
+
 # -----------------------------
 # Estado evaluación (1 pregunta)
 # -----------------------------
@@ -384,6 +453,15 @@ def init_eval():
     st.session_state.answers = {}
     st.session_state.finished = False
     st.session_state.result = None
+    st.session_state.result_id = None
+    # Sumas incrementales de las respuestas: O(1) por cambio, también al volver atrás
+    st.session_state.acc = ScoreAccumulator(items_all)
+    st.session_state.adaptive = None
+    if ADAPTIVE_DEFAULT or st.query_params.get("adaptive") == "1":
+        from adaptive import AdaptiveSession
+        st.session_state.adaptive = AdaptiveSession(
+            items_all, st.session_state.items_shuffled, BLEND_RATIO_DEFAULT, BLEND_ABS_DEFAULT,
+            VALIDITY_THRESHOLD_DEFAULT)
 
 if "items_shuffled" not in st.session_state:
     init_eval()
@@ -436,16 +514,90 @@ with top3:
 st.session_state["person_name"] = person_name
 st.session_state["role"] = role
 
-items_shuffled: List[Item] = st.session_state.items_shuffled
-n_items = len(items_shuffled)
-idx = st.session_state.idx
+# -----------------------------
+# Pregunta actual (fragmento: cada clic reejecuta solo esta parte)
+# -----------------------------
+def _go_back(item_id: str):
+    adaptive = st.session_state.get("adaptive")
+    if adaptive is None:
+        st.session_state.idx = max(0, st.session_state.idx - 1)
+        return
+    # lo elegido antes de volver también cuenta (puede reabrir la decisión)
+    adaptive.answer(item_id, int(st.session_state[f"radio_{item_id}"]))
+    items_shuffled = st.session_state.items_shuffled
+    prev = [k for k in range(st.session_state.idx) if items_shuffled[k].id in adaptive.answers]
+    st.session_state.idx = prev[-1] if prev else 0
+
+def _accumulator() -> ScoreAccumulator:
+    acc = st.session_state.get("acc")
+    if acc is None:     # sesión iniciada antes de existir el acumulador
+        acc = st.session_state.acc = ScoreAccumulator(items_all)
+        for item_id, v in st.session_state.answers.items():
+            acc.set(item_id, v)
+    return acc
+
+def _set_answer(item_id: str, value: int) -> None:
+    st.session_state.answers[item_id] = value
+    _accumulator().set(item_id, value)
+
+def _go_next(item_id: str):
+    _set_answer(item_id, int(st.session_state[f"radio_{item_id}"]))
+    adaptive = st.session_state.get("adaptive")
+    if adaptive is not None:
+        adaptive.answer(item_id, st.session_state.answers[item_id])
+        nxt = adaptive.next_index(st.session_state.idx + 1)
+        if nxt is None:
+            # una respuesta corregida al volver puede dejar pendientes ítems anteriores
+            nxt = adaptive.next_index()
+        if nxt is not None:
+            st.session_state.idx = nxt
+            return
+    elif st.session_state.idx < len(st.session_state.items_shuffled) - 1:
+        st.session_state.idx += 1
+        return
+    # Sin responder = 3 (neutro), igual que el dict completo que se armaba antes
+    st.session_state.result = score_from_sums(*_accumulator().completed_sums())
+    st.session_state.finished = True
+    if DB_PATH_DEFAULT:
+        st.session_state.result_id = _store_result()
+    st.session_state.show_results = True
+
+def _store_result() -> int:
+    from storage import ResultStore
+
+    acc = _accumulator()
+    res = acc.result(blend_ratio=BLEND_RATIO_DEFAULT, blend_abs=BLEND_ABS_DEFAULT,
+                     validity_threshold=VALIDITY_THRESHOLD_DEFAULT)
+    answers = {it.id: acc.answers.get(it.id, NEUTRAL) for it in items_all}
+    # una conexión por evaluación: la sesión de Streamlit puede cambiar de hilo entre reruns
+    with ResultStore(DB_PATH_DEFAULT, items_all) as db:
+        return db.add(res, answers, person_name=(st.session_state.get("person_name") or "").strip() or None,
+                      role=(st.session_state.get("role") or "").strip() or None)
+
+@st.fragment
+def question_flow():
+    if st.session_state.pop("show_results", False):
+        # Finalizar: los resultados están fuera del fragmento, hace falta un rerun completo
+        st.rerun()
+
+    items_shuffled: List[Item] = st.session_state.items_shuffled
+    n_items = len(items_shuffled)
+    idx = st.session_state.idx
 
-st.progress((idx) / n_items if n_items else 0)
+    adaptive = st.session_state.get("adaptive")
+    done = idx if adaptive is None else adaptive.asked
+    st.progress(done / n_items if n_items else 0)
+
+    if st.session_state.finished:
+        return
 
-if not st.session_state.finished:
     it = items_shuffled[idx]
     st.markdown('<div class="big-card">', unsafe_allow_html=True)
-    st.markdown(f'<div class="q-sub">Pregunta {idx+1} de {n_items}</div>', unsafe_allow_html=True)
+    if adaptive is None:
+        st.markdown(f'<div class="q-sub">Pregunta {idx+1} de {n_items}</div>', unsafe_allow_html=True)
+    else:
+        st.markdown(f'<div class="q-sub">Pregunta {adaptive.asked + 1} (máximo {n_items})</div>',
+                    unsafe_allow_html=True)
     st.markdown(f'<div class="q-title">{it.text}</div>', unsafe_allow_html=True)
     st.markdown("</div>", unsafe_allow_html=True)
     st.write("")
@@ -461,30 +613,33 @@ if not st.session_state.finished:
         key=f"radio_{it.id}",
         label_visibility="collapsed",
     )
-    st.session_state.answers[it.id] = int(choice)
+    _set_answer(it.id, int(choice))
 
     navL, navR, navC = st.columns([1, 1, 2])
     with navL:
-        back = st.button("⬅️ Atrás", use_container_width=True, disabled=(idx == 0))
+        st.button("⬅️ Atrás", use_container_width=True, disabled=(idx == 0), on_click=_go_back, args=(it.id,))
     with navR:
-        if idx < n_items - 1:
-            nxt = st.button("Siguiente ➡️", use_container_width=True)
-        else:
-            nxt = st.button("✅ Finalizar", use_container_width=True)
-
-    if back:
-        st.session_state.idx = max(0, idx - 1)
-        st.rerun()
-
-    if nxt:
-        if idx < n_items - 1:
-            st.session_state.idx = idx + 1
-            st.rerun()
-        else:
-            answers = {it0.id: st.session_state.answers.get(it0.id, 3) for it0 in items_all}
-            st.session_state.result = score_disc(items_all, answers)
-            st.session_state.finished = True
-            st.rerun()
+        last = idx == n_items - 1 if adaptive is None else adaptive.next_index(idx + 1) is None
+        label = "Siguiente ➡️" if not last else "✅ Finalizar"
+        st.button(label, use_container_width=True, on_click=_go_next, args=(it.id,))
+
+    if LIVE_PREVIEW_DEFAULT:
+        _live_preview(_accumulator())
+
+def _live_preview(acc: ScoreAccumulator) -> None:
+    """Perfil parcial desde las sumas incrementales: sin rescoring ni gráficos de matplotlib."""
+    primary = acc.provisional_primary()
+    with st.expander("Vista previa (parcial)", expanded=False):
+        if primary is None:
+            st.caption("Todavía no hay respuestas.")
+            return
+        pct = acc.running_pct()
+        st.caption(f"Primario provisional: {primary} — {COLOR_NAME[primary]} · "
+                   f"{sum(acc.answered)} de {sum(acc.size)} respuestas")
+        for d in DIMS:
+            st.progress(pct[d] / 100, text=f"{d} — {DIM_NAMES[d]}: {pct[d]:.1f}%")
+
+question_flow()
 
 # -----------------------------
 # Resultados + PDF
@@ -517,10 +672,13 @@ if st.session_state.finished and st.session_state.result:
     with r3:
         st.metric("% interno del primario", f"{result['pct'][primary]:.1f}%")
 
-    img_bar = bar_chart_bytes(result["raw"])
-    img_radar = radar_chart_bytes(result["pct"])
-    img_quad = quadrant_chart_bytes(result["z"], primary=primary)
-    img_donut = donut_chart_bytes(result["pct"])
+    adaptive = st.session_state.get("adaptive")
+    if adaptive is not None and adaptive.skipped:
+        st.caption(f"Cuestionario abreviado: se omitieron {adaptive.skipped} de {len(items_all)} preguntas "
+                   "porque ya no podían cambiar el primario, los secundarios ni la alerta de validez "
+                   "(para los puntajes se toman como neutras).")
+
+    img_bar, img_radar, img_quad, img_donut = result_chart_bytes(raw_key(result), result)
 
     cL, cR = st.columns([1, 1])
     with cL:
@@ -530,10 +688,11 @@ if st.session_state.finished and st.session_state.result:
         st.image(img_donut, caption="Composición (%)")
         st.image(img_quad, caption="Mapa conductual (esquema)")
 
-    pdf_bytes = build_pdf_bytes(person, role_, result, img_bar, img_radar, img_quad, img_donut)
+    answers_key = tuple(st.session_state.answers.get(it0.id, 3) for it0 in items_all)
     st.download_button(
         label="⬇️ Descargar informe PDF",
-        data=pdf_bytes,
+        # Se genera solo al pedir la descarga (y se cachea por nombre, rol y respuestas)
+        data=partial(result_pdf_bytes, person, role_, answers_key, result),
         file_name=f"informe_DISC_{person.replace(' ', '_')}.pdf",
         mime="application/pdf",
         use_container_width=True,
@@ -0,0 +1,318 @@
+"""
+Scoring masivo no interactivo: CSV/JSONL -> resultados CSV/JSONL.
+
+Todo el flujo son generadores encadenados (leer filas -> agrupar en bloques de
+tamaño fijo -> score_disc_batch -> escribir), así que la memoria depende del
+tamaño del bloque y no del número de filas del archivo.
+
+Entrada CSV: encabezado con los ids de ítem (D01..V06) y, opcionalmente, una
+columna "id" que se copia al resultado. Entrada JSONL: un objeto por línea con
+los ids de ítem en el nivel superior o dentro de "answers", y "id" opcional.
+Entrada .discr: almacén de response_store.py, leído en bloques desde el memmap.
+
+Con normas poblacionales (norms.py) la salida agrega pop_z_* y pop_pct_*, y
+las normas se pueden actualizar con los crudos del lote al pasar. Los
+resultados también se pueden guardar en SQLite (storage.py) o agregar a un
+export columnar para análisis (export.py).
+"""
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import IO, TYPE_CHECKING, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from questionnaire import Item, get_items
+from scoring import DIMS, DiscBatchResult, get_scoring_plan, score_disc_batch
+
+if TYPE_CHECKING:
+    from lookup import ClassificationTable
+    from norms import NormTable
+    from storage import ResultStore
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+Row = Tuple[str, List[str]]   # (id, respuestas como texto en el orden de items)
+
+def guess_format(path: str, default: str = "csv") -> str:
+    if path.endswith(".discr"):
+        return "store"
+    if path.endswith(".jsonl") or path.endswith(".ndjson"):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    return default
+
+@contextmanager
+def open_text(path: str, mode: str):
+    """'-' = stdin/stdout."""
+    if path == "-":
+        yield sys.stdin if "r" in mode else sys.stdout
+    else:
+        with open(path, mode, encoding="utf-8", newline="") as f:
+            yield f
+
+# -----------------------------
+# Lectura
+# -----------------------------
+def read_csv_rows(f: IO[str], items: List[Item]) -> Iterator[Row]:
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    pos = {name.strip(): i for i, name in enumerate(header)}
+    missing = [it.id for it in items if it.id not in pos]
+    if missing:
+        raise ValueError(f"Faltan columnas en el CSV: {', '.join(missing)}")
+    cols = [pos[it.id] for it in items]
+    id_col = pos.get("id")
+    for n, row in enumerate(reader, start=1):
+        if not row:
+            continue
+        rid = row[id_col] if id_col is not None else str(n)
+        yield rid, [row[c] for c in cols]
+
+def read_jsonl_rows(f: IO[str], items: List[Item]) -> Iterator[Row]:
+    for n, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        obj = json.loads(line)
+        answers = obj.get("answers", obj)
+        try:
+            vals = [answers[it.id] for it in items]
+        except KeyError as e:
+            raise ValueError(f"Falta respuesta para {e.args[0]} (línea {n})") from None
+        yield str(obj.get("id", n)), vals
+
+def read_rows(f: IO[str], items: List[Item], fmt: str) -> Iterator[Row]:
+    if fmt == "csv":
+        return read_csv_rows(f, items)
+    if fmt == "jsonl":
+        return read_jsonl_rows(f, items)
+    raise ValueError(f"Formato no soportado: {fmt}")
+
+def iter_chunks(rows: Iterable[Row], chunk_size: int = DEFAULT_CHUNK_SIZE
+                ) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Agrupa filas en bloques (ids, matriz (n, n_items) int16)."""
+    ids: List[str] = []
+    vals: List[list] = []
+    for rid, answers in rows:
+        ids.append(rid)
+        vals.append(answers)
+        if len(ids) >= chunk_size:
+            yield ids, _to_matrix(vals)
+            ids, vals = [], []
+    if ids:
+        yield ids, _to_matrix(vals)
+
+def _to_matrix(vals: List[list]) -> np.ndarray:
+    if isinstance(vals[0][0], str):
+        # Camino rápido: respuestas de un solo dígito -> un bytes y resta de '0'.
+        # Cada celda tiene que ser un str de un carácter: con solo el largo total,
+        # ['', '12', '3'] se leería como [1, 2, 3]
+        n_cols = len(vals[0])
+        try:
+            flat = "".join(["".join(r) for r in vals])
+        except TypeError:          # celdas int/None mezcladas: camino validado
+            flat = ""
+        if (len(flat) == len(vals) * n_cols and flat.isdigit()
+                and all(len(r) == n_cols and max(map(len, r)) == 1 for r in vals)):
+            digits = np.frombuffer(flat.encode("ascii"), dtype=np.uint8)
+            return (digits.astype(np.int16) - ord("0")).reshape(len(vals), n_cols)
+    try:
+        f = np.array(vals).astype(np.float64)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Respuesta no numérica en el bloque: {e}") from None
+    # astype(int16) trunca 3.5 y convierte NaN en basura: solo se aceptan enteros exactos
+    with np.errstate(invalid="ignore"):
+        m = f.astype(np.int16)
+    bad = m != f
+    if bad.any():
+        r, j = np.argwhere(bad)[0]
+        raise ValueError(f"Respuesta no numérica en el bloque: {vals[r][j]!r}")
+    return m
+
+def store_chunks(path: str, items: List[Item], chunk_size: int = DEFAULT_CHUNK_SIZE
+                 ) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Bloques (ids, matriz) desde un ResponseStore; el id es el número de fila."""
+    from response_store import ResponseStore
+    start = 0
+    for x in ResponseStore(path, items).iter_chunks(chunk_size):
+        yield [str(i) for i in range(start, start + len(x))], x
+        start += len(x)
+
+def tee_to_store(chunks: Iterable[Tuple[List[str], np.ndarray]], path: str, items: List[Item]
+                 ) -> Iterator[Tuple[List[str], np.ndarray]]:
+    """Agrega cada bloque al ResponseStore en `path` a medida que pasa."""
+    from response_store import ResponseStore
+    store = ResponseStore(path, items)
+    for ids, x in chunks:
+        store.append(x)
+        yield ids, x
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def score_chunks(chunks: Iterable[Tuple[List[str], np.ndarray]], items: List[Item],
+                 blend_ratio: float = 0.90,
+                 blend_abs: int = 2,
+                 validity_threshold: int = 24,
+                 norms: Optional["NormTable"] = None,
+                 lookup: Optional["ClassificationTable"] = None,
+                 db: Optional["ResultStore"] = None) -> Iterator[Tuple[List[str], DiscBatchResult]]:
+    """db: además guarda cada bloque (respuestas y resultados) en ese almacén SQLite."""
+    plan = get_scoring_plan(items)
+    for ids, x in chunks:
+        res = score_disc_batch(items, x, blend_ratio, blend_abs, validity_threshold,
+                               plan=plan, norms=norms, lookup=lookup)
+        if db is not None:
+            db.add_batch(ids, res, x)
+        yield ids, res
+
+def update_norms(scored: Iterable[Tuple[List[str], DiscBatchResult]], table: "NormTable"
+                 ) -> Iterator[Tuple[List[str], DiscBatchResult]]:
+    """Agrega los crudos de cada bloque a `table` a medida que pasa (O(filas nuevas))."""
+    for ids, res in scored:
+        table.update(res.raw)
+        yield ids, res
+
+# -----------------------------
+# Escritura
+# -----------------------------
+CSV_FIELDS = (["id"] + [f"raw_{d}" for d in DIMS] + [f"pct_{d}" for d in DIMS]
+              + [f"z_{d}" for d in DIMS] + ["primary", "blend", "validity_score", "validity_flag"])
+POP_FIELDS = [f"pop_z_{d}" for d in DIMS] + [f"pop_pct_{d}" for d in DIMS]
+
+def write_csv(scored: Iterable[Tuple[List[str], DiscBatchResult]], f: IO[str]) -> Iterator[int]:
+    """Escribe cada bloque al llegar; produce la cantidad de filas escritas por bloque."""
+    w = csv.writer(f, lineterminator="\n")
+    header = False
+    for ids, res in scored:
+        with_pop = res.pop_z is not None
+        if not header:
+            # las columnas poblacionales dependen de si el lote se puntuó con normas
+            w.writerow(CSV_FIELDS + (POP_FIELDS if with_pop else []))
+            header = True
+        raw = res.raw.tolist()
+        pct = np.round(res.pct, 4).tolist()
+        z = np.round(res.z, 4).tolist()
+        primary = [DIMS[p] for p in res.primary.tolist()]
+        blend = res.blend_labels()
+        vs = res.validity_score.tolist()
+        vf = [int(v) for v in res.validity_flag.tolist()]
+        if with_pop:
+            pop = np.round(np.hstack([res.pop_z, res.pop_pct]), 4).tolist()
+            rows = ([ids[i], *raw[i], *pct[i], *z[i], primary[i], blend[i], vs[i], vf[i], *pop[i]]
+                    for i in range(len(ids)))
+        else:
+            rows = ([ids[i], *raw[i], *pct[i], *z[i], primary[i], blend[i], vs[i], vf[i]]
+                    for i in range(len(ids)))
+        w.writerows(rows)
+        yield len(ids)
+    if not header:
+        w.writerow(CSV_FIELDS)
+
+def write_jsonl(scored: Iterable[Tuple[List[str], DiscBatchResult]], f: IO[str]) -> Iterator[int]:
+    for ids, res in scored:
+        raw = res.raw.tolist()
+        pct = np.round(res.pct, 4).tolist()
+        z = np.round(res.z, 4).tolist()
+        blend = res.blend_labels()
+        primary = res.primary.tolist()
+        vs = res.validity_score.tolist()
+        vf = res.validity_flag.tolist()
+        rows = [{
+            "id": ids[i],
+            "raw": dict(zip(DIMS, raw[i])),
+            "pct": dict(zip(DIMS, pct[i])),
+            "z": dict(zip(DIMS, z[i])),
+            "primary": DIMS[primary[i]],
+            "blend": blend[i],
+            "validity_score": vs[i],
+            "validity_flag": vf[i],
+        } for i in range(len(ids))]
+        if res.pop_z is not None:
+            pop_z = np.round(res.pop_z, 4).tolist()
+            pop_pct = np.round(res.pop_pct, 4).tolist()
+            for i, row in enumerate(rows):
+                row["pop_z"] = dict(zip(DIMS, pop_z[i]))
+                row["pop_pct"] = dict(zip(DIMS, pop_pct[i]))
+        f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+        yield len(ids)
+
+def run_batch(in_path: str, out_path: str = "-",
+              in_format: Optional[str] = None,
+              out_format: Optional[str] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              items: Optional[List[Item]] = None,
+              store_path: Optional[str] = None,
+              norms_path: Optional[str] = None,
+              update_norms_path: Optional[str] = None,
+              use_lookup: bool = False,
+              db_path: Optional[str] = None,
+              export_path: Optional[str] = None) -> Tuple[int, float]:
+    """
+    Procesa el archivo completo en streaming. Devuelve (filas, segundos).
+    store_path: además agrega las respuestas leídas a ese ResponseStore (.discr).
+    norms_path: normas (JSON de norms.py) para completar pop_z/pop_pct.
+    update_norms_path: agrega los crudos del lote a esas normas (se crean si no existen)
+                       y las guarda al terminar. Las filas se puntúan con las normas previas.
+    use_lookup: clasificar con la tabla precalculada (lookup.py) en vez de comparar por fila.
+    db_path: guarda respuestas y resultados en ese almacén SQLite (storage.py), un bloque por transacción.
+    export_path: agrega los resultados a ese export columnar (export.py) para análisis.
+    """
+    items = items or get_items()
+    in_format = in_format or guess_format(in_path)
+    out_format = out_format or guess_format(out_path)
+    writer = {"csv": write_csv, "jsonl": write_jsonl}.get(out_format)
+    if writer is None:
+        raise ValueError(f"Formato no soportado: {out_format}")
+
+    norms = pending = None
+    if norms_path or update_norms_path:
+        from norms import NormTable
+        if norms_path:
+            norms = NormTable.load(norms_path)
+        if update_norms_path:
+            pending = NormTable.load_or_new(update_norms_path, items)
+
+    lookup = None
+    if use_lookup:
+        from lookup import get_table
+        lookup = get_table(items)
+
+    db_ctx = nullcontext()
+    if db_path:
+        from storage import ResultStore
+        db_ctx = ResultStore(db_path, items)
+
+    export_ctx = nullcontext()
+    if export_path:
+        from export import ColumnarWriter
+        export_ctx = ColumnarWriter(export_path, items)
+
+    t0 = time.perf_counter()
+    n = 0
+    fin_ctx = nullcontext() if in_format == "store" else open_text(in_path, "r")
+    with db_ctx as db, export_ctx as exporter, fin_ctx as fin, open_text(out_path, "w") as fout:
+        if in_format == "store":
+            chunks = store_chunks(in_path, items, chunk_size)
+        else:
+            chunks = iter_chunks(read_rows(fin, items, in_format), chunk_size)
+        if store_path:
+            chunks = tee_to_store(chunks, store_path, items)
+        scored = score_chunks(chunks, items, norms=norms, lookup=lookup, db=db)
+        if pending is not None:
+            scored = update_norms(scored, pending)
+        if exporter is not None:
+            from export import export_chunks
+            scored = export_chunks(scored, exporter)
+        for written in writer(scored, fout):
+            n += written
+        fout.flush()
+    if pending is not None:
+        pending.save(update_norms_path)
+    return n, time.perf_counter() - t0
@@ -0,0 +1,102 @@
+"""
+Simulación del cuestionario adaptativo: cuántas preguntas se ahorran.
+
+Cada persona sintética (benchmarks.synthetic) responde en modo adaptativo con
+sus respuestas "verdaderas"; se cuenta cuántos ítems se le preguntaron y se
+comprueba que primary, secondary y la alerta de validez coincidan con
+score_disc sobre el cuestionario completo.
+
+    python -m benchmarks.adaptive_sim                  # 2000 personas, perfiles latent y uniform
+    python -m benchmarks.adaptive_sim -n 500 --order shuffled --json sim.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from adaptive import AdaptiveSession, interleaved
+from benchmarks.synthetic import PROFILES, answer_dicts
+from lookup import get_table
+from questionnaire import get_items
+from scoring import score_disc
+
+ORDERS = ("interleaved", "shuffled", "blocks")
+
+def simulate(n: int, seed: int, profile: str, order: str) -> Dict[str, float]:
+    items = get_items()
+    table = get_table(items)
+    rng = random.Random(seed)
+    asked: List[int] = []
+    asked_v: List[int] = []
+    n_v = sum(1 for it in items if it.dim == "V")
+    mismatches = 0
+    t0 = time.perf_counter()
+    for answers in answer_dicts(items, n, seed, profile):
+        if order == "interleaved":
+            seq = interleaved(items)
+        elif order == "shuffled":       # como la app de Streamlit
+            seq = items.copy()
+            rng.shuffle(seq)
+        else:
+            seq = items
+        session = AdaptiveSession(items, seq, table=table)
+        while (it := session.next_item()) is not None:
+            session.answer(it.id, answers[it.id])
+        asked.append(session.asked)
+        asked_v.append(sum(1 for it in items if it.dim == "V" and it.id in session.answers))
+
+        full = score_disc(items, answers)
+        short = score_disc(items, session.completed_answers())
+        if (short.primary, short.secondary, short.validity_flag) != (full.primary, full.secondary, full.validity_flag):
+            mismatches += 1
+    secs = time.perf_counter() - t0
+
+    a = np.array(asked)
+    av = np.array(asked_v)
+    return {
+        "n": n,
+        "items": len(items),
+        "mean_asked": float(a.mean()),
+        "median_asked": float(np.median(a)),
+        "p90_asked": float(np.percentile(a, 90)),
+        "mean_saved": float(len(items) - a.mean()),
+        "mean_saved_disc": float(len(items) - n_v - (a - av).mean()),
+        "mean_saved_validity": float(n_v - av.mean()),
+        "saved_pct": float((1 - a.mean() / len(items)) * 100),
+        "stopped_early_pct": float((a < len(items)).mean() * 100),
+        "mismatches": mismatches,
+        "ms_per_person": secs / n * 1000,
+    }
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Simulación de ítems ahorrados por el modo adaptativo.")
+    p.add_argument("-n", type=int, default=2000, help="Personas sintéticas por combinación.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--profile", choices=PROFILES, action="append",
+                   help="Generador de respuestas (se puede repetir; por defecto todos).")
+    p.add_argument("--order", choices=ORDERS, action="append",
+                   help="Orden de las preguntas (se puede repetir; por defecto todos).")
+    p.add_argument("--json", metavar="ARCHIVO", help="Guarda los resultados en JSON.")
+    args = p.parse_args(argv)
+
+    results = {}
+    print(f"{'perfil':<9}{'orden':<13}{'media':>8}{'mediana':>9}{'p90':>6}{'ahorro':>9}{'DISC':>6}{'V':>5}{'cortan':>8}{'difieren':>10}")
+    for profile in args.profile or PROFILES:
+        for order in args.order or ORDERS:
+            r = simulate(args.n, args.seed, profile, order)
+            results[f"{profile}/{order}"] = r
+            print(f"{profile:<9}{order:<13}{r['mean_asked']:>8.1f}{r['median_asked']:>9.0f}{r['p90_asked']:>6.0f}"
+                  f"{r['saved_pct']:>8.1f}%{r['mean_saved_disc']:>6.1f}{r['mean_saved_validity']:>5.1f}"
+                  f"{r['stopped_early_pct']:>7.0f}%{r['mismatches']:>10}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"n": args.n, "seed": args.seed, "results": results}, f, indent=2)
+        print(f"\nResultados -> {args.json}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
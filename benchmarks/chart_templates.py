@@ -0,0 +1,58 @@
+"""
+Latencia por gráfico: charts.py (figura nueva por llamada) vs chart_templates
+(figura reutilizada). Sin caché en ambos casos.
+
+    python -m benchmarks.chart_templates [-n 50] [--seed 0]
+"""
+import argparse
+import io
+import statistics
+import time
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+
+import charts
+from chart_templates import ChartRenderer
+from questionnaire import get_items
+from scoring import score_disc_batch
+
+def _timeit(fn, inputs):
+    out = []
+    for data in inputs:
+        buf = io.BytesIO()
+        t0 = time.perf_counter()
+        fn(data, buf)
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+def main(argv=None):
+    p = argparse.ArgumentParser()
+    p.add_argument("-n", type=int, default=50, help="Personas sintéticas por gráfico.")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args(argv)
+
+    items = get_items()
+    rng = np.random.default_rng(args.seed)
+    batch = score_disc_batch(items, rng.integers(1, 6, size=(args.n, len(items))))
+    results = [batch.row(i) for i in range(args.n)]
+
+    renderer = ChartRenderer()
+    cases = [
+        ("bar", charts.bar_chart.uncached, renderer.bar_chart, [r.raw for r in results]),
+        ("radar", charts.radar_chart.uncached, renderer.radar_chart, [r.pct for r in results]),
+        ("quadrant", charts.quadrant_chart.uncached, renderer.quadrant_chart, [r.z for r in results]),
+    ]
+    print(f"{'gráfico':<10}{'antes p50':>11}{'antes p95':>11}{'después p50':>13}{'después p95':>13}{'speedup':>9}")
+    for name, before_fn, after_fn, inputs in cases:
+        before = _timeit(before_fn, inputs)
+        after = _timeit(after_fn, inputs)
+        b50, a50 = statistics.median(before), statistics.median(after)
+        b95 = float(np.percentile(before, 95))
+        a95 = float(np.percentile(after, 95))
+        print(f"{name:<10}{b50:>9.1f}ms{b95:>9.1f}ms{a50:>11.1f}ms{a95:>11.1f}ms{b50 / a50:>8.2f}x")
+
+if __name__ == "__main__":
+    main()
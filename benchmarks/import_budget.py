@@ -0,0 +1,67 @@
+"""
+Presupuesto de tiempo de importación hasta la primera pregunta.
+
+Importa cada punto de entrada en un proceso limpio con `python -X importtime`,
+toma el tiempo acumulado del módulo (descontando streamlit) y verifica que no se hayan cargado los módulos
+pesados (matplotlib, reportlab, numpy). app_streamlit se importa en modo
+"bare" de Streamlit, que ejecuta el script hasta mostrar la primera pregunta.
+
+    python -m benchmarks.import_budget [--budget-ms 150]
+
+Sale con código 1 si algún punto de entrada excede el presupuesto o carga
+un módulo pesado.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ("matplotlib", "reportlab", "numpy")
+
+ENTRY_POINTS = ["app_cli", "app_streamlit"]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+def measure(module: str):
+    """Devuelve (ms totales, ms de streamlit, módulos pesados cargados)."""
+    code = (
+        "import logging, sys; logging.disable(logging.CRITICAL); "
+        f"import {module}; "
+        f"print(','.join(m for m in {HEAVY!r} if m in sys.modules), file=sys.stdout)"
+    )
+    p = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                       cwd=ROOT, capture_output=True, text=True)
+    if p.returncode != 0:
+        raise RuntimeError(f"import {module} falló:\n{p.stderr[-2000:]}")
+    total_us = 0
+    streamlit_us = 0
+    for m in _LINE.finditer(p.stderr):
+        cumulative, name = int(m.group(2)), m.group(4)
+        if name == module:
+            total_us = cumulative
+        elif name == "streamlit":
+            streamlit_us = cumulative
+    heavy = [h for h in p.stdout.strip().split(",") if h]
+    return total_us / 1000, streamlit_us / 1000, heavy
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=150.0,
+                    help="Tiempo máximo de importación por punto de entrada (sin contar streamlit).")
+    args = ap.parse_args(argv)
+
+    failed = False
+    for module in ENTRY_POINTS:
+        total, st_ms, heavy = measure(module)
+        own = total - st_ms
+        ok = own <= args.budget_ms and not heavy
+        failed |= not ok
+        extra = f" (+{st_ms:.0f} ms streamlit)" if st_ms else ""
+        print(f"{'OK ' if ok else 'ERR'} {module:<14} {own:7.1f} ms{extra}"
+              + (f"  pesados: {', '.join(heavy)}" if heavy else ""))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+"""
+Suite de benchmarks de punta a punta: scoring, gráficos y PDF.
+
+Cada caso se mide sobre personas sintéticas (benchmarks.synthetic, con semilla)
+y reporta latencia p50/p90/p99, throughput y pico de memoria (tracemalloc, en
+una pasada aparte para no inflar las latencias). Todo sin caché (se llama a
+.uncached de las funciones memoizadas) para medir el trabajo real.
+
+    python -m benchmarks.suite                       # tabla
+    python -m benchmarks.suite --json out.json       # + resultados para comparar
+    python -m benchmarks.suite --compare base.json   # diferencias contra otra corrida
+    python -m benchmarks.suite --only pdf -n 20
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+
+from benchmarks.synthetic import answer_dicts, answer_matrix
+from questionnaire import get_items
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEMORY_RUNS = 3
+
+class Case:
+    """fn(i) ejecuta la operación sobre la entrada i; ops = unidades procesadas por llamada."""
+    def __init__(self, name: str, fn: Callable[[int], object], ops: int = 1):
+        self.name = name
+        self.fn = fn
+        self.ops = ops
+
+def run_case(case: Case, n: int, warmup: int = 2) -> Dict[str, float]:
+    for i in range(min(warmup, n)):
+        case.fn(i)
+    lat = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        case.fn(i)
+        lat.append(time.perf_counter() - t0)
+    lat_ms = np.array(lat) * 1000
+
+    tracemalloc.start()
+    peak = 0
+    for i in range(min(MEMORY_RUNS, n)):
+        tracemalloc.reset_peak()
+        case.fn(i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    total = float(np.sum(lat))
+    return {
+        "n": n,
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p90_ms": float(np.percentile(lat_ms, 90)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "mean_ms": float(lat_ms.mean()),
+        "throughput_per_s": n * case.ops / total if total > 0 else float("inf"),
+        "peak_kib": peak / 1024,
+    }
+
+# -----------------------------
+# Casos
+# -----------------------------
+def build_cases(n: int, seed: int, profile: str, batch_rows: int) -> List[Case]:
+    import charts
+    import report_pdf
+    from scoring import score_disc, score_disc_batch
+
+    items = get_items()
+    answers = answer_dicts(items, n, seed, profile)
+    results = [score_disc(items, a) for a in answers]
+    matrix = answer_matrix(items, batch_rows, seed, profile)
+    tmp = tempfile.mkdtemp(prefix="disc_bench_")
+    png = os.path.join(tmp, "c.png")
+    pdf = os.path.join(tmp, "r.pdf")
+
+    def pipeline_png(i: int) -> None:
+        r = score_disc(items, answers[i])
+        paths = [os.path.join(tmp, f"{k}.png") for k in ("bar", "radar", "quad")]
+        charts.bar_chart.uncached(r.raw, paths[0])
+        charts.radar_chart.uncached(r.pct, paths[1])
+        charts.quadrant_chart.uncached(r.z, paths[2])
+        _build_pdf(report_pdf, r, pdf, paths)
+
+    cases = [
+        Case("scoring.score_disc", lambda i: score_disc(items, answers[i])),
+        Case(f"scoring.score_disc_batch[{batch_rows}]",
+             lambda i: score_disc_batch(items, matrix), ops=batch_rows),
+        Case("charts.bar_chart", lambda i: charts.bar_chart.uncached(results[i].raw, png)),
+        Case("charts.radar_chart", lambda i: charts.radar_chart.uncached(results[i].pct, png)),
+        Case("charts.quadrant_chart", lambda i: charts.quadrant_chart.uncached(results[i].z, png)),
+        Case("report_pdf.build_pdf[vector]", lambda i: _build_pdf(report_pdf, results[i], pdf)),
+        Case("pipeline.answers_to_pdf[png]", pipeline_png),
+        Case("pipeline.answers_to_pdf[vector]",
+             lambda i: _build_pdf(report_pdf, score_disc(items, answers[i]), pdf)),
+    ]
+    return cases + _streamlit_cases(answers)
+
+def _build_pdf(report_pdf, r, out_pdf: str, images: Optional[Sequence[str]] = None) -> None:
+    kw = dict(img_bar=images[0], img_radar=images[1], img_quad=images[2]) if images else dict(vector=True)
+    report_pdf.build_pdf(out_pdf=out_pdf, person_name="Bench", role="Bench",
+                         raw=r.raw, pct=r.pct, z=r.z, primary=r.primary, secondary=r.secondary,
+                         validity_score=r.validity_score, notes=r.notes, **kw)
+
+def _streamlit_cases(answers: List[Dict[str, int]]) -> List[Case]:
+    """Funciones de app_streamlit; importar el módulo ejecuta el script en modo bare de Streamlit."""
+    logging.disable(logging.CRITICAL)
+    try:
+        import app_streamlit as app
+    except Exception as e:   # sin streamlit instalado, el resto de la suite sigue sirviendo
+        print(f"(se omiten los casos de app_streamlit: {e})", file=sys.stderr)
+        return []
+    finally:
+        logging.disable(logging.NOTSET)
+
+    items = app.get_items()
+    results = [app.score_disc(items, a) for a in answers]
+
+    def charts_of(r):
+        return (app.bar_chart_bytes.uncached(r["raw"]), app.radar_chart_bytes.uncached(r["pct"]),
+                app.quadrant_chart_bytes.uncached(r["z"], primary=r["primary"]),
+                app.donut_chart_bytes.uncached(r["pct"]))
+
+    imgs = [None] * len(results)
+
+    def pdf_png(i: int) -> bytes:
+        if imgs[i] is None:
+            imgs[i] = charts_of(results[i])
+        return app.build_pdf_bytes("Bench", "Bench", results[i], *imgs[i])
+
+    def pipeline(i: int) -> bytes:
+        r = app.score_disc(items, answers[i])
+        return app.build_pdf_bytes("Bench", "Bench", r, *charts_of(r))
+
+    return [
+        Case("app_streamlit.bar_chart_bytes", lambda i: app.bar_chart_bytes.uncached(results[i]["raw"])),
+        Case("app_streamlit.radar_chart_bytes", lambda i: app.radar_chart_bytes.uncached(results[i]["pct"])),
+        Case("app_streamlit.quadrant_chart_bytes",
+             lambda i: app.quadrant_chart_bytes.uncached(results[i]["z"], primary=results[i]["primary"])),
+        Case("app_streamlit.donut_chart_bytes", lambda i: app.donut_chart_bytes.uncached(results[i]["pct"])),
+        Case("app_streamlit.build_pdf_bytes[png]", pdf_png),
+        Case("app_streamlit.build_pdf_bytes[vector]",
+             lambda i: app.build_pdf_bytes("Bench", "Bench", results[i], vector=True)),
+        Case("pipeline.streamlit_answers_to_pdf[png]", pipeline),
+    ]
+
+# -----------------------------
+# Salida
+# -----------------------------
+def _git_commit() -> Optional[str]:
+    try:
+        p = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                           capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return p.stdout.strip() or None
+
+def print_table(results: Dict[str, Dict[str, float]], base: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+    head = f"{'caso':<42}{'p50':>10}{'p90':>10}{'p99':>10}{'ops/s':>12}{'pico KiB':>10}"
+    if base:
+        head += f"{'Δp50':>9}"
+    print(head)
+    for name, r in results.items():
+        line = (f"{name:<42}{r['p50_ms']:>8.2f}ms{r['p90_ms']:>8.2f}ms{r['p99_ms']:>8.2f}ms"
+                f"{r['throughput_per_s']:>12,.0f}{r['peak_kib']:>10,.0f}")
+        if base and name in base:
+            line += f"{(r['p50_ms'] / base[name]['p50_ms'] - 1) * 100:>+8.0f}%"
+        print(line)
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Benchmarks de scoring, gráficos y PDF.")
+    p.add_argument("-n", type=int, default=20, help="Iteraciones medidas por caso.")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--profile", choices=["uniform", "latent"], default="latent",
+                   help="Generador de respuestas sintéticas.")
+    p.add_argument("--batch-rows", type=int, default=10_000, help="Filas del caso score_disc_batch.")
+    p.add_argument("--only", default=None, help="Solo los casos cuyo nombre contenga este texto.")
+    p.add_argument("--json", metavar="ARCHIVO", help="Guarda los resultados en JSON.")
+    p.add_argument("--compare", metavar="ARCHIVO", help="JSON de otra corrida para comparar p50.")
+    args = p.parse_args(argv)
+
+    cases = build_cases(args.n, args.seed, args.profile, args.batch_rows)
+    if args.only:
+        cases = [c for c in cases if args.only in c.name]
+
+    results = {}
+    for case in cases:
+        results[case.name] = run_case(case, args.n)
+
+    base = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)["results"]
+    print_table(results, base)
+
+    if args.json:
+        out = {
+            "meta": {
+                "commit": _git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "n": args.n, "seed": args.seed, "profile": args.profile,
+                "batch_rows": args.batch_rows,
+            },
+            "results": results,
+        }
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(out, f, indent=2)
+        print(f"\nResultados -> {args.json}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
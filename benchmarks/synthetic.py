@@ -0,0 +1,42 @@
+"""
+Generadores sintéticos de respuestas, reproducibles por semilla.
+
+  - "uniform": cada respuesta 1..5 al azar (peor caso para el blend).
+  - "latent": un rasgo latente normal por dimensión + ruido por ítem, con los
+    ítems inversos invertidos; da escalas con consistencia interna realista.
+"""
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from questionnaire import Item
+from scoring import LIKERT_MAX, LIKERT_MIN
+
+PROFILES = ("uniform", "latent")
+_LATENT_SLOTS = {"D": 0, "I": 1, "S": 2, "C": 3, "V": 4}
+
+def answer_matrix(items: Sequence[Item], n: int, seed: int = 0, profile: str = "latent",
+                  noise: float = 1.0) -> np.ndarray:
+    """(n, len(items)) int8 con respuestas 1..5."""
+    rng = np.random.default_rng(seed)
+    if profile == "uniform":
+        return rng.integers(LIKERT_MIN, LIKERT_MAX + 1, size=(n, len(items)), dtype=np.int8)
+    if profile != "latent":
+        raise ValueError(f"Perfil sintético desconocido: {profile} (usar {', '.join(PROFILES)})")
+    latent = rng.normal(size=(n, len(_LATENT_SLOTS)))
+    slots = np.array([_LATENT_SLOTS[it.dim] for it in items])
+    sign = np.array([-1.0 if it.reverse else 1.0 for it in items])
+    mid = (LIKERT_MIN + LIKERT_MAX) / 2
+    x = mid + latent[:, slots] * sign + rng.normal(scale=noise, size=(n, len(items)))
+    return np.clip(np.rint(x), LIKERT_MIN, LIKERT_MAX).astype(np.int8)
+
+def answer_dicts(items: Sequence[Item], n: int, seed: int = 0, profile: str = "latent") -> List[Dict[str, int]]:
+    """Mismas respuestas que answer_matrix, como dicts {item_id: 1..5} para score_disc."""
+    ids = [it.id for it in items]
+    return [dict(zip(ids, row)) for row in answer_matrix(items, n, seed, profile).tolist()]
+
+def answer_chunks(items: Sequence[Item], n: int, chunk_size: int = 100_000, seed: int = 0,
+                  profile: str = "latent") -> Iterator[np.ndarray]:
+    """n filas en bloques, cada uno con su propia semilla derivada (reproducible por bloque)."""
+    for k, start in enumerate(range(0, n, chunk_size)):
+        yield answer_matrix(items, min(chunk_size, n - start), seed=seed * 1_000_003 + k, profile=profile)
@@ -0,0 +1,206 @@
+"""
+Carpeta única (binder) con el informe de toda una cohorte en un solo PDF.
+
+Cada persona ocupa una página dibujada con report_pdf.draw_report. Los
+gráficos vectoriales se definen como Form XObject por perfil crudo (D, I, S, C)
+y cada página que lo repite solo lo referencia; con gráficos PNG se genera un
+archivo por perfil y reportlab inserta cada imagen una vez.
+
+reportlab arma cada documento en memoria hasta save(), así que la cohorte se
+dibuja por partes de part_size personas (un PDF temporal cada una) y PyMuPDF
+agrega cada parte al archivo final con un guardado incremental apenas se
+cierra. Los gráficos de un perfil que ya se escribió en una parte anterior no
+se vuelven a dibujar: la parte lleva un marcador con el mismo nombre (un Form
+vacío, o un PNG en blanco del mismo tamaño en píxeles) y al agregarla la página
+pasa a apuntar al XObject ya escrito. La memoria queda acotada por una parte
+más lo que crece con el contenido distinto (y, por persona, su marcador y la
+entrada del árbol de páginas que PyMuPDF recorre al agregar), y el tamaño del
+PDF crece con los perfiles distintos, no con la cantidad de personas. Los PNG temporales de cada
+parte se borran al cerrarla. Al final se escriben los marcadores (uno por
+persona) en otro guardado incremental.
+"""
+import os
+import shutil
+import struct
+import tempfile
+import time
+import zlib
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterable, List, Set, Tuple
+
+from cache import cached_score_disc
+from cohort_reports import ReportJob
+from questionnaire import get_items
+
+DEFAULT_PART_SIZE = 200
+
+@dataclass
+class BinderStats:
+    pages: int
+    unique_profiles: int
+    seconds: float
+    bytes: int
+
+def build_binder(out_pdf: str, jobs: Iterable[ReportJob], vector: bool = True,
+                 title: str = "Informes DISC de la cohorte",
+                 part_size: int = DEFAULT_PART_SIZE) -> BinderStats:
+    import pymupdf
+
+    t0 = time.perf_counter()
+    items = get_items()
+    jobs = iter(jobs)
+    profiles: Set[tuple] = set()
+    png_sizes: Dict[tuple, Tuple[Tuple[int, int], ...]] = {}   # crudos -> tamaño de cada PNG
+    xobjects: Dict[str, int] = {}       # nombre de XObject -> xref ya escrito en la salida
+    toc: List[list] = []
+    pages = 0
+
+    with tempfile.TemporaryDirectory(prefix="disc_binder_") as tmp:
+        part_pdf = os.path.join(tmp, "parte.pdf")
+        while True:
+            chunk = list(islice(jobs, part_size))
+            if not chunk and pages:
+                break
+            titles = _render_part(part_pdf, chunk, items, vector, tmp, profiles, png_sizes)
+            _append_part(out_pdf, part_pdf, xobjects, first=not pages)
+            toc.extend([1, label, pages + j + 1] for j, label in enumerate(titles))
+            pages += len(chunk)
+            if not chunk:      # cohorte vacía: una página "Sin respuestas."
+                break
+
+    with pymupdf.open(out_pdf) as doc:
+        doc.set_toc(toc)
+        doc.set_metadata({"title": title, "producer": "disc binder"})
+        doc.set_pagemode("UseOutlines")
+        doc.saveIncr()
+
+    return BinderStats(pages, len(profiles), time.perf_counter() - t0, os.path.getsize(out_pdf))
+
+def _render_pngs(tmp: str, key: tuple, res, size=None) -> tuple:
+    """
+    PNG de barras, radar y cuadrante del perfil. Con `size` (ya se escribieron en
+    una parte anterior) basta un PNG en blanco de ese tamaño en píxeles en la misma
+    ruta: se dibuja con la misma proporción y al copiarlo se usa la imagen escrita.
+    """
+    stem = os.path.join(tmp, "_".join(map(str, key)))
+    paths = (f"{stem}_bar.png", f"{stem}_radar.png", f"{stem}_quad.png")
+    if size is not None:
+        for path, (w, h) in zip(paths, size):
+            with open(path, "wb") as f:
+                f.write(_blank_png(w, h))
+        return paths
+    from chart_templates import bar_chart, radar_chart, quadrant_chart
+    bar_chart(res.raw, paths[0])
+    radar_chart(res.pct, paths[1])
+    quadrant_chart(res.z, paths[2])
+    return paths
+
+def _png_size(path: str) -> Tuple[int, int]:
+    with open(path, "rb") as f:
+        return struct.unpack(">II", f.read(24)[16:24])    # ancho y alto del IHDR
+
+@lru_cache(maxsize=None)
+def _blank_png(w: int, h: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, 0, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(bytes(h * (w + 1)), 9)) + chunk(b"IEND", b""))
+
+def _render_part(out_pdf: str, jobs: List[ReportJob], items, vector: bool, tmp: str,
+                 profiles: Set[tuple], png_sizes: Dict[tuple, tuple]) -> List[str]:
+    """Una parte con una página por persona; devuelve el título del marcador de cada página."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    from report_pdf import chart_form_names, draw_report
+
+    c = canvas.Canvas(out_pdf, pagesize=A4)
+    forms: Set[str] = set()
+    pngs = {}        # crudos -> (bar, radar, quadrant) para el modo PNG, solo de esta parte
+    # misma carpeta en todas las partes: reportlab nombra cada imagen por su ruta, y así
+    # un perfil repetido en otra parte se reconoce al copiarla (la imagen ya escrita)
+    png_dir = None
+    if not vector:
+        png_dir = os.path.join(tmp, "png")
+        os.makedirs(png_dir, exist_ok=True)
+    part_keys: Set[tuple] = set()
+    titles = []
+    try:
+        for job in jobs:
+            res = cached_score_disc(items, job.answers)
+            key = tuple(res.raw[d] for d in ("D", "I", "S", "C"))
+            # perfil ya copiado en una parte anterior: no se vuelve a dibujar su gráfico,
+            # solo se deja un marcador con el mismo nombre que _append_part resuelve
+            written = key in profiles and key not in part_keys
+            profiles.add(key)
+            part_keys.add(key)
+            imgs = (None, None, None)
+            if not vector:
+                imgs = pngs.get(key)
+                if imgs is None:
+                    imgs = pngs[key] = _render_pngs(png_dir, key, res, png_sizes.get(key) if written else None)
+                    png_sizes.setdefault(key, tuple(_png_size(path) for path in imgs))
+            elif written:
+                for name in chart_form_names(res.raw):
+                    if name not in forms:
+                        c.beginForm(name)
+                        c.endForm()
+                        forms.add(name)
+            draw_report(
+                c,
+                person_name=job.person_name,
+                role=job.role,
+                raw=res.raw, pct=res.pct, z=res.z,
+                primary=res.primary, secondary=res.secondary,
+                validity_score=res.validity_score,
+                notes=res.notes,
+                img_bar=imgs[0], img_radar=imgs[1], img_quad=imgs[2],
+                vector=vector, forms=forms,
+            )
+            c.showPage()
+            titles.append(f"{job.person_name} ({job.respondent_id})")
+        if not jobs:
+            c.drawString(72, 770, "Sin respuestas.")
+            c.showPage()
+        c.save()   # los PNG temporales se leen recién acá
+    finally:
+        if png_dir is not None:
+            shutil.rmtree(png_dir, ignore_errors=True)
+    return titles
+
+# -----------------------------
+# Escritura del PDF final
+# -----------------------------
+def _append_part(out_pdf: str, part_pdf: str, xobjects: Dict[str, int], first: bool) -> None:
+    """
+    Agrega las páginas de una parte al final de out_pdf (la primera parte pasa a
+    ser el archivo). Los XObject cuyo nombre ya se escribió se reemplazan, en los
+    recursos de cada página nueva, por el objeto existente.
+    """
+    import pymupdf
+
+    if first:
+        shutil.move(part_pdf, out_pdf)
+    with pymupdf.open(out_pdf) as doc:
+        start = 0 if first else doc.page_count
+        if not first:
+            with pymupdf.open(part_pdf) as src:
+                doc.insert_pdf(src)
+            os.remove(part_pdf)
+        repeated: Set[int] = set()
+        for pno in range(start, doc.page_count):
+            page = doc[pno]
+            page_xref = page.xref      # cada consulta recorre el árbol de páginas
+            named = [(xref, name) for xref, name, invoker, _ in page.get_xobjects() if invoker == 0]
+            named += [(img[0], img[7]) for img in page.get_images(full=True) if img[9] == 0]
+            for xref, name in named:
+                known = xobjects.setdefault(name, xref)
+                if known != xref:          # mismo gráfico en una parte anterior
+                    doc.xref_set_key(page_xref, f"Resources/XObject/{name}", f"{known} 0 R")
+                    repeated.add(xref)
+        for xref in repeated:
+            doc.update_object(xref, "null")    # el marcador ya no se usa
+        if not first:
+            doc.saveIncr()
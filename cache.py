@@ -0,0 +1,262 @@
+"""
+Caché por contenido para scoring y gráficos.
+
+Las claves son hashes del contenido de entrada (vector de respuestas empaquetado
+o valores que recibe el gráfico, que dependen solo de los 4 puntajes crudos),
+así que personas con el mismo perfil comparten resultado y PNG.
+
+Dos niveles:
+  - memoria: LRU acotado por bytes (thread-safe, sirve a Streamlit).
+  - disco (opcional): un archivo por clave, con expulsión por tamaño total
+    según antigüedad de uso; lo pueden compartir varios procesos.
+"""
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from questionnaire import Item
+from scoring import DiscResult, score_disc
+
+class ContentCache:
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024,
+                 disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._mem: "OrderedDict[str, Tuple[Any, int]]" = OrderedDict()
+        self._mem_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"mem_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_evictions": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    # -- memoria --
+    def _mem_get(self, key: str) -> Any:
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit is None:
+                return None
+            self._mem.move_to_end(key)
+            self.counters["mem_hits"] += 1
+            return hit[0]
+
+    def _mem_put(self, key: str, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= old[1]
+            self._mem[key] = (value, size)
+            self._mem_bytes += size
+            while self._mem_bytes > self.max_bytes:
+                _, (_, s) = self._mem.popitem(last=False)
+                self._mem_bytes -= s
+                self.counters["evictions"] += 1
+
+    # -- disco --
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], key)
+
+    def _scan_disk(self) -> List[Tuple[str, int, float]]:
+        out = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                p = os.path.join(root, name)
+                try:
+                    st = os.stat(p)
+                except FileNotFoundError:
+                    continue
+                out.append((p, st.st_size, st.st_mtime))
+        return out
+
+    def _disk_get(self, key: str) -> Optional[bytes]:
+        p = self._path(key)
+        try:
+            with open(p, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(p)  # marca de uso para la expulsión
+        except FileNotFoundError:
+            pass
+        return data
+
+    def _disk_put(self, key: str, data: bytes) -> None:
+        p = self._path(key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(p), prefix=".tmp_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, p)  # atómico: otros procesos nunca ven archivos a medias
+        with self._lock:
+            self._disk_bytes += len(data)
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        # Recalcula con el disco real (otros procesos también escriben)
+        entries = sorted(self._scan_disk(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.disk_max_bytes * 0.9)
+        for p, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(p)
+                with self._lock:
+                    self.counters["disk_evictions"] += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    # -- API --
+    def get(self, key: str) -> Any:
+        # los contadores se actualizan bajo el lock: los usan varios hilos a la vez
+        value = self._mem_get(key)
+        if value is not None:
+            return value
+        if self.disk_dir:
+            data = self._disk_get(key)
+            if data is not None:
+                with self._lock:
+                    self.counters["disk_hits"] += 1
+                value = _decode(data)
+                self._mem_put(key, value, len(data))
+                return value
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        data = _encode(value)
+        self._mem_put(key, value, len(data))
+        if self.disk_dir:
+            self._disk_put(key, data)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            out = dict(self.counters)
+            out["mem_entries"] = len(self._mem)
+            out["mem_bytes"] = self._mem_bytes
+        out["disk_bytes"] = self._disk_bytes
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+            self._mem_bytes = 0
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return b"B" + value
+    return b"P" + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _decode(data: bytes) -> Any:
+    if data[:1] == b"B":
+        return data[1:]
+    return pickle.loads(data[1:])
+
+def make_key(*parts: Any) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for p in parts:
+        h.update(p if isinstance(p, bytes) else repr(p).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+# -----------------------------
+# Caché por defecto del proceso
+# -----------------------------
+_default = ContentCache()
+
+def get_cache() -> ContentCache:
+    return _default
+
+def configure(max_bytes: int = 64 * 1024 * 1024,
+              disk_dir: Optional[str] = None,
+              disk_max_bytes: int = 512 * 1024 * 1024) -> ContentCache:
+    """Reemplaza la caché por defecto (p. ej. para activar el nivel en disco)."""
+    global _default
+    _default = ContentCache(max_bytes, disk_dir, disk_max_bytes)
+    return _default
+
+# -----------------------------
+# Scoring
+# -----------------------------
+def answers_key(items: List[Item], answers: Dict[str, int], *params: Any) -> str:
+    """Hash del vector de respuestas en el orden del cuestionario (+ parámetros de scoring)."""
+    from response_store import items_hash, pack_one
+    try:
+        packed = pack_one(items, answers)
+    except (KeyError, ValueError, TypeError):
+        # respuestas incompletas o inválidas: score_disc dará el error al calcular
+        packed = repr(sorted(answers.items())).encode("utf-8")
+    return make_key("score", items_hash(items), packed, *params)
+
+def cached_score_disc(items: List[Item], answers: Dict[str, int],
+                      blend_ratio: float = 0.90,
+                      blend_abs: int = 2,
+                      validity_threshold: int = 24,
+                      cache: Optional[ContentCache] = None) -> DiscResult:
+    """score_disc memoizado. Devuelve una copia: modificarla no cambia lo que reciben otros llamadores."""
+    cache = cache or _default
+    key = answers_key(items, answers, blend_ratio, blend_abs, validity_threshold)
+    res = cache.get_or_compute(
+        key, lambda: score_disc(items, answers, blend_ratio, blend_abs, validity_threshold))
+    return copy.deepcopy(res)
+
+# -----------------------------
+# Gráficos
+# -----------------------------
+def _chart_key(kind: str, args: tuple, kwargs: dict) -> str:
+    norm = [sorted(a.items()) if isinstance(a, dict) else a for a in args]
+    return make_key("chart", kind, norm, sorted(kwargs.items()))
+
+def memoize_png(kind: str) -> Callable:
+    """Decorador para funciones f(datos, ...) -> bytes PNG (p. ej. los *_chart_bytes)."""
+    def deco(fn: Callable[..., bytes]) -> Callable[..., bytes]:
+        @wraps(fn)
+        def wrapper(*args, **kwargs) -> bytes:
+            key = _chart_key(kind, args, kwargs)
+            return _default.get_or_compute(key, lambda: fn(*args, **kwargs))
+        wrapper.uncached = fn
+        return wrapper
+    return deco
+
+def memoize_png_file(kind: str) -> Callable:
+    """Decorador para funciones f(datos, out_png) que escriben el PNG en disco (charts.py)."""
+    def deco(fn: Callable[..., None]) -> Callable[..., None]:
+        @wraps(fn)
+        def wrapper(data, out_png: str, *args, **kwargs) -> None:
+            key = _chart_key(kind, (data,) + args, kwargs)
+            png = _default.get(key)
+            if png is None:
+                fn(data, out_png, *args, **kwargs)
+                with open(out_png, "rb") as f:
+                    _default.put(key, f.read())
+                return
+            with open(out_png, "wb") as f:
+                f.write(png)
+        wrapper.uncached = fn
+        return wrapper
+    return deco
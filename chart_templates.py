@@ -0,0 +1,133 @@
+"""
+Gráficos de charts.py con figuras reutilizables.
+
+Cada figura (barras, araña, cuadrante) se arma una sola vez por hilo/proceso
+sobre un canvas Agg fijo, sin pyplot: títulos, ejes, etiquetas y tight_layout
+se calculan al crearla. Por persona solo se actualizan los datos de los artistas
+(altura de barras, vértices del polígono, posición del punto) y se guarda.
+"""
+import io
+import math
+import threading
+from typing import Dict
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from cache import memoize_png_file
+from instrumentation import instrumented
+
+DIMS = ["D", "I", "S", "C"]
+DPI = 200
+
+class ChartRenderer:
+    """Tres figuras precompuestas; no es thread-safe (usar get_renderer())."""
+
+    def __init__(self):
+        self._build_bar()
+        self._build_radar()
+        self._build_quadrant()
+
+    # -- construcción (una vez) --
+    def _build_bar(self) -> None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.set_title("DISC - Puntajes crudos")
+        self._bars = ax.bar(DIMS, [30, 30, 30, 30])
+        ax.set_xlabel("Dimensión")
+        ax.set_ylabel("Puntaje")
+        fig.tight_layout()
+        self._bar_fig, self._bar_ax = fig, ax
+
+    def _build_radar(self) -> None:
+        angles = [i * 2 * math.pi / 4 for i in range(4)]
+        self._angles = angles + angles[:1]
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111, polar=True)
+        ax.set_title("DISC - Diagrama de araña (0–100%)")
+        vals = [25.0] * 5
+        (self._radar_line,) = ax.plot(self._angles, vals)
+        (self._radar_fill,) = ax.fill(self._angles, vals, alpha=0.15)
+        ax.set_thetagrids([a * 180 / math.pi for a in angles], DIMS)
+        ax.set_ylim(0, 100)
+        fig.tight_layout()
+        self._radar_fig = fig
+
+    def _build_quadrant(self) -> None:
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot(111)
+        ax.set_title("Mapa conductual (esquema)")
+        ax.axhline(0)
+        ax.axvline(0)
+        self._quad_point = ax.scatter([0.0], [0.0])
+        ax.set_xlim(-4, 4)
+        ax.set_ylim(-4, 4)
+        ax.set_xlabel("Activo/Rápido  ←→  Estable/Metódico")
+        ax.set_ylabel("Orientado a tarea  ←→  Orientado a personas")
+        fig.tight_layout()
+        self._quad_fig = fig
+
+    # -- actualización (por persona) --
+    def _update_bar(self, raw: Dict[str, int]) -> Figure:
+        for rect, d in zip(self._bars, DIMS):
+            rect.set_height(raw[d])
+        ax = self._bar_ax
+        ax.relim()
+        ax.autoscale_view()
+        return self._bar_fig
+
+    def _update_radar(self, pct: Dict[str, float]) -> Figure:
+        vals = [pct[d] for d in DIMS]
+        vals += vals[:1]
+        self._radar_line.set_data(self._angles, vals)
+        self._radar_fill.set_xy(list(zip(self._angles, vals)))
+        return self._radar_fig
+
+    def _update_quadrant(self, z: Dict[str, float]) -> Figure:
+        x = (z["D"] + z["I"]) - (z["S"] + z["C"])
+        y = (z["D"] + z["C"]) - (z["I"] + z["S"])
+        self._quad_point.set_offsets([[x, y]])
+        return self._quad_fig
+
+    # -- salida --
+    def bar_chart(self, raw: Dict[str, int], out_png) -> None:
+        self._update_bar(raw).savefig(out_png, dpi=DPI)
+
+    def radar_chart(self, pct: Dict[str, float], out_png) -> None:
+        self._update_radar(pct).savefig(out_png, dpi=DPI)
+
+    def quadrant_chart(self, z: Dict[str, float], out_png) -> None:
+        self._update_quadrant(z).savefig(out_png, dpi=DPI)
+
+    def png_bytes(self, kind: str, data: Dict[str, float]) -> bytes:
+        buf = io.BytesIO()
+        getattr(self, f"{kind}_chart")(data, buf)
+        return buf.getvalue()
+
+_local = threading.local()
+
+def get_renderer() -> ChartRenderer:
+    """Un ChartRenderer por hilo (y por lo tanto por proceso worker)."""
+    r = getattr(_local, "renderer", None)
+    if r is None:
+        r = _local.renderer = ChartRenderer()
+    return r
+
+# Misma firma que charts.py, para usar como reemplazo directo
+@instrumented("chart_templates.bar_chart")
+@memoize_png_file("tpl_bar")
+def bar_chart(raw: Dict[str, int], out_png: str) -> None:
+    get_renderer().bar_chart(raw, out_png)
+
+@instrumented("chart_templates.radar_chart")
+@memoize_png_file("tpl_radar")
+def radar_chart(pct: Dict[str, float], out_png: str) -> None:
+    get_renderer().radar_chart(pct, out_png)
+
+@instrumented("chart_templates.quadrant_chart")
+@memoize_png_file("tpl_quadrant")
+def quadrant_chart(z: Dict[str, float], out_png: str) -> None:
+    get_renderer().quadrant_chart(z, out_png)
@@ -2,6 +2,11 @@ import math
 from typing import Dict, Tuple
 import matplotlib.pyplot as plt
 
+from cache import memoize_png_file
+from instrumentation import instrumented, span
+
+@instrumented("charts.bar_chart")
+@memoize_png_file("bar")
 def bar_chart(raw: Dict[str, int], out_png: str) -> None:
     dims = ["D", "I", "S", "C"]
     vals = [raw[d] for d in dims]
@@ -11,9 +16,12 @@ def bar_chart(raw: Dict[str, int], out_png: str) -> None:
     plt.xlabel("Dimensión")
     plt.ylabel("Puntaje")
     plt.tight_layout()
-    plt.savefig(out_png, dpi=200)
+    with span("charts.savefig"):
+        plt.savefig(out_png, dpi=200)
     plt.close()
 
+@instrumented("charts.radar_chart")
+@memoize_png_file("radar")
 def radar_chart(pct: Dict[str, float], out_png: str) -> None:
     dims = ["D", "I", "S", "C"]
     vals = [pct[d] for d in dims]
@@ -30,9 +38,12 @@ def radar_chart(pct: Dict[str, float], out_png: str) -> None:
     ax.set_thetagrids([a * 180 / math.pi for a in angles[:-1]], dims)
     ax.set_ylim(0, 100)
     plt.tight_layout()
-    plt.savefig(out_png, dpi=200)
+    with span("charts.savefig"):
+        plt.savefig(out_png, dpi=200)
     plt.close()
 
+@instrumented("charts.quadrant_chart")
+@memoize_png_file("quadrant")
 def quadrant_chart(z: Dict[str, float], out_png: str) -> None:
     """
     Cuadrante típico: eje X = (D + I) - (S + C)   (rápido/activo vs estable/analítico)
@@ -52,5 +63,6 @@ def quadrant_chart(z: Dict[str, float], out_png: str) -> None:
     plt.xlabel("Activo/Rápido  ←→  Estable/Metódico")
     plt.ylabel("Orientado a tarea  ←→  Orientado a personas")
     plt.tight_layout()
-    plt.savefig(out_png, dpi=200)
+    with span("charts.savefig"):
+        plt.savefig(out_png, dpi=200)
     plt.close()
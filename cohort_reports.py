@@ -0,0 +1,177 @@
+"""
+Generación de informes PDF para una cohorte completa en un pool de procesos.
+
+Cada trabajo (una persona) hace scoring, los tres gráficos (vectoriales, o PNG
+de chart_templates) y report_pdf.build_pdf en un proceso del pool; matplotlib
+y reportlab son CPU y no liberan el GIL, así que los procesos escalan con los núcleos.
+Los resultados se devuelven en el mismo orden de entrada y los errores de un
+trabajo quedan capturados en su ReportOutcome sin detener al resto.
+"""
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, Iterator, Optional
+
+from cache import cached_score_disc, configure as configure_cache
+from questionnaire import get_items
+
+@dataclass
+class ReportJob:
+    respondent_id: str
+    person_name: str
+    role: str
+    answers: Dict[str, int]
+
+@dataclass
+class ReportOutcome:
+    index: int
+    respondent_id: str
+    pdf_path: Optional[str]
+    error: Optional[str]     # traceback si el trabajo falló
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+# -----------------------------
+# Entrada
+# -----------------------------
+def read_jobs(path: str, fmt: Optional[str] = None) -> Iterator[ReportJob]:
+    """
+    CSV con columnas id, name, role y los ids de ítem; o JSONL con
+    {"id", "name", "role", "answers": {...}}.
+    """
+    from batch import guess_format, open_text
+
+    items = get_items()
+    fmt = fmt or guess_format(path)
+    with open_text(path, "r") as f:
+        if fmt == "csv":
+            for n, row in enumerate(csv.DictReader(f), start=1):
+                answers = {it.id: int(row[it.id]) for it in items if row.get(it.id, "") != ""}
+                yield ReportJob(row.get("id") or str(n), row.get("name") or "N/A",
+                                row.get("role") or "N/A", answers)
+        elif fmt == "jsonl":
+            for n, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                obj = json.loads(line)
+                yield ReportJob(str(obj.get("id", n)), obj.get("name") or "N/A",
+                                obj.get("role") or "N/A", obj.get("answers", {}))
+        else:
+            raise ValueError(f"Formato no soportado: {fmt}")
+
+# -----------------------------
+# Trabajo (en el proceso worker)
+# -----------------------------
+def init_worker(cache_dir: Optional[str], vector: bool) -> None:
+    if not vector:
+        import matplotlib
+        matplotlib.use("Agg")
+    if cache_dir:
+        # Nivel en disco compartido entre procesos: perfiles repetidos no se vuelven a dibujar
+        configure_cache(disk_dir=cache_dir)
+
+def _safe_name(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", s).strip("_") or "sin_id"
+
+def render_report(job: ReportJob, out_dir: str, vector: bool = True) -> str:
+    """
+    Scoring + gráficos + PDF de una persona. Devuelve la ruta del PDF.
+    vector=True dibuja los gráficos en el PDF sin matplotlib ni PNG.
+    """
+    from report_pdf import build_pdf
+
+    res = cached_score_disc(get_items(), job.answers)
+    out_pdf = os.path.join(out_dir, f"informe_disc_{_safe_name(job.respondent_id)}.pdf")
+    if vector:
+        build_pdf(
+            out_pdf=out_pdf,
+            person_name=job.person_name,
+            role=job.role,
+            raw=res.raw, pct=res.pct, z=res.z,
+            primary=res.primary, secondary=res.secondary,
+            validity_score=res.validity_score,
+            notes=res.notes,
+            vector=True
+        )
+        return out_pdf
+
+    from chart_templates import bar_chart, radar_chart, quadrant_chart
+    with tempfile.TemporaryDirectory(prefix="disc_") as tmp:
+        img_bar = os.path.join(tmp, "bar.png")
+        img_radar = os.path.join(tmp, "radar.png")
+        img_quad = os.path.join(tmp, "quadrant.png")
+        bar_chart(res.raw, img_bar)
+        radar_chart(res.pct, img_radar)
+        quadrant_chart(res.z, img_quad)
+        build_pdf(
+            out_pdf=out_pdf,
+            person_name=job.person_name,
+            role=job.role,
+            raw=res.raw, pct=res.pct, z=res.z,
+            primary=res.primary, secondary=res.secondary,
+            validity_score=res.validity_score,
+            notes=res.notes,
+            img_bar=img_bar, img_radar=img_radar, img_quad=img_quad
+        )
+    return out_pdf
+
+def render_report_bytes(job: ReportJob, vector: bool = True) -> bytes:
+    """Como render_report, pero devuelve el PDF en memoria (lo usa service.py)."""
+    with tempfile.TemporaryDirectory(prefix="disc_") as tmp:
+        with open(render_report(job, tmp, vector), "rb") as f:
+            return f.read()
+
+def _run_job(index: int, job: ReportJob, out_dir: str, vector: bool) -> ReportOutcome:
+    t0 = time.perf_counter()
+    try:
+        path = render_report(job, out_dir, vector)
+        return ReportOutcome(index, job.respondent_id, path, None, time.perf_counter() - t0)
+    except Exception:
+        return ReportOutcome(index, job.respondent_id, None, traceback.format_exc(),
+                             time.perf_counter() - t0)
+
+# -----------------------------
+# Pool
+# -----------------------------
+def generate_reports(jobs: Iterable[ReportJob], out_dir: str,
+                     workers: Optional[int] = None,
+                     progress: Optional[Callable[[ReportOutcome], None]] = None,
+                     cache_dir: Optional[str] = None,
+                     vector: bool = True
+                     ) -> Iterator[ReportOutcome]:
+    """
+    Reparte los trabajos en un pool de `workers` procesos (por defecto os.cpu_count())
+    y produce los resultados en orden de entrada. Como máximo hay 2×workers
+    trabajos en vuelo, así que `jobs` puede ser un generador de cualquier largo.
+    cache_dir: activa el nivel en disco de cache.py, compartido por los workers.
+    vector: gráficos vectoriales en el PDF (False = PNG de chart_templates).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    window = 2 * workers
+    pending: Deque[Future] = deque()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(cache_dir, vector)) as pool:
+        for i, job in enumerate(jobs):
+            pending.append(pool.submit(_run_job, i, job, out_dir, vector))
+            if len(pending) >= window:
+                outcome = pending.popleft().result()
+                if progress:
+                    progress(outcome)
+                yield outcome
+        while pending:
+            outcome = pending.popleft().result()
+            if progress:
+                progress(outcome)
+            yield outcome
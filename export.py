@@ -0,0 +1,322 @@
+"""
+Exportación columnar de resultados para análisis (NumPy .npz por grupo de filas).
+
+Un export es una carpeta con un _meta.json y archivos part-00000.npz,
+part-00001.npz, ...: cada uno es un grupo de filas con una matriz por columna.
+Agregar resultados escribe grupos nuevos y reescribe _meta.json (de forma
+atómica) al final, así que un export se puede ir completando lote a lote.
+
+Columnas (mismo orden D/I/S/C que DiscBatchResult):
+
+    id                S (bytes UTF-8)   solo si se pasan ids
+    raw               int16  (N, 4)
+    pct, z            float32 (N, 4)
+    primary           uint8             índice en DIMS
+    blend             uint8             código en el diccionario "blend"
+    undifferentiated  bool
+    validity_score    int16
+    validity_flag     bool
+    role              uint16            código en el diccionario "role"
+    pop_z, pop_pct    float32 (N, 4)    solo si el lote se puntuó con normas
+
+blend y role se guardan como códigos enteros con su diccionario en _meta.json
+("blend" es fijo: las 64 etiquetas posibles; "role" crece al aparecer roles
+nuevos, sin cambiar los códigos ya escritos). Al cargar, cada columna es un
+único arreglo tipado:
+
+    with ColumnarWriter("out/resultados", items) as w:
+        for ids, res in score_chunks(chunks, items):
+            w.append(ids, res, role="Ventas")
+    t = load("out/resultados")
+    dc = t["blend"] == t.code("blend", "D-C")
+    t["pct"][dc].mean(axis=0)
+
+    python export.py out/resultados --from respuestas.csv --role Ventas
+    python export.py out/resultados                  # resumen del export
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from itertools import permutations
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from questionnaire import Item, get_items
+from response_store import items_hash
+from scoring import DIMS, DiscBatchResult
+
+FORMAT = "disc-columnar"
+FORMAT_VERSION = 1
+META_FILE = "_meta.json"
+DEFAULT_ROW_GROUP = 1_000_000
+
+# Todas las etiquetas posibles: primario + secundarios en orden de ranking
+BLEND_LABELS: List[str] = [
+    "-".join((p,) + rest)
+    for p in DIMS
+    for k in range(len(DIMS))
+    for rest in permutations([d for d in DIMS if d != p], k)
+]
+_BLEND_CODE = {label: code for code, label in enumerate(BLEND_LABELS)}
+
+_DTYPES = {
+    "raw": "int16", "pct": "float32", "z": "float32", "primary": "uint8", "blend": "uint8",
+    "undifferentiated": "bool", "validity_score": "int16", "validity_flag": "bool",
+    "role": "uint16", "pop_z": "float32", "pop_pct": "float32",
+}
+_MATRIX = ("raw", "pct", "z", "pop_z", "pop_pct")
+
+def _write_atomic(path: str, write) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+# -----------------------------
+# Escritura
+# -----------------------------
+class ColumnarWriter:
+    """
+    Agrega bloques puntuados a un export (nuevo o existente). Las filas se juntan
+    hasta row_group filas antes de escribir un grupo; close() escribe el resto.
+    """
+
+    def __init__(self, path: str, items: Sequence[Item], row_group: int = DEFAULT_ROW_GROUP):
+        self.path = path
+        self.row_group = row_group
+        os.makedirs(path, exist_ok=True)
+        ihash = items_hash(items).hex()
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+            if self.meta.get("format") != FORMAT or self.meta.get("version") != FORMAT_VERSION:
+                raise ValueError(f"{path}: no es un export {FORMAT} v{FORMAT_VERSION}")
+            if self.meta["items_hash"] != ihash:
+                raise ValueError(f"{path}: creado con otra versión del cuestionario")
+        else:
+            self.meta = {"format": FORMAT, "version": FORMAT_VERSION, "items_hash": ihash,
+                         "rows": 0, "columns": None, "dictionaries": {"blend": list(BLEND_LABELS), "role": []},
+                         "row_groups": []}
+        self._role_code = {r: k for k, r in enumerate(self.meta["dictionaries"]["role"])}
+        self._pending: List[Dict[str, np.ndarray]] = []
+        self._pending_rows = 0
+
+    def __len__(self) -> int:
+        return self.meta["rows"] + self._pending_rows
+
+    def append(self, ids: Optional[Sequence[str]], res: DiscBatchResult,
+               role: Union[None, str, Sequence[Optional[str]]] = None) -> int:
+        """
+        Agrega un bloque de score_disc_batch. role: uno para todo el bloque o uno por
+        fila (None = sin rol). Devuelve la cantidad de filas agregadas.
+        """
+        n = len(res)
+        labels, inv = res.blend_index()
+        cols = {
+            "raw": res.raw.astype(np.int16),
+            "pct": res.pct.astype(np.float32),
+            "z": res.z.astype(np.float32),
+            "primary": res.primary.astype(np.uint8),
+            "blend": np.array([_BLEND_CODE[label] for label in labels], dtype=np.uint8)[inv],
+            "undifferentiated": res.undifferentiated.astype(bool),
+            "validity_score": res.validity_score.astype(np.int16),
+            "validity_flag": res.validity_flag.astype(bool),
+            "role": self._encode_roles(role, n),
+        }
+        if res.pop_z is not None:
+            cols["pop_z"] = res.pop_z.astype(np.float32)
+            cols["pop_pct"] = res.pop_pct.astype(np.float32)
+        if ids is not None:
+            cols["id"] = np.array([str(i).encode("utf-8") for i in ids], dtype=np.bytes_)
+        self._check_columns(cols)
+
+        self._pending.append(cols)
+        self._pending_rows += n
+        if self._pending_rows >= self.row_group:
+            self.flush()
+        return n
+
+    def _encode_roles(self, role: Union[None, str, Sequence[Optional[str]]], n: int) -> np.ndarray:
+        if role is None or isinstance(role, str):
+            return np.full(n, self._role(role), dtype=np.uint16)
+        return np.fromiter(map(self._role, role), dtype=np.uint16, count=n)
+
+    def _role(self, name: Optional[str]) -> int:
+        name = name or ""
+        code = self._role_code.get(name)
+        if code is None:
+            code = len(self._role_code)
+            if code > np.iinfo(np.uint16).max:
+                raise ValueError(f"Demasiados roles distintos (máximo {np.iinfo(np.uint16).max + 1})")
+            self._role_code[name] = code
+            self.meta["dictionaries"]["role"].append(name)
+        return code
+
+    def _check_columns(self, cols: Dict[str, np.ndarray]) -> None:
+        names = sorted(cols)
+        if self.meta["columns"] is None:
+            self.meta["columns"] = names
+        elif self.meta["columns"] != names:
+            # p. ej. un bloque con normas (pop_z) y otro sin, o ids en unos bloques y en otros no
+            raise ValueError(f"Columnas distintas al resto del export: {names} != {self.meta['columns']}")
+
+    def flush(self) -> None:
+        """Escribe las filas pendientes como un grupo nuevo y actualiza _meta.json."""
+        if not self._pending:
+            return
+        group = {name: np.concatenate([c[name] for c in self._pending]) for name in self._pending[0]}
+        name = f"part-{len(self.meta['row_groups']):05d}.npz"
+        # sin comprimir: np.load lee cada columna de corrido, sin descomprimir
+        _write_atomic(os.path.join(self.path, name), lambda f: np.savez(f, **group))
+        self.meta["row_groups"].append({"file": name, "rows": self._pending_rows})
+        self.meta["rows"] += self._pending_rows
+        self._pending, self._pending_rows = [], 0
+        _write_atomic(os.path.join(self.path, META_FILE),
+                      lambda f: f.write(json.dumps(self.meta, ensure_ascii=False, indent=1).encode("utf-8")))
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "ColumnarWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        # con error a mitad de camino no se escribe el grupo incompleto
+        if exc_type is None:
+            self.close()
+
+def export_chunks(scored: Iterable[Tuple[List[str], DiscBatchResult]], writer: ColumnarWriter,
+                  role: Optional[str] = None) -> Iterator[Tuple[List[str], DiscBatchResult]]:
+    """Agrega cada bloque al export a medida que pasa (para encadenar con batch.score_chunks)."""
+    for ids, res in scored:
+        writer.append(ids, res, role=role)
+        yield ids, res
+
+# -----------------------------
+# Lectura
+# -----------------------------
+@dataclass
+class ColumnarResults:
+    columns: Dict[str, np.ndarray]
+    dictionaries: Dict[str, List[str]]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def code(self, column: str, label: str) -> int:
+        """Código de una etiqueta ("D-C", "Ventas") para filtrar sin decodificar."""
+        try:
+            return self.dictionaries[column].index(label)
+        except ValueError:
+            return -1           # no aparece: ninguna fila coincide
+
+    def labels(self, column: str) -> np.ndarray:
+        """Columna diccionario decodificada (arreglo de str)."""
+        return np.asarray(self.dictionaries[column], dtype=object)[self.columns[column]]
+
+def read_meta(path: str) -> dict:
+    with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != FORMAT or meta.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path}: no es un export {FORMAT} v{FORMAT_VERSION}")
+    return meta
+
+def load(path: str, columns: Optional[Sequence[str]] = None) -> ColumnarResults:
+    """Carga el export completo (o solo `columns`), un arreglo por columna."""
+    meta = read_meta(path)
+    names = list(columns) if columns is not None else meta["columns"] or []
+    missing = set(names) - set(meta["columns"] or [])
+    if missing:
+        raise KeyError(f"Columnas inexistentes en {path}: {sorted(missing)}")
+    n = meta["rows"]
+    out: Dict[str, np.ndarray] = {}
+    start = 0
+    for group in meta["row_groups"]:
+        stop = start + group["rows"]
+        with np.load(os.path.join(path, group["file"])) as z:
+            for name in names:
+                a = z[name]
+                if name not in out:
+                    out[name] = np.empty((n,) + a.shape[1:], dtype=a.dtype)
+                elif a.dtype.itemsize > out[name].dtype.itemsize:
+                    out[name] = out[name].astype(a.dtype)     # ids más largos que en grupos anteriores
+                out[name][start:stop] = a
+        start = stop
+    for name in names:
+        if name not in out:       # export sin filas
+            shape = (0, len(DIMS)) if name in _MATRIX else (0,)
+            out[name] = np.empty(shape, dtype=_DTYPES.get(name, np.bytes_))
+    return ColumnarResults(out, meta["dictionaries"])
+
+# -----------------------------
+# CLI
+# -----------------------------
+def export_file(in_path: str, out_path: str, role: Optional[str] = None, in_format: Optional[str] = None,
+                chunk_size: int = 10_000, use_lookup: bool = False) -> int:
+    """Puntúa un archivo de respuestas (CSV/JSONL/.discr, como batch.py) y lo agrega al export."""
+    from batch import guess_format, iter_chunks, open_text, read_rows, score_chunks, store_chunks
+
+    items = get_items()
+    in_format = in_format or guess_format(in_path)
+    lookup = None
+    if use_lookup:
+        from lookup import get_table
+        lookup = get_table(items)
+    fin_ctx = nullcontext() if in_format == "store" else open_text(in_path, "r")
+    with ColumnarWriter(out_path, items) as w, fin_ctx as fin:
+        if in_format == "store":
+            chunks = store_chunks(in_path, items, chunk_size)
+        else:
+            chunks = iter_chunks(read_rows(fin, items, in_format), chunk_size)
+        for ids, res in score_chunks(chunks, items, lookup=lookup):
+            w.append(ids, res, role=role)
+        return len(w)
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Export columnar (.npz por grupo de filas) de resultados DISC.")
+    p.add_argument("export", help="Carpeta del export.")
+    p.add_argument("--from", dest="source", metavar="ENTRADA",
+                   help="Puntúa ese archivo (CSV/JSONL/.discr) y agrega los resultados al export.")
+    p.add_argument("--input-format", choices=["csv", "jsonl"])
+    p.add_argument("--role", help="Rol/área de todas las filas agregadas.")
+    p.add_argument("--chunk-size", type=int, default=10_000)
+    p.add_argument("--lookup", action="store_true", help="Clasificar con la tabla precalculada (lookup.py).")
+    args = p.parse_args(argv)
+
+    if args.source:
+        t0 = time.perf_counter()
+        n = export_file(args.source, args.export, args.role, args.input_format, args.chunk_size, args.lookup)
+        print(f"{n:,} filas en el export ({time.perf_counter() - t0:.2f} s)", file=sys.stderr)
+
+    t0 = time.perf_counter()
+    t = load(args.export)
+    secs = time.perf_counter() - t0
+    mem = sum(a.nbytes for a in t.columns.values())
+    print(f"{len(t):,} filas, {len(t.columns)} columnas, {mem / 2**20:,.1f} MiB en memoria, "
+          f"cargado en {secs:.2f} s")
+    if len(t):
+        counts = np.bincount(t["blend"], minlength=len(BLEND_LABELS))
+        top = np.argsort(-counts, kind="stable")[:10]
+        print("blends más frecuentes:", ", ".join(f"{BLEND_LABELS[k]} {counts[k]:,}" for k in top if counts[k]))
+        roles = t.dictionaries["role"]
+        if len(roles) > 1 or roles and roles[0]:
+            rc = np.bincount(t["role"], minlength=len(roles))
+            print("roles:", ", ".join(f"{r or '(sin rol)'} {c:,}" for r, c in zip(roles, rc.tolist())))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Medición por etapa del pipeline de informes (scoring, gráficos, PNG, PDF).
+
+Las funciones instrumentadas se marcan con @instrumented("nombre") o con
+`with span("nombre"):`. Desactivado (por defecto) el costo es un chequeo de
+un booleano por llamada. Activado, cada span registra tiempo de reloj, tiempo
+de CPU del hilo y, opcionalmente, el pico de memoria de tracemalloc, y se lo
+pasa a los hooks registrados. El hook por defecto agrega contadores e
+histogramas que se exportan a JSON o en formato de texto de Prometheus.
+
+    import instrumentation as ins
+    ins.enable(memory=True)
+    ...
+    ins.write_metrics("metricas.json")      # o .prom
+    ins.serve_prometheus(9464)              # GET /metrics
+
+Variables de entorno (las lee configure_from_env(), que llaman los puntos de
+entrada: app_cli, service y la app de Streamlit; importar el módulo no hace nada):
+    DISC_INSTRUMENT=1 | memory     activa los spans (memory = también tracemalloc)
+    DISC_METRICS_PORT=9464         además expone /metrics en ese puerto (solo el
+                                   proceso principal: los workers nunca lo abren)
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+# Límites superiores (segundos) de los buckets del histograma de tiempo de reloj
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+@dataclass
+class SpanRecord:
+    name: str
+    wall_s: float
+    cpu_s: float
+    peak_bytes: Optional[int] = None   # solo con memory=True
+    error: bool = False
+
+Hook = Callable[[SpanRecord], None]
+
+_enabled = False
+_memory = False
+_hooks: List[Hook] = []
+_local = threading.local()
+
+# -----------------------------
+# Spans
+# -----------------------------
+class _Span:
+    __slots__ = ("name", "t0", "c0", "mem0", "child_peak")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        if _memory and tracemalloc.is_tracing():
+            self.mem0 = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        else:
+            self.mem0 = None
+        self.child_peak = 0
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        self.c0 = time.thread_time()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        wall = time.perf_counter() - self.t0
+        cpu = time.thread_time() - self.c0
+        stack = _local.stack
+        stack.pop()
+        peak = None
+        if self.mem0 is not None and tracemalloc.is_tracing():
+            # reset_peak es global: los spans hijos lo reinician, por eso se
+            # combina el pico desde el último reinicio con el de los hijos
+            abs_peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            peak = max(0, abs_peak - self.mem0)
+            if stack:
+                stack[-1].child_peak = max(stack[-1].child_peak, abs_peak)
+        _emit(SpanRecord(self.name, wall, cpu, peak, exc_type is not None))
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+_NOOP = _NoopSpan()
+
+def span(name: str):
+    """Context manager que mide el bloque; no hace nada si la instrumentación está apagada."""
+    return _Span(name) if _enabled else _NOOP
+
+def instrumented(name: str) -> Callable:
+    """Decorador: cada llamada a la función es un span con ese nombre."""
+    def deco(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def _emit(rec: SpanRecord) -> None:
+    for hook in list(_hooks):
+        try:
+            hook(rec)
+        except Exception:
+            pass   # un hook roto no debe romper un informe
+
+# -----------------------------
+# Configuración
+# -----------------------------
+def enable(memory: bool = False) -> None:
+    """Activa los spans; memory=True además arranca tracemalloc (más lento)."""
+    global _enabled, _memory
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+def disable() -> None:
+    global _enabled, _memory
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def is_memory_enabled() -> bool:
+    return _enabled and _memory
+
+def add_hook(hook: Hook) -> None:
+    _hooks.append(hook)
+
+def remove_hook(hook: Hook) -> None:
+    _hooks.remove(hook)
+
+# -----------------------------
+# Agregación
+# -----------------------------
+class Registry:
+    """Hook que agrega por nombre: cantidad, errores, sumas, histograma y pico máximo."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+
+    def __call__(self, rec: SpanRecord) -> None:
+        with self._lock:
+            s = self._stats.get(rec.name)
+            if s is None:
+                s = self._stats[rec.name] = {
+                    "count": 0, "errors": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0,
+                    "peak_bytes": None, "buckets": [0] * len(self.buckets),
+                }
+            s["count"] += 1
+            s["errors"] += rec.error
+            s["wall_s"] += rec.wall_s
+            s["cpu_s"] += rec.cpu_s
+            s["max_wall_s"] = max(s["max_wall_s"], rec.wall_s)
+            if rec.peak_bytes is not None:
+                s["peak_bytes"] = max(s["peak_bytes"] or 0, rec.peak_bytes)
+            for i, le in enumerate(self.buckets):
+                if rec.wall_s <= le:
+                    s["buckets"][i] += 1
+                    break
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {k: dict(v, buckets=list(v["buckets"])) for k, v in self._stats.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def take(self) -> Dict[str, dict]:
+        """snapshot() y reset() en un paso: lo agregado desde la última llamada."""
+        with self._lock:
+            out, self._stats = self._stats, {}
+        return out
+
+    def merge(self, stats: Dict[str, dict]) -> None:
+        """Suma lo agregado en otro proceso (snapshot() o take() de un worker)."""
+        with self._lock:
+            for name, o in stats.items():
+                s = self._stats.get(name)
+                if s is None:
+                    self._stats[name] = dict(o, buckets=list(o["buckets"]))
+                    continue
+                for k in ("count", "errors", "wall_s", "cpu_s"):
+                    s[k] += o[k]
+                s["max_wall_s"] = max(s["max_wall_s"], o["max_wall_s"])
+                if o["peak_bytes"] is not None:
+                    s["peak_bytes"] = max(s["peak_bytes"] or 0, o["peak_bytes"])
+                s["buckets"] = [a + b for a, b in zip(s["buckets"], o["buckets"])]
+
+    def to_dict(self) -> dict:
+        return {"buckets_s": list(self.buckets), "spans": self.snapshot()}
+
+    def prometheus_text(self) -> str:
+        out = [
+            "# HELP disc_span_seconds Tiempo de reloj por etapa.",
+            "# TYPE disc_span_seconds histogram",
+        ]
+        snap = self.snapshot()
+        for name, s in sorted(snap.items()):
+            acc = 0
+            for le, k in zip(self.buckets, s["buckets"]):
+                acc += k
+                out.append(f'disc_span_seconds_bucket{{span="{name}",le="{le}"}} {acc}')
+            out.append(f'disc_span_seconds_bucket{{span="{name}",le="+Inf"}} {s["count"]}')
+            out.append(f'disc_span_seconds_sum{{span="{name}"}} {s["wall_s"]:.6f}')
+            out.append(f'disc_span_seconds_count{{span="{name}"}} {s["count"]}')
+        out += ["# HELP disc_span_cpu_seconds_total Tiempo de CPU (hilo) por etapa.",
+                "# TYPE disc_span_cpu_seconds_total counter"]
+        out += [f'disc_span_cpu_seconds_total{{span="{n}"}} {s["cpu_s"]:.6f}' for n, s in sorted(snap.items())]
+        out += ["# HELP disc_span_errors_total Spans que terminaron con excepción.",
+                "# TYPE disc_span_errors_total counter"]
+        out += [f'disc_span_errors_total{{span="{n}"}} {s["errors"]}' for n, s in sorted(snap.items())]
+        peaks = [(n, s["peak_bytes"]) for n, s in sorted(snap.items()) if s["peak_bytes"] is not None]
+        if peaks:
+            out += ["# HELP disc_span_peak_bytes Pico de memoria (tracemalloc) por etapa.",
+                    "# TYPE disc_span_peak_bytes gauge"]
+            out += [f'disc_span_peak_bytes{{span="{n}"}} {p}' for n, p in peaks]
+        return "\n".join(out) + "\n"
+
+registry = Registry()
+add_hook(registry)
+
+def write_metrics(path: str) -> None:
+    """Exporta lo agregado: .prom/.txt en formato Prometheus, cualquier otra extensión en JSON."""
+    if path.endswith((".prom", ".txt")):
+        data = registry.prometheus_text()
+    else:
+        data = json.dumps(registry.to_dict(), indent=2)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+def serve_prometheus(port: int, host: str = "127.0.0.1"):
+    """Expone GET /metrics en un hilo de fondo; devuelve el servidor (shutdown() para pararlo)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="disc-metrics", daemon=True).start()
+    return server
+
+_server = None
+
+def configure_from_env(serve: bool = True):
+    """
+    Aplica DISC_INSTRUMENT y DISC_METRICS_PORT. Se puede llamar varias veces (p. ej.
+    en cada rerun de Streamlit): el servidor de /metrics se abre una sola vez, y
+    nunca en un proceso hijo (workers de multiprocessing), que volvería a pedir el
+    mismo puerto. Devuelve el servidor, o None si no se abrió.
+    """
+    global _server
+    import multiprocessing
+
+    mode = os.environ.get("DISC_INSTRUMENT", "").strip().lower()
+    if mode in ("1", "true", "yes", "memory"):
+        enable(memory=mode == "memory")
+    port = os.environ.get("DISC_METRICS_PORT")
+    if not serve or not port or multiprocessing.parent_process() is not None:
+        return None
+    if _server is None:
+        if not _enabled:
+            enable()
+        _server = serve_prometheus(int(port))
+    return _server
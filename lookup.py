@@ -0,0 +1,292 @@
+"""
+Tabla precalculada de clasificación sobre todo el espacio de puntajes crudos.
+
+primary, secondary y "poco diferenciado" dependen solo de los cuatro crudos
+D/I/S/C (10..50 con 10 ítems por dimensión: 41^4 ≈ 2,8 M combinaciones), así
+que se pueden precalcular para un blend_ratio/blend_abs dados y resolver con
+un acceso por índice, sin ordenar. La validez es una comparación contra el
+umbral y no entra en la tabla.
+
+Cada celda es un byte:
+
+    código = permutación << 3 | cantidad de secundarias << 1 | poco diferenciado
+
+  - permutación: índice (0..23) del orden de ranking de score_disc (sort
+    estable descendente); su primer elemento es el primario.
+  - secundarias: las reglas de blend son monótonas en el puntaje, así que las
+    secundarias son siempre un prefijo del ranking y alcanza con contarlas.
+
+    table = get_table(get_items())                 # ~0,6 s la primera vez por proceso
+    score_disc(items, answers, lookup=table)
+    score_disc_batch(items, matrix, lookup=table)
+
+    python lookup.py --verify                      # compara contra score_disc, exhaustivo
+    python lookup.py --save tabla.npz              # guardar (comprimida ~200 KiB)
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from questionnaire import Item
+from scoring import DIMS, LIKERT_MAX, LIKERT_MIN, _rank, reverse_score, score_disc
+
+FORMAT_VERSION = 1
+
+PERMS: List[Tuple[int, ...]] = list(itertools.permutations(range(4)))
+# orden (4 índices de 2 bits) -> índice de permutación
+_PERM_OF_KEY = np.full(256, -1, dtype=np.int64)
+for _i, _p in enumerate(PERMS):
+    _PERM_OF_KEY[_p[0] * 64 + _p[1] * 16 + _p[2] * 4 + _p[3]] = _i
+
+N_CODES = len(PERMS) << 3
+
+def _decode(code: int) -> Tuple[int, Tuple[int, ...], bool]:
+    perm = PERMS[code >> 3]
+    return perm[0], perm[1:1 + ((code >> 1) & 3)], bool(code & 1)
+
+# Decodificación por código: escalar (strings) y por lotes (arrays)
+_DECODED = [_decode(c) for c in range(N_CODES)]
+_SCALAR = [(DIMS[p], tuple(DIMS[j] for j in sec), und) for p, sec, und in _DECODED]
+_PRIMARY = np.array([p for p, _, _ in _DECODED], dtype=np.int64)
+_SECONDARY = np.zeros((N_CODES, 4), dtype=bool)
+for _c, (_, _sec, _) in enumerate(_DECODED):
+    _SECONDARY[_c, list(_sec)] = True
+_UNDIFF = np.array([u for _, _, u in _DECODED], dtype=bool)
+
+@dataclass
+class ClassificationTable:
+    lo: int                        # puntaje crudo mínimo posible por dimensión
+    hi: int                        # puntaje crudo máximo posible
+    blend_ratio: float
+    blend_abs: int
+    codes: np.ndarray = field(repr=False)   # (w^4,) uint8, índice ((D·w + I)·w + S)·w + C
+
+    def __post_init__(self):
+        self.width = self.hi - self.lo + 1
+        if self.codes.shape != (self.width ** 4,):
+            raise ValueError(f"La tabla no tiene {self.width}^4 celdas")
+        self._bytes = self.codes.tobytes()   # indexar bytes es lo más rápido desde Python
+
+    @classmethod
+    def build(cls, lo: int, hi: int, blend_ratio: float = 0.90, blend_abs: int = 2) -> "ClassificationTable":
+        w = hi - lo + 1
+        codes = np.empty(w ** 4, dtype=np.uint8)
+        # un bloque por valor de D (w^3 filas) para no materializar w^4 × 4 enteros
+        rest = np.stack(np.meshgrid(*[np.arange(lo, hi + 1)] * 3, indexing="ij"), axis=-1).reshape(-1, 3)
+        block = w ** 3
+        for k, d in enumerate(range(lo, hi + 1)):
+            raw = np.hstack([np.full((block, 1), d), rest])
+            codes[k * block:(k + 1) * block] = encode(raw, blend_ratio, blend_abs)
+        codes.setflags(write=False)
+        return cls(lo, hi, blend_ratio, blend_abs, codes)
+
+    @classmethod
+    def for_items(cls, items: Sequence[Item], blend_ratio: float = 0.90,
+                  blend_abs: int = 2) -> "ClassificationTable":
+        lo, hi = score_range(items)
+        return cls.build(lo, hi, blend_ratio, blend_abs)
+
+    def check_params(self, blend_ratio: float, blend_abs: int) -> None:
+        if blend_ratio != self.blend_ratio or blend_abs != self.blend_abs:
+            raise ValueError(f"La tabla se armó con blend_ratio={self.blend_ratio}, "
+                             f"blend_abs={self.blend_abs}")
+
+    # -----------------------------
+    # Consulta
+    # -----------------------------
+    def classify(self, raw: Dict[str, int]) -> Tuple[str, List[str], bool]:
+        """(primary, secondary, poco diferenciado), igual que score_disc. O(1)."""
+        lo, w = self.lo, self.width
+        d, i, s, c = raw["D"] - lo, raw["I"] - lo, raw["S"] - lo, raw["C"] - lo
+        if not (0 <= d < w and 0 <= i < w and 0 <= s < w and 0 <= c < w):
+            raise ValueError(f"Puntaje crudo fuera de rango ({self.lo}..{self.hi}): {raw}")
+        primary, secondary, undiff = _SCALAR[self._bytes[((d * w + i) * w + s) * w + c]]
+        return primary, list(secondary), undiff
+
+    def lookup_codes(self, raw) -> np.ndarray:
+        """raw: (N, 4) crudos D/I/S/C -> (N,) códigos."""
+        raw = np.asarray(raw, dtype=np.int64)
+        if raw.ndim != 2 or raw.shape[1] != 4:
+            raise ValueError(f"Se esperaba una matriz N×4, se recibió {raw.shape}")
+        if len(raw) and (raw.min() < self.lo or raw.max() > self.hi):
+            raise ValueError(f"Puntaje crudo fuera de rango ({self.lo}..{self.hi})")
+        w = self.width
+        idx = (raw - self.lo) @ np.array([w ** 3, w ** 2, w, 1], dtype=np.int64)
+        return self.codes[idx]
+
+    def classify_batch(self, raw) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Mismo contrato que scoring.classify_raw: (primary, secondary_mask, undifferentiated)."""
+        codes = self.lookup_codes(raw)
+        return _PRIMARY[codes], _SECONDARY[codes], _UNDIFF[codes]
+
+    # -----------------------------
+    # Persistencia
+    # -----------------------------
+    def save(self, path: str) -> None:
+        """npz comprimido; escritura atómica (archivo temporal + rename)."""
+        d = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=d, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, codes=self.codes, meta=np.array(
+                    [FORMAT_VERSION, self.lo, self.hi, self.blend_ratio, self.blend_abs], dtype=np.float64))
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "ClassificationTable":
+        with np.load(path) as z:
+            version, lo, hi, ratio, abs_ = z["meta"].tolist()
+            if int(version) != FORMAT_VERSION:
+                raise ValueError(f"Versión de tabla no soportada: {int(version)}")
+            codes = z["codes"]
+        codes.setflags(write=False)
+        return cls(int(lo), int(hi), ratio, int(abs_), codes)
+
+def score_range(items: Sequence[Item]) -> Tuple[int, int]:
+    """(mínimo, máximo) crudo por dimensión; exige la misma cantidad de ítems en D/I/S/C."""
+    counts = {d: sum(1 for it in items if it.dim == d) for d in DIMS}
+    if len(set(counts.values())) != 1:
+        raise ValueError(f"Las dimensiones tienen distinta cantidad de ítems: {counts}")
+    k = counts["D"]
+    return k * LIKERT_MIN, k * LIKERT_MAX
+
+def encode(raw: np.ndarray, blend_ratio: float = 0.90, blend_abs: int = 2) -> np.ndarray:
+    """(N, 4) crudos -> (N,) códigos uint8, con las reglas de score_disc."""
+    # sort estable descendente: mismo orden que sorted(..., reverse=True) en score_disc
+    order = np.argsort(-raw, axis=1, kind="stable")
+    ranked = np.take_along_axis(raw, order, axis=1)
+    top = ranked[:, :1]
+    rest = ranked[:, 1:]
+    n_sec = ((rest >= top * blend_ratio) | ((top - rest) <= blend_abs)).sum(axis=1)
+    undiff = (ranked[:, 0] - ranked[:, 3]) <= 3
+    perm = _PERM_OF_KEY[order @ np.array([64, 16, 4, 1])]
+    return ((perm << 3) | (n_sec << 1) | undiff).astype(np.uint8)
+
+@lru_cache(maxsize=4)
+def _cached_table(lo: int, hi: int, blend_ratio: float, blend_abs: int) -> ClassificationTable:
+    return ClassificationTable.build(lo, hi, blend_ratio, blend_abs)
+
+def get_table(items: Sequence[Item], blend_ratio: float = 0.90, blend_abs: int = 2) -> ClassificationTable:
+    """Tabla para el rango de items, armada una vez por proceso y parámetros."""
+    lo, hi = score_range(items)
+    return _cached_table(lo, hi, blend_ratio, blend_abs)
+
+# -----------------------------
+# Verificación
+# -----------------------------
+@dataclass
+class VerifyReport:
+    checked: int
+    mismatches: List[Tuple[Tuple[int, int, int, int], tuple, tuple]]   # (crudos, tabla, score_disc)
+    seconds: float
+
+    @property
+    def ok(self) -> bool:
+        return not self.mismatches
+
+def answers_for_raw(items: Sequence[Item], raw: Dict[str, int]) -> Dict[str, int]:
+    """Respuestas 1..5 cuyos crudos son exactamente `raw` (validez en 3 por ítem)."""
+    by_dim: Dict[str, List[Item]] = {}
+    for it in items:
+        by_dim.setdefault(it.dim, []).append(it)
+    answers = {}
+    for dim, its in by_dim.items():
+        if dim not in raw:
+            answers.update((it.id, 3) for it in its)
+            continue
+        q, r = divmod(raw[dim], len(its))
+        for j, it in enumerate(its):
+            x = q + 1 if j < r else q
+            answers[it.id] = reverse_score(x) if it.reverse else x
+    return answers
+
+def verify(table: ClassificationTable, items: Sequence[Item], full: bool = True,
+           max_mismatches: int = 20) -> VerifyReport:
+    """
+    Recorre las w^4 combinaciones y compara la tabla contra el scoring real.
+    full=True: arma respuestas con esos crudos y llama a score_disc (~2 min con 41^4).
+    full=False: compara solo contra la etapa de ranking de score_disc (scoring._rank), más rápido.
+    En ambos casos también chequea classify_batch contra scoring.classify_raw.
+    """
+    from scoring import classify_raw
+
+    t0 = time.perf_counter()
+    bad = []
+    n = 0
+    values = range(table.lo, table.hi + 1)
+    w = table.width
+    rest = np.stack(np.meshgrid(*[np.arange(table.lo, table.hi + 1)] * 3, indexing="ij"), axis=-1).reshape(-1, 3)
+    for d in values:
+        # por lotes: el camino vectorizado debe dar lo mismo que classify_raw
+        raw_block = np.hstack([np.full((w ** 3, 1), d), rest])
+        got = table.classify_batch(raw_block)
+        want = classify_raw(raw_block, table.blend_ratio, table.blend_abs)
+        for g, x in zip(got, want):
+            if not np.array_equal(g, x):
+                rows = np.flatnonzero((g != x).reshape(len(raw_block), -1).any(axis=1))
+                for r in rows[:max_mismatches - len(bad)]:
+                    bad.append((tuple(raw_block[r].tolist()), "classify_batch", "classify_raw"))
+        # escalar: mismo resultado (y mismo orden de secundarias) que score_disc
+        for i, s, c in itertools.product(values, repeat=3):
+            raw = {"D": d, "I": i, "S": s, "C": c}
+            got1 = table.classify(raw)
+            if full:
+                res = score_disc(items, answers_for_raw(items, raw), table.blend_ratio, table.blend_abs)
+                if res.raw != raw:
+                    raise ValueError(f"answers_for_raw no reproduce {raw}")
+                want1 = (res.primary, res.secondary, any(nt.startswith("Perfil poco") for nt in res.notes))
+            else:
+                want1 = _rank(raw, table.blend_ratio, table.blend_abs)
+            if got1 != want1 and len(bad) < max_mismatches:
+                bad.append(((d, i, s, c), got1, want1))
+            n += 1
+    return VerifyReport(n, bad, time.perf_counter() - t0)
+
+def main(argv=None) -> None:
+    from questionnaire import get_items
+
+    p = argparse.ArgumentParser(description="Tabla precalculada de clasificación DISC.")
+    p.add_argument("--blend-ratio", type=float, default=0.90)
+    p.add_argument("--blend-abs", type=int, default=2)
+    p.add_argument("--load", metavar="ARCHIVO.npz", help="Usar una tabla guardada en vez de armarla.")
+    p.add_argument("--save", metavar="ARCHIVO.npz", help="Guardar la tabla.")
+    p.add_argument("--verify", action="store_true",
+                   help="Comparar exhaustivamente contra score_disc (respuestas reales).")
+    p.add_argument("--quick", action="store_true",
+                   help="Con --verify, comparar contra la etapa de ranking en vez de score_disc completo.")
+    args = p.parse_args(argv)
+
+    items = get_items()
+    t0 = time.perf_counter()
+    if args.load:
+        table = ClassificationTable.load(args.load)
+        table.check_params(args.blend_ratio, args.blend_abs)
+    else:
+        table = ClassificationTable.for_items(items, args.blend_ratio, args.blend_abs)
+    print(f"Tabla {table.width}^4 = {table.codes.size:,} celdas ({table.codes.nbytes / 1024:,.0f} KiB) "
+          f"en {time.perf_counter() - t0:.2f} s")
+    if args.save:
+        table.save(args.save)
+        print(f"Guardada en {args.save} ({os.path.getsize(args.save) / 1024:,.0f} KiB)")
+    if args.verify:
+        rep = verify(table, items, full=not args.quick)
+        print(f"Verificadas {rep.checked:,} combinaciones en {rep.seconds:.1f} s: "
+              + ("OK" if rep.ok else f"{len(rep.mismatches)} diferencias"))
+        for m in rep.mismatches:
+            print("  ", m)
+        if not rep.ok:
+            raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Normas poblacionales por dimensión (D/I/S/C) con actualización incremental.
+
+Por dimensión se guarda n, media y M2 (Welford) y un histograma exacto de los
+puntajes crudos: como cada dimensión es una suma de ítems Likert, los valores
+posibles son pocos (10..50 con 10 ítems) y el histograma es un sketch de
+cuantiles sin error. Todo es combinable (fórmula de Chan para media/M2, suma
+de histogramas), así que los bloques se pueden procesar en paralelo y unirse
+con merge(), y agregar las respuestas de un día cuesta O(filas nuevas).
+
+    norms = NormTable.for_items(get_items())
+    for raw in bloques:                 # (n, 4) crudos D/I/S/C
+        norms.update(raw)
+    norms.save("normas.json")
+    res = score_disc(items, answers, norms=NormTable.load("normas.json"))
+    res.pop_z, res.pop_pct
+"""
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from questionnaire import Item
+from scoring import DIMS, LIKERT_MAX, LIKERT_MIN
+
+FORMAT_VERSION = 1
+
+@dataclass
+class NormTable:
+    lo: int                              # puntaje crudo mínimo posible
+    hi: int                              # puntaje crudo máximo posible
+    n: int = 0
+    mean: np.ndarray = field(default_factory=lambda: np.zeros(4))   # (4,) float64
+    m2: np.ndarray = field(default_factory=lambda: np.zeros(4))     # (4,) suma de cuadrados centrada
+    hist: np.ndarray = None              # (4, hi - lo + 1) int64, conteo por puntaje crudo
+
+    def __post_init__(self):
+        if self.hist is None:
+            self.hist = np.zeros((4, self.hi - self.lo + 1), dtype=np.int64)
+
+    @classmethod
+    def for_items(cls, items: Sequence[Item]) -> "NormTable":
+        """Tabla vacía con el rango de puntajes del cuestionario (todas las dimensiones iguales)."""
+        counts = {d: sum(1 for it in items if it.dim == d) for d in DIMS}
+        if len(set(counts.values())) != 1:
+            raise ValueError(f"Las dimensiones tienen distinta cantidad de ítems: {counts}")
+        k = counts["D"]
+        return cls(lo=k * LIKERT_MIN, hi=k * LIKERT_MAX)
+
+    # -----------------------------
+    # Actualización
+    # -----------------------------
+    def update(self, raw) -> "NormTable":
+        """Agrega un bloque de crudos (N, 4) en orden D/I/S/C. O(N)."""
+        raw = np.asarray(raw, dtype=np.int64)
+        if raw.ndim != 2 or raw.shape[1] != 4:
+            raise ValueError(f"Se esperaba una matriz N×4, se recibió {raw.shape}")
+        if len(raw) == 0:
+            return self
+        if raw.min() < self.lo or raw.max() > self.hi:
+            raise ValueError(f"Puntaje crudo fuera de rango ({self.lo}..{self.hi})")
+        width = self.hi - self.lo + 1
+        hist = np.stack([np.bincount(raw[:, j] - self.lo, minlength=width) for j in range(4)])
+        mean = raw.mean(axis=0)
+        m2 = ((raw - mean) ** 2).sum(axis=0)
+        self._combine(len(raw), mean, m2, hist)
+        return self
+
+    def update_one(self, raw: Dict[str, int]) -> "NormTable":
+        return self.update([[raw[d] for d in DIMS]])
+
+    def merge(self, other: "NormTable") -> "NormTable":
+        """Une otra tabla (p. ej. de otro bloque o proceso) en esta."""
+        if (other.lo, other.hi) != (self.lo, self.hi):
+            raise ValueError("Las normas tienen distinto rango de puntajes")
+        if other.n:
+            self._combine(other.n, other.mean, other.m2, other.hist)
+        return self
+
+    def _combine(self, n_b: int, mean_b: np.ndarray, m2_b: np.ndarray, hist_b: np.ndarray) -> None:
+        # Chan et al.: combinación de (n, media, M2) de dos particiones
+        n_a = self.n
+        n = n_a + n_b
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * (n_b / n)
+        self.m2 = self.m2 + m2_b + delta ** 2 * (n_a * n_b / n)
+        self.hist = self.hist + hist_b
+        self.n = n
+
+    # -----------------------------
+    # Consultas
+    # -----------------------------
+    @property
+    def variance(self) -> np.ndarray:
+        """Varianza poblacional (4,)."""
+        return self.m2 / self.n if self.n else np.zeros(4)
+
+    @property
+    def sd(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def _require_data(self) -> None:
+        if self.n == 0:
+            raise ValueError("Las normas están vacías")
+
+    def z(self, raw) -> np.ndarray:
+        """z poblacional de crudos (N, 4); sd 0 se trata como 1 (igual que score_disc)."""
+        self._require_data()
+        sd = self.sd
+        return (np.asarray(raw, dtype=np.float64) - self.mean) / np.where(sd > 0, sd, 1.0)
+
+    def percentile(self, raw) -> np.ndarray:
+        """Percentil de rango medio (0-100) de crudos (N, 4) según el histograma."""
+        self._require_data()
+        cum = np.cumsum(self.hist, axis=1)
+        # % por debajo + la mitad de los empates, por dimensión y puntaje
+        table = (cum - self.hist / 2.0) / self.n * 100.0
+        idx = np.clip(np.asarray(raw, dtype=np.int64) - self.lo, 0, self.hi - self.lo)
+        return table[np.arange(4), idx]
+
+    def quantile(self, q: float) -> np.ndarray:
+        """Puntaje crudo del cuantil q (0..1) por dimensión (4,)."""
+        self._require_data()
+        cum = np.cumsum(self.hist, axis=1)
+        target = max(1, int(np.ceil(q * self.n)))
+        return np.array([int(np.searchsorted(cum[j], target)) + self.lo for j in range(4)])
+
+    def describe(self) -> Dict[str, Dict[str, float]]:
+        """Resumen por dimensión: n, media, sd, p10, p50, p90."""
+        qs = {p: self.quantile(p / 100) for p in (10, 50, 90)} if self.n else {}
+        return {
+            d: {"n": self.n, "mean": float(self.mean[j]), "sd": float(self.sd[j]),
+                **{f"p{p}": int(v[j]) for p, v in qs.items()}}
+            for j, d in enumerate(DIMS)
+        }
+
+    def population_fields(self, raw: Dict[str, int]) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """(pop_z, pop_pct) de una persona, como dicts D/I/S/C."""
+        row = [[raw[d] for d in DIMS]]
+        z = self.z(row)[0].tolist()
+        pct = self.percentile(row)[0].tolist()
+        return dict(zip(DIMS, z)), dict(zip(DIMS, pct))
+
+    # -----------------------------
+    # Persistencia (JSON)
+    # -----------------------------
+    def to_dict(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "lo": self.lo, "hi": self.hi, "n": self.n,
+            "mean": self.mean.tolist(), "m2": self.m2.tolist(),
+            "hist": {d: self.hist[j].tolist() for j, d in enumerate(DIMS)},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NormTable":
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Versión de normas no soportada: {data.get('version')}")
+        return cls(
+            lo=data["lo"], hi=data["hi"], n=data["n"],
+            mean=np.array(data["mean"], dtype=np.float64),
+            m2=np.array(data["m2"], dtype=np.float64),
+            hist=np.array([data["hist"][d] for d in DIMS], dtype=np.int64),
+        )
+
+    def save(self, path: str) -> None:
+        # Escritura atómica: un lector concurrente nunca ve el JSON a medias
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=".tmp_")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NormTable":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def load_or_new(cls, path: str, items: Sequence[Item]) -> "NormTable":
+        if os.path.exists(path):
+            return cls.load(path)
+        return cls.for_items(items)
+
+def merge_all(tables: List[NormTable]) -> NormTable:
+    """Une las normas de varios bloques/procesos en una tabla nueva."""
+    if not tables:
+        raise ValueError("No hay normas para unir")
+    out = NormTable(lo=tables[0].lo, hi=tables[0].hi)
+    for t in tables:
+        out.merge(t)
+    return out
@@ -0,0 +1,218 @@
+"""
+Índice de perfiles más parecidos (k vecinos, radio) sobre los vectores 4-D
+pct o z (D/I/S/C) que produce score_disc.
+
+Usa un KD-tree de SciPy (cKDTree), que no admite inserciones: los perfiles
+nuevos van a un buffer que se recorre por fuerza bruta (es chico) y el árbol
+se reconstruye cuando el buffer supera una fracción del total. Así insertar
+es O(1) amortizado y una consulta es O(log N + buffer). Volver a agregar un id
+lo reemplaza: la fila anterior queda marcada (las consultas la descartan) y se
+elimina en la siguiente reconstrucción; como cada reemplazo entra al buffer,
+las filas marcadas nunca superan el umbral que dispara la reconstrucción.
+
+    idx = ProfileIndex(space="pct")
+    idx.add_batch(ids, batch_result.pct)
+    idx.add("ana", res)                       # DiscResult
+    idx.knn(res, k=5)                         # [(id, distancia)]
+    idx.radius(res, 3.0)
+    idx.complementary([r1, r2, r3], k=5)      # perfiles que equilibran un equipo
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from scoring import DIMS, DiscBatchResult, DiscResult
+
+SPACES = ("pct", "z")
+# Perfil perfectamente balanceado en cada espacio: 25% por dimensión o z = 0
+BALANCED = {"pct": 25.0, "z": 0.0}
+
+Query = Union[DiscResult, Dict[str, float], Sequence[float], np.ndarray]
+
+class ProfileIndex:
+    def __init__(self, space: str = "pct", rebuild_fraction: float = 0.1, min_rebuild: int = 1024):
+        if space not in SPACES:
+            raise ValueError(f"Espacio no soportado: {space} (usar {', '.join(SPACES)})")
+        self.space = space
+        self.rebuild_fraction = rebuild_fraction
+        self.min_rebuild = min_rebuild
+        self._ids: List[str] = []                 # ids del árbol y luego del buffer
+        self._pos: Dict[str, int] = {}            # id -> posición (el último agregado gana)
+        self._dead: Set[int] = set()              # posiciones reemplazadas por un add posterior
+        self._points = np.empty((0, 4))           # puntos indexados en el árbol
+        self._tree: Optional[cKDTree] = None
+        self._buffer: List[np.ndarray] = []       # bloques (n, 4) aún no indexados
+        self._buffer_n = 0
+        self._buffer_cache: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._ids) - len(self._dead)
+
+    # -----------------------------
+    # Inserción
+    # -----------------------------
+    def vector(self, q: Query) -> np.ndarray:
+        """DiscResult, dict D/I/S/C o secuencia de 4 -> vector (4,) del espacio del índice."""
+        if isinstance(q, DiscResult):
+            q = getattr(q, self.space)
+        if isinstance(q, dict):
+            q = [q[d] for d in DIMS]
+        v = np.asarray(q, dtype=np.float64)
+        if v.shape != (4,):
+            raise ValueError(f"Se esperaba un perfil de 4 dimensiones, se recibió {v.shape}")
+        return v
+
+    def add(self, profile_id: str, profile: Query) -> None:
+        v = self.vector(profile)
+        self._append_ids([profile_id])
+        self._push(v[None, :])
+
+    def add_batch(self, ids: Sequence[str], vectors) -> None:
+        """ids (N,) y vectores (N, 4) (p. ej. DiscBatchResult.pct)."""
+        vectors = np.asarray(vectors, dtype=np.float64).reshape(-1, 4)
+        if len(ids) != len(vectors):
+            raise ValueError("ids y vectores tienen distinta longitud")
+        self._append_ids(ids)
+        self._push(vectors)
+
+    def add_results(self, ids: Sequence[str], res: DiscBatchResult) -> None:
+        self.add_batch(ids, getattr(res, self.space))
+
+    def _append_ids(self, ids: Iterable[str]) -> None:
+        for pid in ids:
+            pid = str(pid)
+            old = self._pos.get(pid)
+            if old is not None:
+                self._dead.add(old)
+            self._pos[pid] = len(self._ids)
+            self._ids.append(pid)
+
+    def _push(self, block: np.ndarray) -> None:
+        self._buffer.append(block)
+        self._buffer_n += len(block)
+        self._buffer_cache = None
+        if self._buffer_n >= max(self.min_rebuild, self.rebuild_fraction * len(self._points)):
+            self.rebuild()
+
+    def rebuild(self) -> None:
+        """Pasa el buffer al árbol y descarta las filas reemplazadas (O(N log N))."""
+        if self._buffer_n:
+            self._points = np.vstack([self._points, self._buffer_points()])
+            self._buffer, self._buffer_n, self._buffer_cache = [], 0, None
+        if self._dead:
+            keep = np.ones(len(self._ids), dtype=bool)
+            keep[list(self._dead)] = False
+            self._points = self._points[keep]
+            self._ids = [pid for pid, kp in zip(self._ids, keep.tolist()) if kp]
+            self._pos = {pid: j for j, pid in enumerate(self._ids)}
+            self._dead = set()
+        self._tree = cKDTree(self._points) if len(self._points) else None
+
+    def _buffer_points(self) -> np.ndarray:
+        if self._buffer_cache is None:
+            self._buffer_cache = (np.vstack(self._buffer) if self._buffer else np.empty((0, 4)))
+        return self._buffer_cache
+
+    # -----------------------------
+    # Consultas
+    # -----------------------------
+    def knn(self, q: Query, k: int = 5) -> List[Tuple[str, float]]:
+        """Los k perfiles más cercanos (distancia euclídea), de menor a mayor."""
+        ids, dist = self.knn_batch(self.vector(q)[None, :], k)
+        return list(zip(ids[0], dist[0].tolist()))
+
+    def knn_batch(self, queries, k: int = 5) -> Tuple[List[List[str]], np.ndarray]:
+        """queries (M, 4) -> (ids por consulta, distancias (M, k')) con k' = min(k, len)."""
+        q = np.asarray(queries, dtype=np.float64).reshape(-1, 4)
+        k = min(k, len(self))
+        if k == 0:
+            return [[] for _ in range(len(q))], np.empty((len(q), 0))
+        # Las filas reemplazadas se descartan después de la consulta. Si una fuente
+        # (árbol o buffer) devolvió solo una parte y le quedan menos de k vivas, se
+        # repite con el doble de candidatos (hasta tenerla completa)
+        kc = k
+        while True:
+            cands = self._candidates(q, kc)
+            if self._dead:
+                dead = self._dead_positions()
+                cands = [(np.where(np.isin(i, dead), np.inf, d), i, full) for d, i, full in cands]
+            if all(full or np.isfinite(d).sum(axis=1).min() >= k for d, _, full in cands):
+                break
+            kc *= 2
+        d = np.hstack([c[0] for c in cands])
+        i = np.hstack([c[1] for c in cands])
+        order = np.argsort(d, axis=1, kind="stable")[:, :k]
+        rows = np.arange(len(q))[:, None]
+        d, i = d[rows, order], i[rows, order]
+        return [[self._ids[j] for j in row] for row in i.tolist()], d
+
+    def _candidates(self, q: np.ndarray, kc: int) -> List[Tuple[np.ndarray, np.ndarray, bool]]:
+        """
+        Hasta kc candidatos del árbol y kc del buffer por consulta:
+        [(distancias, posiciones, si la fuente entró completa)], sin ordenar.
+        """
+        n_tree = len(self._points)
+        cands = []
+        if self._tree is not None:
+            kt = min(kc, n_tree)
+            d, i = self._tree.query(q, k=kt)
+            cands.append((d.reshape(len(q), kt), i.reshape(len(q), kt), kt == n_tree))
+        if self._buffer_n:
+            buf = self._buffer_points()
+            d = np.sqrt(((q[:, None, :] - buf[None, :, :]) ** 2).sum(axis=2))
+            i = np.broadcast_to(np.arange(n_tree, n_tree + len(buf)), d.shape)
+            full = len(buf) <= kc
+            if not full:
+                # solo los kc mejores del buffer compiten con los del árbol
+                part = np.argpartition(d, kc - 1, axis=1)[:, :kc]
+                rows = np.arange(len(q))[:, None]
+                d, i = d[rows, part], i[rows, part]
+            cands.append((d, i, full))
+        return cands
+
+    def radius(self, q: Query, r: float) -> List[Tuple[str, float]]:
+        """Todos los perfiles a distancia <= r, de menor a mayor."""
+        v = self.vector(q)
+        idx, dist = [], []
+        if self._tree is not None:
+            hit = np.array(self._tree.query_ball_point(v, r), dtype=np.int64)
+            idx.append(hit)
+            dist.append(np.sqrt(((self._points[hit] - v) ** 2).sum(axis=1)))
+        if self._buffer_n:
+            d = np.sqrt(((self._buffer_points() - v) ** 2).sum(axis=1))
+            hit = np.flatnonzero(d <= r)
+            idx.append(hit + len(self._points))
+            dist.append(d[hit])
+        if not idx:
+            return []
+        idx, dist = np.concatenate(idx), np.concatenate(dist)
+        if self._dead:
+            alive = ~np.isin(idx, self._dead_positions())
+            idx, dist = idx[alive], dist[alive]
+        order = np.argsort(dist, kind="stable")
+        return [(self._ids[i], d) for i, d in zip(idx[order].tolist(), dist[order].tolist())]
+
+    def complementary(self, team: Iterable[Query], k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Perfiles que equilibran un equipo: vecinos del reflejo del perfil medio
+        del equipo respecto del perfil balanceado (lo que al equipo le sobra, al
+        candidato le falta). Excluye ids que ya están en el equipo si se pasan como str.
+        """
+        members = list(team)
+        team_ids = {m for m in members if isinstance(m, str)}
+        vecs = [self._vector_by_id(m) if isinstance(m, str) else self.vector(m) for m in members]
+        if not vecs:
+            raise ValueError("El equipo está vacío")
+        center = BALANCED[self.space]
+        target = 2 * center - np.mean(vecs, axis=0)
+        out = self.knn(target, k + len(team_ids))
+        return [(i, d) for i, d in out if i not in team_ids][:k]
+
+    def _dead_positions(self) -> np.ndarray:
+        return np.fromiter(self._dead, dtype=np.int64, count=len(self._dead))
+
+    def _vector_by_id(self, profile_id: str) -> np.ndarray:
+        j = self._pos[profile_id]
+        n_tree = len(self._points)
+        return self._points[j] if j < n_tree else self._buffer_points()[j - n_tree]
@@ -1,19 +1,47 @@
 # report_pdf.py
-from typing import List
+from typing import Dict, List, Optional, Set, Tuple
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import cm
 
+from instrumentation import instrumented
 from interpretation import DIM_NAMES, STRENGTHS, DEVELOP, blend_insights
 
+@instrumented("report_pdf.build_pdf")
 def build_pdf(out_pdf: str,
               person_name: str,
               role: str,
               raw: dict, pct: dict, z: dict,
               primary: str, secondary: List[str],
               validity_score: int, notes: List[str],
-              img_bar: str, img_radar: str, img_quad: str) -> None:
+              img_bar: Optional[str] = None, img_radar: Optional[str] = None,
+              img_quad: Optional[str] = None,
+              vector: bool = False) -> None:
+    """
+    vector=False: inserta los PNG img_bar/img_radar/img_quad.
+    vector=True: dibuja los gráficos como vectores (vector_charts) y no usa PNG.
+    """
     c = canvas.Canvas(out_pdf, pagesize=A4)
+    draw_report(c, person_name, role, raw, pct, z, primary, secondary, validity_score, notes,
+                img_bar, img_radar, img_quad, vector)
+    c.showPage()
+    c.save()
+
+def draw_report(c: canvas.Canvas,
+                person_name: str,
+                role: str,
+                raw: dict, pct: dict, z: dict,
+                primary: str, secondary: List[str],
+                validity_score: int, notes: List[str],
+                img_bar: Optional[str] = None, img_radar: Optional[str] = None,
+                img_quad: Optional[str] = None,
+                vector: bool = False,
+                forms: Optional[Set[str]] = None) -> None:
+    """
+    Dibuja el informe de una persona en la página actual de `c` (sin showPage).
+    forms: con vector=True, nombres de Form XObject ya definidos en el documento;
+           los gráficos se definen una vez por perfil crudo y se reutilizan (ver binder.py).
+    """
     width, height = A4
     y = height - 2*cm
 
@@ -41,10 +69,18 @@ def build_pdf(out_pdf: str,
 
     # Images
     y -= 0.4*cm
-    c.drawImage(img_bar, 2*cm, y-6*cm, width=16*cm, height=5.5*cm, preserveAspectRatio=True, anchor='nw')
-    y -= 6.3*cm
-    c.drawImage(img_radar, 2*cm, y-6*cm, width=8*cm, height=5.5*cm, preserveAspectRatio=True, anchor='nw')
-    c.drawImage(img_quad, 10*cm, y-6*cm, width=8*cm, height=5.5*cm, preserveAspectRatio=True, anchor='nw')
+    if vector:
+        from vector_charts import bar_drawing, radar_drawing, quadrant_drawing
+        bar_name, radar_name, quad_name = chart_form_names(raw)
+        _place(c, forms, bar_name, lambda: bar_drawing(raw, width=16*cm, height=5.5*cm), 2*cm, y-5.5*cm)
+        y -= 6.3*cm
+        _place(c, forms, radar_name, lambda: radar_drawing(pct, width=8*cm, height=5.5*cm), 2*cm, y-5.5*cm)
+        _place(c, forms, quad_name, lambda: quadrant_drawing(z, width=8*cm, height=5.5*cm), 10*cm, y-5.5*cm)
+    else:
+        c.drawImage(img_bar, 2*cm, y-6*cm, width=16*cm, height=5.5*cm, preserveAspectRatio=True, anchor='nw')
+        y -= 6.3*cm
+        c.drawImage(img_radar, 2*cm, y-6*cm, width=8*cm, height=5.5*cm, preserveAspectRatio=True, anchor='nw')
+        c.drawImage(img_quad, 10*cm, y-6*cm, width=8*cm, height=5.5*cm, preserveAspectRatio=True, anchor='nw')
     y -= 6.3*cm
 
     # Strengths & Development
@@ -62,5 +98,24 @@ def build_pdf(out_pdf: str,
     for bi in blend_insights(primary, secondary):
         line(f"• {bi}", size=10, dy=0.55*cm)
 
-    c.showPage()
-    c.save()
+def chart_form_names(raw: Dict[str, int]) -> Tuple[str, str, str]:
+    """Nombres de Form XObject de barras, radar y cuadrante: dependen solo de los crudos (pct y z derivan de ellos)."""
+    key = "_".join(str(raw[d]) for d in ("D", "I", "S", "C"))
+    return f"bar_{key}", f"radar_{key}", f"quad_{key}"
+
+def _place(c: canvas.Canvas, forms: Optional[Set[str]], name: str, make_drawing, x: float, y: float) -> None:
+    """Dibuja make_drawing() en (x, y); con `forms`, como Form XObject compartido por nombre."""
+    from reportlab.graphics import renderPDF
+    if forms is None:
+        renderPDF.draw(make_drawing(), c, x, y)
+        return
+    if name not in forms:
+        dr = make_drawing()
+        c.beginForm(name, 0, 0, dr.width, dr.height)
+        renderPDF.draw(dr, c, 0, 0)
+        c.endForm()
+        forms.add(name)
+    c.saveState()
+    c.translate(x, y)
+    c.doForm(name)
+    c.restoreState()
@@ -0,0 +1,144 @@
+"""
+Codificación compacta de respuestas y almacén append-only con memory-map.
+
+Cada respuesta Likert 1..5 se guarda como (x - 1) en 3 bits, en el orden de
+los ítems del cuestionario: 46 ítems -> 138 bits -> 18 bytes por persona.
+
+Formato del archivo: cabecera fija de 64 bytes (magic, versión, n_items,
+bytes por registro, hash de los ids de ítem) seguida de registros de
+record_size bytes. Leer es un np.memmap sobre los registros, sin copias.
+"""
+import hashlib
+import os
+import struct
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+from questionnaire import Item
+from scoring import LIKERT_MAX, LIKERT_MIN
+
+BITS = 3
+MAGIC = b"DISCRS\x00\x01"
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8sHH16s")   # magic, n_items, record_size, hash de ids
+
+def record_size(n_items: int) -> int:
+    return (n_items * BITS + 7) // 8
+
+# -----------------------------
+# Codec
+# -----------------------------
+def pack_answers(answers_matrix) -> np.ndarray:
+    """(N, n_items) respuestas 1..5 -> (N, record_size) uint8."""
+    x = np.asarray(answers_matrix)
+    if x.ndim != 2:
+        raise ValueError(f"Se esperaba una matriz N×n_items, se recibió {x.shape}")
+    if ((x < LIKERT_MIN) | (x > LIKERT_MAX)).any():
+        raise ValueError("Respuesta fuera de rango (1..5)")
+    codes = (x - LIKERT_MIN).astype(np.uint8)
+    # bits más significativos primero: (N, n_items, 3) -> (N, n_items*3)
+    bits = (codes[:, :, None] >> np.array([2, 1, 0], dtype=np.uint8)) & 1
+    return np.packbits(bits.reshape(len(x), -1), axis=1)
+
+def unpack_answers(packed, n_items: int) -> np.ndarray:
+    """(N, record_size) uint8 -> (N, n_items) int8 con respuestas 1..5."""
+    packed = np.asarray(packed, dtype=np.uint8)
+    bits = np.unpackbits(packed, axis=1, count=n_items * BITS)
+    bits = bits.reshape(len(packed), n_items, BITS)
+    codes = (bits[:, :, 0] << 2) | (bits[:, :, 1] << 1) | bits[:, :, 2]
+    return codes.astype(np.int8) + LIKERT_MIN
+
+def pack_one(items: Sequence[Item], answers: Dict[str, int]) -> bytes:
+    """Dict {item_id: 1..5} -> registro empaquetado (18 bytes para 46 ítems)."""
+    row = np.array([[answers[it.id] for it in items]])
+    return pack_answers(row)[0].tobytes()
+
+def unpack_one(items: Sequence[Item], packed: bytes) -> Dict[str, int]:
+    row = unpack_answers(np.frombuffer(packed, dtype=np.uint8)[None, :], len(items))[0]
+    return {it.id: int(v) for it, v in zip(items, row)}
+
+def items_hash(items: Sequence[Item]) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for it in items:
+        h.update(f"{it.id}:{it.dim}:{int(it.reverse)};".encode("utf-8"))
+    return h.digest()
+
+# -----------------------------
+# Almacén en archivo
+# -----------------------------
+class ResponseStore:
+    """
+    Archivo append-only de respuestas empaquetadas.
+
+        store = ResponseStore("respuestas.discr", get_items())
+        store.append(matrix)               # (N, 46)
+        for chunk in store.iter_chunks():  # (n, 46) int8, listo para score_disc_batch
+            ...
+    """
+    def __init__(self, path: str, items: Sequence[Item]):
+        self.path = path
+        self.items = list(items)
+        self.n_items = len(self.items)
+        self.record_size = record_size(self.n_items)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._check_header()
+        else:
+            with open(path, "wb") as f:
+                f.write(self._header())
+
+    def _header(self) -> bytes:
+        head = _HEADER.pack(MAGIC, self.n_items, self.record_size, items_hash(self.items))
+        return head.ljust(HEADER_SIZE, b"\x00")
+
+    def _check_header(self) -> None:
+        with open(self.path, "rb") as f:
+            head = f.read(HEADER_SIZE)
+        if len(head) < HEADER_SIZE:
+            raise ValueError(f"{self.path}: cabecera incompleta")
+        magic, n_items, rs, ihash = _HEADER.unpack_from(head)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: no es un almacén de respuestas DISC")
+        if n_items != self.n_items or rs != self.record_size or ihash != items_hash(self.items):
+            raise ValueError(f"{self.path}: creado con otra versión del cuestionario")
+
+    def __len__(self) -> int:
+        return (os.path.getsize(self.path) - HEADER_SIZE) // self.record_size
+
+    def append(self, answers_matrix) -> int:
+        """Agrega N filas; devuelve el índice de la primera."""
+        packed = pack_answers(answers_matrix)
+        with open(self.path, "ab") as f:
+            # Un registro a medias (escritura interrumpida) se descarta
+            end = f.seek(0, os.SEEK_END)
+            tail = (end - HEADER_SIZE) % self.record_size
+            if tail:
+                f.truncate(end - tail)
+                f.seek(0, os.SEEK_END)
+            start = (f.tell() - HEADER_SIZE) // self.record_size
+            f.write(packed.tobytes())
+        return start
+
+    def append_one(self, answers: Dict[str, int]) -> int:
+        return self.append(np.array([[answers[it.id] for it in self.items]]))
+
+    def packed(self) -> np.ndarray:
+        """Vista memory-mapped (N, record_size) uint8, sin copiar."""
+        n = len(self)
+        if n == 0:
+            return np.empty((0, self.record_size), dtype=np.uint8)
+        return np.memmap(self.path, dtype=np.uint8, mode="r", offset=HEADER_SIZE,
+                         shape=(n, self.record_size))
+
+    def read(self, start: int = 0, stop: int = None) -> np.ndarray:
+        """Filas [start, stop) desempaquetadas: (n, n_items) int8."""
+        return unpack_answers(self.packed()[start:stop], self.n_items)
+
+    def iter_chunks(self, chunk_size: int = 100_000) -> Iterator[np.ndarray]:
+        view = self.packed()
+        for start in range(0, len(view), chunk_size):
+            yield unpack_answers(view[start:start + chunk_size], self.n_items)
+
+    def answers_dicts(self, start: int = 0, stop: int = None) -> List[Dict[str, int]]:
+        ids = [it.id for it in self.items]
+        return [dict(zip(ids, row)) for row in self.read(start, stop).tolist()]
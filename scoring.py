@@ -1,7 +1,14 @@
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+from instrumentation import instrumented
 from questionnaire import Item
 
+if TYPE_CHECKING:
+    import numpy as np  # el scoring escalar no necesita NumPy; se importa al usar lotes
+    from lookup import ClassificationTable
+    from norms import NormTable
+
 LIKERT_MIN, LIKERT_MAX = 1, 5
 
 def reverse_score(x: int) -> int:
@@ -18,35 +25,146 @@ class DiscResult:
     validity_flag: bool
     validity_score: int
     notes: List[str]
+    pop_z: Optional[Dict[str, float]] = None     # z contra normas poblacionales (si se pasan)
+    pop_pct: Optional[Dict[str, float]] = None   # percentil poblacional 0-100 (si se pasan)
+
+# -----------------------------
+# Plan de scoring compilado
+# -----------------------------
+DIMS = ["D", "I", "S", "C"]
+_SLOTS = {"D": 0, "I": 1, "S": 2, "C": 3, "V": 4}  # -1 = dimensión ignorada
+
+@dataclass(frozen=True, eq=False)
+class ScoringPlan:
+    """
+    Forma compilada de una lista de Item: el scoring queda como
+    sums = answers @ weights + offset, con columnas D/I/S/C/V.
+    Los ítems inversos tienen peso -1 y aportan (LIKERT_MAX + LIKERT_MIN) al offset.
+    Las matrices se arman la primera vez que se usan (el camino escalar solo usa columns).
+    """
+    item_ids: Tuple[str, ...]                   # orden de columnas
+    columns: Tuple[Tuple[str, int, bool], ...]  # (id, slot, reverse) para el camino escalar
+
+    def sums(self, answers: Dict[str, int]) -> Tuple[Dict[str, int], int]:
+        """answers: dict {item_id: 1..5} -> (raw D/I/S/C, suma de validez)."""
+        acc = [0, 0, 0, 0, 0]
+        for item_id, slot, rev in self.columns:
+            if item_id not in answers:
+                raise ValueError(f"Falta respuesta para {item_id}")
+            x = answers[item_id]
+            if not (LIKERT_MIN <= x <= LIKERT_MAX):
+                raise ValueError(f"Respuesta fuera de rango en {item_id}: {x}")
+            if rev:
+                x = reverse_score(x)
+            if slot >= 0:
+                acc[slot] += x
+        return dict(zip(DIMS, acc[:4])), acc[4]
+
+    @cached_property
+    def weights(self) -> "np.ndarray":
+        """(n_items, 5) float64: 1, -1 (inverso) o 0."""
+        import numpy as np
+        w = np.zeros((len(self.columns), 5), dtype=np.float64)
+        for i, (_, slot, rev) in enumerate(self.columns):
+            if slot >= 0:
+                w[i, slot] = -1 if rev else 1
+        w.setflags(write=False)
+        return w
+
+    @cached_property
+    def offset(self) -> "np.ndarray":
+        """(5,) int: aporte constante de los ítems inversos."""
+        import numpy as np
+        off = np.zeros(5, dtype=np.int64)
+        for _, slot, rev in self.columns:
+            if slot >= 0 and rev:
+                off[slot] += LIKERT_MAX + LIKERT_MIN
+        off.setflags(write=False)
+        return off
+
+    @cached_property
+    def reverse_mask(self) -> "np.ndarray":
+        import numpy as np
+        return np.array([rev for _, _, rev in self.columns], dtype=bool)
 
+    @cached_property
+    def validity_mask(self) -> "np.ndarray":
+        import numpy as np
+        return np.array([slot == _SLOTS["V"] for _, slot, _ in self.columns], dtype=bool)
+
+    def sums_matrix(self, answers_matrix) -> "np.ndarray":
+        """answers_matrix: (N, n_items) -> (N, 5) sumas D/I/S/C/V."""
+        import numpy as np
+        x = np.asarray(answers_matrix)
+        if x.ndim != 2 or x.shape[1] != len(self.item_ids):
+            raise ValueError(f"Se esperaba una matriz N×{len(self.item_ids)}, se recibió {x.shape}")
+        if x.dtype.kind not in "iuf":
+            x = x.astype(np.float64)
+        bad = (x < LIKERT_MIN) | (x > LIKERT_MAX)
+        if x.dtype.kind == "f":
+            # NaN pasa cualquier comparación de rango y astype(int64) trunca 3.5
+            bad |= ~np.isfinite(x) | (x != np.rint(x))
+        if bad.any():
+            r, c = np.argwhere(bad)[0]
+            raise ValueError(f"Respuesta fuera de rango o no entera en {self.item_ids[c]} (fila {r}): {x[r, c]}")
+        # float64 usa BLAS y es exacto para estas magnitudes
+        return (x.astype(np.float64) @ self.weights).astype(np.int64) + self.offset
+
+@lru_cache(maxsize=8)
+def _compile_plan(items: Tuple[Item, ...]) -> ScoringPlan:
+    return ScoringPlan(
+        item_ids=tuple(it.id for it in items),
+        columns=tuple((it.id, _SLOTS.get(it.dim, -1), it.reverse) for it in items),
+    )
+
+_last_plan: Tuple[Tuple[Item, ...], Optional[ScoringPlan]] = ((), None)
+
+def get_scoring_plan(items: Sequence[Item]) -> ScoringPlan:
+    """
+    Plan compilado para items. Se cachea por contenido del cuestionario
+    (ids, textos, dimensiones y flags inversos), así que cambiar la versión
+    del cuestionario genera un plan nuevo.
+    """
+    global _last_plan
+    # Camino rápido: mismos objetos Item (inmutables) que la última llamada, sin hashear
+    snap, plan = _last_plan
+    if plan is not None and len(snap) == len(items) and all(a is b for a, b in zip(snap, items)):
+        return plan
+    snap = tuple(items)
+    plan = _compile_plan(snap)
+    _last_plan = (snap, plan)
+    return plan
+
+@instrumented("scoring.score_disc")
 def score_disc(items: List[Item], answers: Dict[str, int],
                blend_ratio: float = 0.90,
                blend_abs: int = 2,
-               validity_threshold: int = 24) -> DiscResult:
+               validity_threshold: int = 24,
+               plan: Optional[ScoringPlan] = None,
+               norms: Optional["NormTable"] = None,
+               lookup: Optional["ClassificationTable"] = None) -> DiscResult:
     """
     answers: dict {item_id: 1..5}
     validity_threshold: sum of V items above this => possible social desirability.
                         6 items * max 5 = 30. threshold 24 is “muy alto”.
+    plan: plan compilado de items; si no se pasa se toma de get_scoring_plan.
+    norms: normas poblacionales (norms.NormTable); si se pasan se completan pop_z y pop_pct.
+    lookup: tabla precalculada (lookup.ClassificationTable) con el mismo blend_ratio/blend_abs;
+            clasifica con un acceso en vez de ordenar.
     """
-    dims = ["D", "I", "S", "C"]
-    raw = {d: 0 for d in dims}
-    validity = 0
-    notes = []
-
-    for it in items:
-        if it.id not in answers:
-            raise ValueError(f"Falta respuesta para {it.id}")
-        x = answers[it.id]
-        if not (LIKERT_MIN <= x <= LIKERT_MAX):
-            raise ValueError(f"Respuesta fuera de rango en {it.id}: {x}")
-        if it.reverse:
-            x = reverse_score(x)
-
-        if it.dim in raw:
-            raw[it.dim] += x
-        elif it.dim == "V":
-            validity += x
+    if plan is None:
+        plan = get_scoring_plan(items)
+    raw, validity = plan.sums(answers)
+    return score_sums(raw, validity, blend_ratio, blend_abs, validity_threshold, norms, lookup)
 
+def score_sums(raw: Dict[str, int], validity: int,
+               blend_ratio: float = 0.90,
+               blend_abs: int = 2,
+               validity_threshold: int = 24,
+               norms: Optional["NormTable"] = None,
+               lookup: Optional["ClassificationTable"] = None) -> DiscResult:
+    """Igual que score_disc, partiendo de sumas ya calculadas (p. ej. de un ScoreAccumulator)."""
+    dims = ["D", "I", "S", "C"]
     total = sum(raw.values())
     pct = {d: (raw[d] / total * 100.0) if total else 0.0 for d in dims}
 
@@ -56,7 +174,28 @@ def score_disc(items: List[Item], answers: Dict[str, int],
     sd = var ** 0.5 if var > 0 else 1.0
     z = {d: (raw[d] - mean) / sd for d in dims}
 
-    # Ranking
+    if lookup is None:
+        primary, secondary, undifferentiated = _rank(raw, blend_ratio, blend_abs)
+    else:
+        lookup.check_params(blend_ratio, blend_abs)
+        primary, secondary, undifferentiated = lookup.classify(raw)
+
+    validity_flag = validity >= validity_threshold
+    notes = _build_notes(primary, secondary, undifferentiated, validity_flag)
+
+    pop_z = pop_pct = None
+    if norms is not None:
+        pop_z, pop_pct = norms.population_fields(raw)
+
+    return DiscResult(
+        raw=raw, pct=pct, z=z,
+        primary=primary, secondary=secondary,
+        validity_flag=validity_flag, validity_score=validity,
+        notes=notes, pop_z=pop_z, pop_pct=pop_pct
+    )
+
+def _rank(raw: Dict[str, int], blend_ratio: float, blend_abs: int) -> Tuple[str, List[str], bool]:
+    """(primary, secondary, poco diferenciado) a partir de los crudos D/I/S/C."""
     ranked: List[Tuple[str, int]] = sorted(raw.items(), key=lambda kv: kv[1], reverse=True)
     primary = ranked[0][0]
     top_score = ranked[0][1]
@@ -68,10 +207,14 @@ def score_disc(items: List[Item], answers: Dict[str, int],
 
     # Si todo queda muy parejo, avisar
     spread = ranked[0][1] - ranked[-1][1]
-    if spread <= 3:
+    return primary, secondary, spread <= 3
+
+def _build_notes(primary: str, secondary: List[str],
+                 undifferentiated: bool, validity_flag: bool) -> List[str]:
+    notes = []
+    if undifferentiated:
         notes.append("Perfil poco diferenciado: puntajes muy cercanos entre dimensiones (posible estilo balanceado o respuestas neutras).")
 
-    validity_flag = validity >= validity_threshold
     if validity_flag:
         notes.append("Alerta de validez: patrón de respuestas 'demasiado perfecto' (posible deseabilidad social).")
 
@@ -81,10 +224,224 @@ def score_disc(items: List[Item], answers: Dict[str, int],
     else:
         combo = "-".join([primary] + secondary)
         notes.append(f"Estilo combinado (blend): {combo}.")
+    return notes
 
-    return DiscResult(
+# -----------------------------
+# Acumulador incremental
+# -----------------------------
+NEUTRAL = (LIKERT_MIN + LIKERT_MAX) // 2   # valor para ítems sin responder
+
+class ScoreAccumulator:
+    """
+    Sumas D/I/S/C/V que se actualizan en O(1) por respuesta, nueva o corregida
+    (p. ej. al volver atrás): set() resta el aporte anterior y suma el nuevo.
+    Permite ver un perfil parcial sin recalcular todo y puntuar al final sin
+    rearmar el dict de respuestas.
+    """
+
+    def __init__(self, items: Sequence[Item], plan: Optional[ScoringPlan] = None):
+        plan = plan or get_scoring_plan(items)
+        self._col = {item_id: (slot, rev) for item_id, slot, rev in plan.columns}
+        self.answers: Dict[str, int] = {}
+        self.sums = [0] * 5          # D/I/S/C/V con inversos ya invertidos
+        self.answered = [0] * 5      # ítems respondidos por dimensión
+        self.size = [0] * 5          # ítems por dimensión
+        for _, slot, _ in plan.columns:
+            if slot >= 0:
+                self.size[slot] += 1
+
+    def set(self, item_id: str, value: int) -> bool:
+        """Registra o corrige una respuesta; devuelve False si no cambió nada."""
+        if item_id not in self._col:
+            raise ValueError(f"Ítem desconocido: {item_id}")
+        if not (LIKERT_MIN <= value <= LIKERT_MAX):
+            raise ValueError(f"Respuesta fuera de rango en {item_id}: {value}")
+        old = self.answers.get(item_id)
+        if old == value:
+            return False
+        self.answers[item_id] = value
+        slot, rev = self._col[item_id]
+        if slot < 0:
+            return True
+        x = reverse_score(value) if rev else value
+        if old is None:
+            self.answered[slot] += 1
+        else:
+            x -= reverse_score(old) if rev else old
+        self.sums[slot] += x
+        return True
+
+    @property
+    def remaining(self) -> List[int]:
+        """Ítems sin responder por dimensión D/I/S/C/V."""
+        return [n - a for n, a in zip(self.size, self.answered)]
+
+    @property
+    def complete(self) -> bool:
+        return self.answered == self.size
+
+    def completed_sums(self) -> Tuple[Dict[str, int], int]:
+        """(raw D/I/S/C, validez) con NEUTRAL en los ítems sin responder (invertido también es NEUTRAL)."""
+        acc = [s + NEUTRAL * r for s, r in zip(self.sums, self.remaining)]
+        return dict(zip(DIMS, acc[:4])), acc[4]
+
+    def running_pct(self) -> Dict[str, float]:
+        """
+        % interno provisional: reparto de la media por ítem respondido de cada
+        dimensión (no penaliza a las que tienen menos respuestas). Con todo
+        respondido coincide con DiscResult.pct.
+        """
+        means = [s / a if a else 0.0 for s, a in zip(self.sums[:4], self.answered[:4])]
+        total = sum(means)
+        return {d: (m / total * 100.0) if total else 0.0 for d, m in zip(DIMS, means)}
+
+    def provisional_primary(self) -> Optional[str]:
+        """Dimensión con mayor media por ítem hasta ahora (empates: orden D/I/S/C, como score_disc)."""
+        best, best_mean = None, None
+        for d, s, a in zip(DIMS, self.sums, self.answered):
+            if a and (best_mean is None or s / a > best_mean):
+                best, best_mean = d, s / a
+        return best
+
+    def result(self, **kwargs) -> DiscResult:
+        """score_sums sobre las sumas completadas; kwargs como en score_sums."""
+        raw, validity = self.completed_sums()
+        return score_sums(raw, validity, **kwargs)
+
+# -----------------------------
+# Scoring por lotes (NumPy)
+# -----------------------------
+
+@dataclass
+class DiscBatchResult:
+    """Resultados de N personas; columnas de raw/pct/z/secondary en orden D/I/S/C."""
+    raw: "np.ndarray"                 # (N, 4) int
+    pct: "np.ndarray"                 # (N, 4) float
+    z: "np.ndarray"                   # (N, 4) float
+    primary: "np.ndarray"             # (N,) índice en DIMS
+    secondary: "np.ndarray"           # (N, 4) bool, dims del blend
+    undifferentiated: "np.ndarray"    # (N,) bool, spread <= 3
+    validity_flag: "np.ndarray"       # (N,) bool
+    validity_score: "np.ndarray"      # (N,) int
+    pop_z: Optional["np.ndarray"] = None     # (N, 4) z poblacional (si hay normas)
+    pop_pct: Optional["np.ndarray"] = None   # (N, 4) percentil poblacional 0-100
+
+    def __len__(self) -> int:
+        return len(self.primary)
+
+    def blend_labels(self) -> List[str]:
+        """Etiqueta de estilo por fila ("D", "D-C", ...), en el orden de ranking de score_disc."""
+        labels, inv = self.blend_index()
+        return [labels[j] for j in inv.tolist()]
+
+    def blend_index(self) -> Tuple[List[str], "np.ndarray"]:
+        """(etiquetas distintas, índice de la etiqueta de cada fila): blend_labels sin armar N strings."""
+        import numpy as np
+        n = len(self)
+        # sort estable descendente: mismo orden que sorted(..., reverse=True) en score_disc
+        order = np.argsort(-self.raw, axis=1, kind="stable")
+        in_blend = self.secondary[np.arange(n)[:, None], order]
+        key = order @ np.array([64, 16, 4, 1]) * 16 + in_blend @ np.array([8, 4, 2, 1])
+        uniq, inv = np.unique(key, return_inverse=True)
+        labels = []
+        for k in uniq.tolist():
+            o, m = divmod(k, 16)
+            ranked = [DIMS[(o >> s) & 3] for s in (6, 4, 2, 0)]
+            labels.append("-".join([ranked[0]] + [d for j, d in enumerate(ranked) if m >> (3 - j) & 1]))
+        return labels, inv.reshape(-1)
+
+    def row(self, i: int) -> DiscResult:
+        """Fila i como DiscResult (idéntico a score_disc para las mismas respuestas)."""
+        raw = {d: int(self.raw[i, j]) for j, d in enumerate(DIMS)}
+        ranked = sorted(raw.items(), key=lambda kv: kv[1], reverse=True)
+        primary = DIMS[int(self.primary[i])]
+        secondary = [d for d, _ in ranked if self.secondary[i, DIMS.index(d)]]
+        validity_flag = bool(self.validity_flag[i])
+        pop_z = pop_pct = None
+        if self.pop_z is not None:
+            pop_z = {d: float(self.pop_z[i, j]) for j, d in enumerate(DIMS)}
+            pop_pct = {d: float(self.pop_pct[i, j]) for j, d in enumerate(DIMS)}
+        return DiscResult(
+            raw=raw,
+            pct={d: float(self.pct[i, j]) for j, d in enumerate(DIMS)},
+            z={d: float(self.z[i, j]) for j, d in enumerate(DIMS)},
+            primary=primary, secondary=secondary,
+            validity_flag=validity_flag, validity_score=int(self.validity_score[i]),
+            notes=_build_notes(primary, secondary, bool(self.undifferentiated[i]), validity_flag),
+            pop_z=pop_z, pop_pct=pop_pct,
+        )
+
+def classify_raw(raw: "np.ndarray",
+                 blend_ratio: float = 0.90,
+                 blend_abs: int = 2) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    raw: (N, 4) sumas D/I/S/C.
+    Devuelve (primary, secondary_mask, undifferentiated) con las mismas reglas que score_disc.
+    """
+    import numpy as np
+    # argmax devuelve el primer máximo: mismo desempate que el sort estable de score_disc
+    primary = raw.argmax(axis=1)
+    top = raw.max(axis=1)[:, None]
+    secondary = (raw >= top * blend_ratio) | ((top - raw) <= blend_abs)
+    secondary[np.arange(len(raw)), primary] = False
+    undifferentiated = (top[:, 0] - raw.min(axis=1)) <= 3
+    return primary, secondary, undifferentiated
+
+@instrumented("scoring.score_disc_batch")
+def score_disc_batch(items: List[Item], answers_matrix,
+                     blend_ratio: float = 0.90,
+                     blend_abs: int = 2,
+                     validity_threshold: int = 24,
+                     plan: Optional[ScoringPlan] = None,
+                     norms: Optional["NormTable"] = None,
+                     lookup: Optional["ClassificationTable"] = None) -> DiscBatchResult:
+    """
+    answers_matrix: (N, len(items)) respuestas 1..5, columnas en el orden de items.
+    Mismas reglas que score_disc, en una sola pasada vectorizada.
+    """
+    if plan is None:
+        plan = get_scoring_plan(items)
+    sums = plan.sums_matrix(answers_matrix)
+    return score_sums_batch(sums[:, :4], sums[:, 4], blend_ratio, blend_abs, validity_threshold,
+                            norms=norms, lookup=lookup)
+
+def score_sums_batch(raw: "np.ndarray", validity: "np.ndarray",
+                     blend_ratio: float = 0.90,
+                     blend_abs: int = 2,
+                     validity_threshold: int = 24,
+                     norms: Optional["NormTable"] = None,
+                     lookup: Optional["ClassificationTable"] = None) -> DiscBatchResult:
+    """Igual que score_disc_batch, partiendo de sumas ya calculadas (raw (N, 4), validity (N,))."""
+    import numpy as np
+    raw = np.asarray(raw, dtype=np.int64)
+    validity = np.asarray(validity, dtype=np.int64)
+
+    total = raw.sum(axis=1)
+    safe_total = np.where(total != 0, total, 1)
+    pct = np.where(total[:, None] != 0, raw / safe_total[:, None] * 100.0, 0.0)
+
+    # z-scores intra-sujeto; la suma se hace en el mismo orden que score_disc
+    mean = total / 4.0
+    dev = raw - mean[:, None]
+    sq = dev ** 2
+    var = (((sq[:, 0] + sq[:, 1]) + sq[:, 2]) + sq[:, 3]) / 4.0
+    # var ** 0.5 de Python no siempre coincide con np.sqrt en el último bit;
+    # se evalúa sobre los pocos valores distintos de var.
+    uniq, inv = np.unique(var, return_inverse=True)
+    sd = np.array([v ** 0.5 if v > 0 else 1.0 for v in uniq.tolist()])[inv.reshape(-1)]
+    z = dev / sd[:, None]
+
+    if lookup is None:
+        primary, secondary, undifferentiated = classify_raw(raw, blend_ratio, blend_abs)
+    else:
+        lookup.check_params(blend_ratio, blend_abs)
+        primary, secondary, undifferentiated = lookup.classify_batch(raw)
+    return DiscBatchResult(
         raw=raw, pct=pct, z=z,
         primary=primary, secondary=secondary,
-        validity_flag=validity_flag, validity_score=validity,
-        notes=notes
+        undifferentiated=undifferentiated,
+        validity_flag=validity >= validity_threshold,
+        validity_score=validity,
+        pop_z=norms.z(raw) if norms is not None else None,
+        pop_pct=norms.percentile(raw) if norms is not None else None,
     )
@@ -0,0 +1,310 @@
+"""
+Servicio HTTP local para integraciones (p. ej. el ATS): scoring e informes PDF.
+
+    python service.py --port 8080 --workers 4 --queue 16 --timeout 30
+
+    GET  /health   estado: trabajos en curso y en cola
+    POST /score    {"answers": {...}}                              -> resultado JSON
+    POST /report   {"id", "name", "role", "answers": {...}}        -> JSON con el
+                   resultado y el PDF en base64; con ?format=pdf o
+                   Accept: application/pdf devuelve el PDF directo
+
+El scoring se responde en el event loop (microsegundos). Los PDF se generan en
+un pool de procesos acotado (cohort_reports.render_report_bytes): como mucho
+`workers` en ejecución y `queue` esperando; más allá se responde 429 con
+Retry-After. Cada informe tiene un tiempo límite (504) y las lecturas de la
+petición también (408). Solo HTTP/1.1 simple, una petición por conexión.
+
+Con la instrumentación activa (DISC_INSTRUMENT), los workers miden sus spans
+(scoring, gráficos, PDF) y los devuelven con cada informe; el proceso principal
+los suma a su registro, así /metrics incluye lo que pasa dentro del pool.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import instrumentation
+from cohort_reports import ReportJob, init_worker, render_report_bytes
+from lookup import get_table
+from questionnaire import get_items
+from scoring import DiscResult, score_disc
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           408: "Request Timeout", 413: "Payload Too Large", 429: "Too Many Requests",
+           500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+Response = Tuple[int, str, bytes, Dict[str, str]]   # (status, content-type, cuerpo, headers extra)
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+def _json(status: int, obj) -> Response:
+    return status, "application/json", json.dumps(obj, ensure_ascii=False).encode("utf-8"), {}
+
+def result_json(res: DiscResult) -> dict:
+    out = asdict(res)
+    out["blend"] = "-".join([res.primary] + res.secondary)
+    return out
+
+def init_service_worker(cache_dir: Optional[str], vector: bool,
+                        instrument: bool = False, memory: bool = False) -> None:
+    # Los workers nunca exponen /metrics: el puerto es del proceso principal,
+    # que recibe los spans del worker con cada informe (render_in_worker)
+    os.environ.pop("DISC_METRICS_PORT", None)
+    if instrument:
+        instrumentation.enable(memory=memory)
+    init_worker(cache_dir, vector)
+
+def render_in_worker(job: ReportJob, vector: bool) -> Tuple[bytes, Optional[Dict[str, dict]]]:
+    """PDF del informe + los spans medidos en el worker desde el informe anterior."""
+    pdf = render_report_bytes(job, vector)
+    return pdf, instrumentation.registry.take() if instrumentation.is_enabled() else None
+
+class ReportService:
+    def __init__(self, workers: Optional[int] = None, queue: int = 16,
+                 timeout: float = 30.0, read_timeout: float = 10.0,
+                 max_body: int = 64 * 1024, max_connections: int = 256,
+                 cache_dir: Optional[str] = None, vector: bool = True, lookup: bool = True):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue = queue
+        self.timeout = timeout
+        self.read_timeout = read_timeout
+        self.max_body = max_body
+        self.max_connections = max_connections
+        self.cache_dir = cache_dir
+        self.vector = vector
+        self.items = get_items()
+        # Tabla de clasificación precalculada (lookup.py): se arma una vez al iniciar
+        self.lookup = get_table(self.items) if lookup else None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._admitted = 0      # informes en ejecución + en cola (se liberan al terminar el proceso)
+        self._running = 0
+        self._connections = 0
+        self.counters = {"score": 0, "report": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    # -----------------------------
+    # Ciclo de vida
+    # -----------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Arranca el pool y el servidor; port=0 elige un puerto libre (ver server.sockets)."""
+        # spawn: hacer fork de un proceso con event loop e hilos puede dejar locks tomados en el hijo
+        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                         initializer=init_service_worker,
+                                         initargs=(self.cache_dir, self.vector, instrumentation.is_enabled(),
+                                                   instrumentation.is_memory_enabled()))
+        self._slots = asyncio.Semaphore(self.workers)
+        return await asyncio.start_server(self._handle, host, port)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # -----------------------------
+    # HTTP
+    # -----------------------------
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Dict[str, str], bytes]:
+        line = await reader.readline()
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise HTTPError(400, "Línea de petición inválida")
+        method, target, _ = parts
+        headers: Dict[str, str] = {}
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= 100:
+                raise HTTPError(400, "Demasiados encabezados")
+            name, _, value = h.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", "0"))
+        except ValueError:
+            raise HTTPError(400, "Content-Length inválido") from None
+        if length > self.max_body:
+            raise HTTPError(413, f"Cuerpo mayor a {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, headers, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                resp = _json(503, {"error": "Demasiadas conexiones"})
+            else:
+                try:
+                    method, target, headers, body = await asyncio.wait_for(
+                        self._read_request(reader), self.read_timeout)
+                    resp = await self._route(method, target, headers, body)
+                except HTTPError as e:
+                    status, ctype, payload, _ = _json(e.status, {"error": str(e)})
+                    resp = (status, ctype, payload, e.headers)
+                except asyncio.TimeoutError:
+                    resp = _json(408, {"error": "Tiempo de lectura agotado"})
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except Exception as e:
+                    self.counters["errors"] += 1
+                    resp = _json(500, {"error": f"{type(e).__name__}: {e}"})
+            await self._write(writer, *resp)
+        finally:
+            self._connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _write(self, writer: asyncio.StreamWriter, status: int, ctype: str,
+                     payload: bytes, headers: Dict[str, str]) -> None:
+        head = [f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+                f"Content-Type: {ctype}",
+                f"Content-Length: {len(payload)}",
+                "Connection: close"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _route(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Response:
+        url = urlsplit(target)
+        routes = {"/health": ("GET", self._health), "/score": ("POST", self._score),
+                  "/report": ("POST", self._report)}
+        if url.path not in routes:
+            raise HTTPError(404, f"Ruta desconocida: {url.path}")
+        allowed, handler = routes[url.path]
+        if method != allowed:
+            raise HTTPError(405, f"Usar {allowed}", {"Allow": allowed})
+        return await handler(parse_qs(url.query), headers, body)
+
+    # -----------------------------
+    # Endpoints
+    # -----------------------------
+    def _parse(self, body: bytes) -> dict:
+        try:
+            obj = json.loads(body or b"{}")
+        except ValueError as e:
+            raise HTTPError(400, f"JSON inválido: {e}") from None
+        if not isinstance(obj, dict) or not isinstance(obj.get("answers"), dict):
+            raise HTTPError(400, "Se esperaba un objeto con 'answers': {item_id: 1..5}")
+        for k, v in obj["answers"].items():
+            # enteros JSON solamente: 3.7 o true no se redondean a una respuesta válida
+            if type(v) is not int:
+                raise HTTPError(400, f"Respuesta inválida en {k}: {json.dumps(v)} (se espera un entero 1..5)")
+        return obj
+
+    def _score_answers(self, answers: Dict[str, int]) -> DiscResult:
+        try:
+            return score_disc(self.items, answers, lookup=self.lookup)
+        except (ValueError, TypeError) as e:
+            raise HTTPError(400, str(e)) from None
+
+    async def _health(self, query, headers, body) -> Response:
+        return _json(200, {"ok": True, "workers": self.workers, "running": self._running,
+                           "queued": self._admitted - self._running, "queue_limit": self.queue,
+                           **self.counters})
+
+    async def _score(self, query, headers, body) -> Response:
+        res = self._score_answers(self._parse(body)["answers"])
+        self.counters["score"] += 1
+        return _json(200, result_json(res))
+
+    async def _report(self, query, headers, body) -> Response:
+        obj = self._parse(body)
+        res = self._score_answers(obj["answers"])   # valida antes de ocupar un lugar en la cola
+        job = ReportJob(str(obj.get("id", "")), obj.get("name") or "N/A", obj.get("role") or "N/A",
+                        obj["answers"])
+        pdf = await self._render(job)
+        self.counters["report"] += 1
+        want_pdf = query.get("format", [""])[0] == "pdf" or "application/pdf" in headers.get("accept", "")
+        if want_pdf:
+            return 200, "application/pdf", pdf, {}
+        return _json(200, {"result": result_json(res), "pdf_base64": base64.b64encode(pdf).decode("ascii")})
+
+    async def _render(self, job: ReportJob) -> bytes:
+        # Admisión: en ejecución + en cola acotados; lo que sobra se rechaza enseguida
+        if self._admitted >= self.workers + self.queue:
+            self.counters["rejected"] += 1
+            raise HTTPError(429, "Servicio saturado, reintentar más tarde", {"Retry-After": "1"})
+        self._admitted += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self._admitted -= 1
+            self.counters["timeouts"] += 1
+            raise HTTPError(504, "Tiempo agotado esperando un worker") from None
+
+        self._running += 1
+        fut = loop.run_in_executor(self._pool, render_in_worker, job, self.vector)
+
+        def release(f):
+            # El lugar se libera cuando el proceso termina, aunque la petición ya haya expirado
+            self._running -= 1
+            self._admitted -= 1
+            self._slots.release()
+            if not f.cancelled() and f.exception() is None and f.result()[1]:
+                instrumentation.registry.merge(f.result()[1])
+        fut.add_done_callback(release)
+
+        try:
+            pdf, _ = await asyncio.wait_for(asyncio.shield(fut), max(0.0, deadline - loop.time()))
+            return pdf
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            raise HTTPError(504, "Tiempo agotado generando el informe") from None
+
+async def serve(args) -> None:
+    service = ReportService(workers=args.workers, queue=args.queue, timeout=args.timeout,
+                            cache_dir=args.cache_dir, vector=not args.png_charts,
+                            lookup=not args.no_lookup)
+    server = await service.start(args.host, args.port)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:   # Windows
+            pass
+    addr = server.sockets[0].getsockname()
+    print(f"Escuchando en http://{addr[0]}:{addr[1]} ({service.workers} workers, cola {service.queue})")
+    async with server:
+        await stop.wait()
+    service.close()
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Servicio HTTP local de scoring e informes DISC.")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--workers", type=int, default=None,
+                   help="Procesos para generar PDF (por defecto, núcleos disponibles).")
+    p.add_argument("--queue", type=int, default=16, help="Informes en espera antes de responder 429.")
+    p.add_argument("--timeout", type=float, default=30.0, help="Segundos máximos por informe.")
+    p.add_argument("--png-charts", action="store_true",
+                   help="Gráficos PNG (matplotlib) en vez de vectoriales.")
+    p.add_argument("--cache-dir", default=None, help="Caché en disco compartida por los workers.")
+    p.add_argument("--no-lookup", action="store_true",
+                   help="Clasificar ordenando en cada petición en vez de usar la tabla precalculada.")
+    args = p.parse_args(argv)
+
+    instrumentation.configure_from_env()    # /metrics con DISC_METRICS_PORT, solo en este proceso
+    asyncio.run(serve(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Persistencia local de evaluaciones en SQLite (modo WAL).
+
+Una fila por evaluación: persona (id externo, nombre, rol), fecha, respuestas
+empaquetadas (response_store.pack_answers, 18 bytes con 46 ítems), los campos
+de DiscResult y la ruta del PDF si se generó. Las notas no se guardan: se
+reconstruyen con las mismas reglas de scoring a partir de primary, blend,
+"poco diferenciado" y la alerta de validez.
+
+Las inserciones se hacen por lotes en una sola transacción (executemany) y
+hay índices por rol, primario, blend y fecha (con la fecha como segunda
+columna), así que consultas de cohorte como "todos los D-C de Ventas este
+trimestre" recorren solo las filas que coinciden.
+
+    with ResultStore("disc.sqlite", get_items()) as db:
+        db.add(res, answers, person_name="Ana", role="Ventas", report_path="out/x.pdf")
+        db.add_batch(ids, batch_result, answers_matrix, role="Ventas")
+        rows = db.query(role="Ventas", blend="D-C", since=q0, until=q1)
+
+    python storage.py --db disc.sqlite --role Ventas --blend D-C --quarter 2026Q3
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from questionnaire import Item
+from response_store import items_hash, pack_answers, unpack_one
+from scoring import DIMS, DiscBatchResult, DiscResult, _build_notes
+
+SCHEMA_VERSION = 1
+DEFAULT_BATCH_SIZE = 10_000
+
+Timestamp = Union[int, float, datetime, date]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id               INTEGER PRIMARY KEY,
+    respondent_id    TEXT NOT NULL DEFAULT '',
+    name             TEXT,
+    role             TEXT,
+    created_at       INTEGER NOT NULL,          -- segundos Unix (UTC)
+    answers          BLOB NOT NULL,             -- response_store.pack_answers
+    raw_d INTEGER NOT NULL, raw_i INTEGER NOT NULL, raw_s INTEGER NOT NULL, raw_c INTEGER NOT NULL,
+    pct_d REAL NOT NULL, pct_i REAL NOT NULL, pct_s REAL NOT NULL, pct_c REAL NOT NULL,
+    z_d REAL NOT NULL, z_i REAL NOT NULL, z_s REAL NOT NULL, z_c REAL NOT NULL,
+    primary_dim      TEXT NOT NULL,
+    blend            TEXT NOT NULL,             -- "D", "D-C", ... (primario + secundarios en orden)
+    undifferentiated INTEGER NOT NULL,
+    validity_score   INTEGER NOT NULL,
+    validity_flag    INTEGER NOT NULL,
+    report_path      TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_created ON results (created_at);
+CREATE INDEX IF NOT EXISTS idx_results_role ON results (role, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_primary ON results (primary_dim, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_blend ON results (blend, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_role_blend ON results (role, blend, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_respondent ON results (respondent_id);
+"""
+
+_COLUMNS = ("respondent_id", "name", "role", "created_at", "answers",
+            "raw_d", "raw_i", "raw_s", "raw_c", "pct_d", "pct_i", "pct_s", "pct_c",
+            "z_d", "z_i", "z_s", "z_c", "primary_dim", "blend", "undifferentiated",
+            "validity_score", "validity_flag", "report_path")
+_INSERT = f"INSERT INTO results ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+@dataclass
+class StoredResult:
+    id: int
+    respondent_id: str
+    name: Optional[str]
+    role: Optional[str]
+    created_at: int
+    raw: Dict[str, int]
+    pct: Dict[str, float]
+    z: Dict[str, float]
+    primary: str
+    blend: str
+    undifferentiated: bool
+    validity_score: int
+    validity_flag: bool
+    report_path: Optional[str]
+    answers_packed: bytes
+
+    @property
+    def secondary(self) -> List[str]:
+        return self.blend.split("-")[1:]
+
+    def to_result(self) -> DiscResult:
+        """DiscResult equivalente (las notas se reconstruyen con las reglas de scoring)."""
+        return DiscResult(raw=dict(self.raw), pct=dict(self.pct), z=dict(self.z),
+                          primary=self.primary, secondary=self.secondary,
+                          validity_flag=self.validity_flag, validity_score=self.validity_score,
+                          notes=_build_notes(self.primary, self.secondary, self.undifferentiated,
+                                             self.validity_flag))
+
+def to_epoch(t: Optional[Timestamp]) -> Optional[int]:
+    """datetime (naive = UTC), date (medianoche UTC) o segundos Unix -> segundos Unix."""
+    if t is None or isinstance(t, (int, float)):
+        return None if t is None else int(t)
+    if isinstance(t, datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        return int(t.timestamp())
+    return int(datetime(t.year, t.month, t.day, tzinfo=timezone.utc).timestamp())
+
+def quarter_bounds(spec: str) -> Tuple[int, int]:
+    """"2026Q3" -> [inicio, fin) del trimestre en segundos Unix (UTC)."""
+    try:
+        year, q = spec.upper().split("Q")
+        year, q = int(year), int(q)
+        if not 1 <= q <= 4:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Trimestre inválido: {spec!r} (usar p. ej. 2026Q3)") from None
+    start = date(year, 3 * q - 2, 1)
+    end = date(year + 1, 1, 1) if q == 4 else date(year, 3 * q + 1, 1)
+    return to_epoch(start), to_epoch(end)
+
+def _undifferentiated(raw: Dict[str, int]) -> bool:
+    vals = list(raw.values())
+    return max(vals) - min(vals) <= 3
+
+class ResultStore:
+    def __init__(self, path: str, items: Sequence[Item], timeout: float = 30.0):
+        self.path = path
+        self.items = list(items)
+        self._ids = [it.id for it in self.items]
+        # isolation_level=None: las transacciones se abren a mano (BEGIN) en cada escritura
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")   # con WAL: durable al checkpoint, sin fsync por commit
+        self.conn.executescript(_SCHEMA)
+        self._check_meta()
+
+    def _check_meta(self) -> None:
+        ihash = items_hash(self.items).hex()
+        with self._transaction():
+            rows = dict(self.conn.execute("SELECT key, value FROM meta"))
+            if not rows:
+                self.conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)",
+                                      [("schema_version", str(SCHEMA_VERSION)), ("items_hash", ihash)])
+                return
+        if int(rows.get("schema_version", 0)) != SCHEMA_VERSION:
+            raise ValueError(f"{self.path}: versión de esquema {rows.get('schema_version')} no soportada")
+        if rows.get("items_hash") != ihash:
+            raise ValueError(f"{self.path}: creado con otra versión del cuestionario")
+
+    def _transaction(self):
+        return _Transaction(self.conn)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -----------------------------
+    # Escritura
+    # -----------------------------
+    def add(self, res: DiscResult, answers: Dict[str, int], person_name: Optional[str] = None,
+            role: Optional[str] = None, respondent_id: str = "", report_path: Optional[str] = None,
+            created_at: Optional[Timestamp] = None) -> int:
+        """Guarda una evaluación; devuelve su id."""
+        row = self.result_row(res, answers, person_name, role, respondent_id, report_path, created_at)
+        with self._transaction():
+            return self.conn.execute(_INSERT, row).lastrowid
+
+    def result_row(self, res: DiscResult, answers: Dict[str, int], person_name: Optional[str] = None,
+                   role: Optional[str] = None, respondent_id: str = "", report_path: Optional[str] = None,
+                   created_at: Optional[Timestamp] = None) -> tuple:
+        """Fila lista para add_rows (para acumular varias evaluaciones en una transacción)."""
+        packed = pack_answers(np.array([[answers[i] for i in self._ids]]))[0].tobytes()
+        ts = int(time.time()) if created_at is None else to_epoch(created_at)
+        return (respondent_id, person_name, role, ts, packed,
+                *(res.raw[d] for d in DIMS), *(res.pct[d] for d in DIMS), *(res.z[d] for d in DIMS),
+                res.primary, "-".join([res.primary] + res.secondary), int(_undifferentiated(res.raw)),
+                res.validity_score, int(res.validity_flag), report_path)
+
+    def add_batch(self, ids: Sequence[str], res: DiscBatchResult, answers_matrix,
+                  role: Union[None, str, Sequence[Optional[str]]] = None,
+                  names: Optional[Sequence[Optional[str]]] = None,
+                  report_paths: Optional[Sequence[Optional[str]]] = None,
+                  created_at: Optional[Timestamp] = None,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Guarda un bloque puntuado con score_disc_batch (mismas filas que answers_matrix),
+        en transacciones de hasta batch_size filas. role puede ser uno para todo el bloque
+        o uno por fila. Devuelve la cantidad de filas.
+        """
+        n = len(ids)
+        packed = pack_answers(answers_matrix)
+        ts = int(time.time()) if created_at is None else to_epoch(created_at)
+        roles = [role] * n if role is None or isinstance(role, str) else list(role)
+        names = list(names) if names is not None else [None] * n
+        paths = list(report_paths) if report_paths is not None else [None] * n
+        spread = res.raw.max(axis=1) - res.raw.min(axis=1)
+        cols = zip(ids, names, roles, [ts] * n, (bytes(r) for r in packed),
+                   *res.raw.T.tolist(), *res.pct.T.tolist(), *res.z.T.tolist(),
+                   [DIMS[p] for p in res.primary.tolist()], res.blend_labels(),
+                   (spread <= 3).astype(int).tolist(), res.validity_score.tolist(),
+                   res.validity_flag.astype(int).tolist(), paths)
+        self.add_rows(cols, batch_size)
+        return n
+
+    def add_rows(self, rows: Iterable[tuple], batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        """Filas crudas en el orden de _COLUMNS, en transacciones de batch_size."""
+        buf: List[tuple] = []
+        for row in rows:
+            buf.append(row)
+            if len(buf) >= batch_size:
+                self._flush(buf)
+        if buf:
+            self._flush(buf)
+
+    def _flush(self, buf: List[tuple]) -> None:
+        with self._transaction():
+            self.conn.executemany(_INSERT, buf)
+        buf.clear()
+
+    def set_report_path(self, result_id: int, path: str) -> None:
+        with self._transaction():
+            self.conn.execute("UPDATE results SET report_path = ? WHERE id = ?", (path, result_id))
+
+    # -----------------------------
+    # Consultas
+    # -----------------------------
+    def _where(self, role, primary, blend, since, until, respondent_id) -> Tuple[str, list]:
+        conds, args = [], []
+        for col, val in (("role", role), ("primary_dim", primary), ("blend", blend),
+                         ("respondent_id", respondent_id)):
+            if val is not None:
+                conds.append(f"{col} = ?")
+                args.append(val)
+        if since is not None:
+            conds.append("created_at >= ?")
+            args.append(to_epoch(since))
+        if until is not None:
+            conds.append("created_at < ?")
+            args.append(to_epoch(until))
+        return (" WHERE " + " AND ".join(conds)) if conds else "", args
+
+    def query(self, role: Optional[str] = None, primary: Optional[str] = None,
+              blend: Optional[str] = None, since: Optional[Timestamp] = None,
+              until: Optional[Timestamp] = None, respondent_id: Optional[str] = None,
+              limit: Optional[int] = None) -> List[StoredResult]:
+        """Evaluaciones que cumplen todos los filtros dados, más recientes primero. until es exclusivo."""
+        where, args = self._where(role, primary, blend, since, until, respondent_id)
+        sql = f"SELECT id, {', '.join(_COLUMNS)} FROM results{where} ORDER BY created_at DESC, id DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(int(limit))
+        return [_row_to_result(r) for r in self.conn.execute(sql, args)]
+
+    def count(self, role: Optional[str] = None, primary: Optional[str] = None,
+              blend: Optional[str] = None, since: Optional[Timestamp] = None,
+              until: Optional[Timestamp] = None, respondent_id: Optional[str] = None) -> int:
+        where, args = self._where(role, primary, blend, since, until, respondent_id)
+        return self.conn.execute(f"SELECT COUNT(*) FROM results{where}", args).fetchone()[0]
+
+    def blend_counts(self, role: Optional[str] = None, since: Optional[Timestamp] = None,
+                     until: Optional[Timestamp] = None) -> List[Tuple[str, int]]:
+        where, args = self._where(role, None, None, since, until, None)
+        sql = f"SELECT blend, COUNT(*) AS n FROM results{where} GROUP BY blend ORDER BY n DESC, blend"
+        return list(self.conn.execute(sql, args))
+
+    def iter_sums(self, chunk_size: int = 100_000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Crudos D/I/S/C (n, 4) y puntaje de validez (n,) de todas las filas, por bloques."""
+        cur = self.conn.execute("SELECT raw_d, raw_i, raw_s, raw_c, validity_score FROM results")
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                return
+            a = np.array(rows, dtype=np.int64)
+            yield a[:, :4], a[:, 4]
+
+    def get(self, result_id: int) -> Optional[StoredResult]:
+        row = self.conn.execute(f"SELECT id, {', '.join(_COLUMNS)} FROM results WHERE id = ?",
+                                (result_id,)).fetchone()
+        return _row_to_result(row) if row else None
+
+    def answers(self, result_id: int) -> Dict[str, int]:
+        """Respuestas originales de una evaluación (desempaquetadas)."""
+        row = self.conn.execute("SELECT answers FROM results WHERE id = ?", (result_id,)).fetchone()
+        if row is None:
+            raise KeyError(result_id)
+        return unpack_one(self.items, row[0])
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (o ROLLBACK si hay excepción)."""
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+def _row_to_result(r: tuple) -> StoredResult:
+    (rid, respondent_id, name, role, created_at, packed,
+     rd, ri, rs, rc, pd, pi, ps, pc, zd, zi, zs, zc,
+     primary, blend, undiff, vscore, vflag, report_path) = r
+    return StoredResult(
+        id=rid, respondent_id=respondent_id, name=name, role=role, created_at=created_at,
+        raw=dict(zip(DIMS, (rd, ri, rs, rc))), pct=dict(zip(DIMS, (pd, pi, ps, pc))),
+        z=dict(zip(DIMS, (zd, zi, zs, zc))), primary=primary, blend=blend,
+        undifferentiated=bool(undiff), validity_score=vscore, validity_flag=bool(vflag),
+        report_path=report_path, answers_packed=packed,
+    )
+
+def main(argv=None) -> None:
+    from questionnaire import get_items
+
+    p = argparse.ArgumentParser(description="Consultas sobre el almacén SQLite de evaluaciones.")
+    p.add_argument("--db", required=True, metavar="ARCHIVO.sqlite")
+    p.add_argument("--role")
+    p.add_argument("--primary", choices=DIMS)
+    p.add_argument("--blend", help='Etiqueta exacta, p. ej. "D-C".')
+    p.add_argument("--quarter", help="Trimestre, p. ej. 2026Q3 (UTC).")
+    p.add_argument("--since", type=date.fromisoformat, help="Desde (AAAA-MM-DD, inclusive).")
+    p.add_argument("--until", type=date.fromisoformat, help="Hasta (AAAA-MM-DD, exclusivo).")
+    p.add_argument("--limit", type=int, default=20, help="Filas a listar (0 = solo contar).")
+    p.add_argument("--blends", action="store_true", help="Conteo por blend en vez de listar filas.")
+    args = p.parse_args(argv)
+
+    since, until = args.since, args.until
+    if args.quarter:
+        since, until = quarter_bounds(args.quarter)
+    with ResultStore(args.db, get_items()) as db:
+        t0 = time.perf_counter()
+        if args.blends:
+            rows = db.blend_counts(args.role, since, until)
+            secs = time.perf_counter() - t0
+            for blend, n in rows:
+                print(f"{blend:<10}{n:>10,}")
+        else:
+            n = db.count(args.role, args.primary, args.blend, since, until)
+            rows = db.query(args.role, args.primary, args.blend, since, until, limit=args.limit) if args.limit else []
+            secs = time.perf_counter() - t0
+            for r in rows:
+                when = datetime.fromtimestamp(r.created_at, timezone.utc).strftime("%Y-%m-%d")
+                print(json.dumps({"id": r.id, "respondent_id": r.respondent_id, "name": r.name,
+                                  "role": r.role, "date": when, "blend": r.blend, "raw": r.raw,
+                                  "validity_flag": r.validity_flag, "report_path": r.report_path},
+                                 ensure_ascii=False))
+            print(f"{n:,} evaluaciones", file=sys.stderr)
+        print(f"({secs * 1000:.1f} ms)", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
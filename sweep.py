@@ -0,0 +1,328 @@
+"""
+Barrido de parámetros: cómo cambian los blends y la alerta de validez según
+blend_ratio, blend_abs y validity_threshold, sobre un conjunto de respuestas.
+
+Las sumas D/I/S/C/V se calculan una sola vez (o se leen ya calculadas de
+SQLite o de un export) y se reducen a:
+
+  - los crudos D/I/S/C distintos con su cantidad de personas (SumsTally);
+  - un histograma del puntaje de validez.
+
+Con validez, la tasa de alerta para cada umbral es una suma acumulada del
+histograma. Con blends, para cada crudo distinto y cada posición del ranking
+(2.º, 3.º, 4.º) se calcula una sola vez hasta qué blend_ratio de la grilla
+entra como secundario (K) y desde qué blend_abs (G). Como los secundarios de
+score_disc son siempre un prefijo del ranking, la cantidad de secundarios en
+(ratio i, abs j) es #{posiciones con i < K o j >= G}. Eso se evalúa con
+broadcast sobre la grilla completa (ratio × abs × grupos), agrupando antes los
+crudos que comparten permutación, K y G. Las comparaciones son las mismas de
+score_disc (s >= top * ratio, top - s <= abs), así que los conteos son exactos.
+
+    tally = tally_source("respuestas.discr", get_items())
+    res = sweep(tally, ratios=np.arange(...), abs_values=range(7))
+    res.label_rates()[i, j]        # % por etiqueta de blend en (ratios[i], abs_values[j])
+
+    python sweep.py respuestas.discr --ratio 0.70:0.99:0.001 --abs 0:10 --output barrido.csv
+    python sweep.py disc.sqlite --check 20
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from dataclasses import dataclass
+from itertools import permutations
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from export import BLEND_LABELS
+from lookup import score_range
+from questionnaire import Item, get_items
+from scoring import DIMS, LIKERT_MAX, get_scoring_plan, score_sums_batch
+
+_CHUNK_CELLS = 4_000_000     # celdas (ratio × abs × grupo) por bloque de broadcast
+
+# (permutación codificada en base 4, cantidad de secundarios) -> código en BLEND_LABELS
+_LABEL = np.zeros((256, len(DIMS)), dtype=np.uint8)
+for _perm in permutations(range(len(DIMS))):
+    _key = sum(d << (2 * (3 - j)) for j, d in enumerate(_perm))
+    for _k in range(len(DIMS)):
+        _LABEL[_key, _k] = BLEND_LABELS.index("-".join(DIMS[d] for d in _perm[:1 + _k]))
+
+# -----------------------------
+# Conteo de sumas
+# -----------------------------
+class SumsTally:
+    """Personas por crudo D/I/S/C distinto e histograma de validez; se acumula por bloques."""
+
+    def __init__(self, lo: int, hi: int, validity_max: int):
+        self.lo, self.hi = lo, hi
+        self.width = hi - lo + 1
+        self.raw_counts = np.zeros(self.width ** 4, dtype=np.int64)
+        self.validity_hist = np.zeros(validity_max + 1, dtype=np.int64)
+
+    @classmethod
+    def for_items(cls, items: Sequence[Item]) -> "SumsTally":
+        lo, hi = score_range(items)
+        return cls(lo, hi, LIKERT_MAX * sum(1 for it in items if it.dim == "V"))
+
+    @property
+    def n(self) -> int:
+        return int(self.validity_hist.sum())
+
+    def add(self, raw: np.ndarray, validity: np.ndarray) -> None:
+        raw = np.asarray(raw, dtype=np.int64)
+        validity = np.asarray(validity, dtype=np.int64)
+        if len(raw) == 0:
+            return
+        if raw.min() < self.lo or raw.max() > self.hi:
+            raise ValueError(f"Crudo fuera de rango ({self.lo}..{self.hi}): ¿otra versión del cuestionario?")
+        if validity.min() < 0:
+            raise ValueError("Puntaje de validez negativo")
+        key = (raw - self.lo) @ (self.width ** np.arange(3, -1, -1))
+        self.raw_counts += np.bincount(key, minlength=len(self.raw_counts))
+        v = np.bincount(validity)
+        if len(v) > len(self.validity_hist):
+            self.validity_hist = np.pad(self.validity_hist, (0, len(v) - len(self.validity_hist)))
+        self.validity_hist[:len(v)] += v
+
+    def unique(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(crudos distintos (U, 4), personas por crudo (U,))."""
+        keys = np.flatnonzero(self.raw_counts)
+        digits = (keys[:, None] // (self.width ** np.arange(3, -1, -1))) % self.width
+        return digits + self.lo, self.raw_counts[keys]
+
+def _sums_from_answers(chunks: Iterable[np.ndarray], items: Sequence[Item]
+                       ) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    plan = get_scoring_plan(list(items))
+    for x in chunks:
+        sums = plan.sums_matrix(x)
+        yield sums[:, :4], sums[:, 4]
+
+def iter_source_sums(path: str, items: Sequence[Item], in_format: Optional[str] = None,
+                     chunk_size: int = 100_000) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Sumas (raw (n, 4), validez (n,)) por bloques desde un archivo de respuestas
+    (.discr, CSV, JSONL, como batch.py), un almacén SQLite (storage.py) o un
+    export columnar (export.py). Los dos últimos ya traen las sumas.
+    """
+    if os.path.isdir(path):
+        from export import load
+        t = load(path, ["raw", "validity_score"])
+        yield t["raw"], t["validity_score"]
+        return
+    if path.endswith((".sqlite", ".db")):
+        from storage import ResultStore
+        with ResultStore(path, items) as db:
+            yield from db.iter_sums(chunk_size)
+        return
+
+    from batch import guess_format, iter_chunks, open_text, read_rows, store_chunks
+    in_format = in_format or guess_format(path)
+    if in_format == "store":
+        yield from _sums_from_answers((x for _, x in store_chunks(path, list(items), chunk_size)), items)
+        return
+    with open_text(path, "r") as f:
+        rows = iter_chunks(read_rows(f, list(items), in_format), chunk_size)
+        yield from _sums_from_answers((x for _, x in rows), items)
+
+def tally_source(path: str, items: Sequence[Item], in_format: Optional[str] = None,
+                 chunk_size: int = 100_000) -> SumsTally:
+    tally = SumsTally.for_items(items)
+    for raw, validity in iter_source_sums(path, items, in_format, chunk_size):
+        tally.add(raw, validity)
+    return tally
+
+# -----------------------------
+# Barrido
+# -----------------------------
+@dataclass
+class SweepResult:
+    ratios: np.ndarray             # (R,) ascendente
+    abs_values: np.ndarray         # (A,) ascendente
+    thresholds: np.ndarray         # (T,)
+    n: int
+    label_counts: np.ndarray       # (R, A, 64) personas por etiqueta de BLEND_LABELS
+    flagged: np.ndarray            # (T,) personas con alerta de validez por umbral
+
+    def label_rates(self) -> np.ndarray:
+        """(R, A, 64) % de personas por etiqueta de blend."""
+        return self.label_counts / max(self.n, 1) * 100
+
+    def secondary_rates(self) -> np.ndarray:
+        """(R, A, 4) % de personas con 0, 1, 2 y 3 secundarios."""
+        k = np.array([label.count("-") for label in BLEND_LABELS])
+        out = np.zeros(self.label_counts.shape[:2] + (len(DIMS),))
+        for j in range(len(DIMS)):
+            out[:, :, j] = self.label_counts[:, :, k == j].sum(axis=2)
+        return out / max(self.n, 1) * 100
+
+    def validity_rates(self) -> np.ndarray:
+        """(T,) % de personas con alerta de validez."""
+        return self.flagged / max(self.n, 1) * 100
+
+    def at(self, blend_ratio: float, blend_abs: float) -> dict:
+        """{etiqueta: %} en un punto de la grilla."""
+        i = int(np.flatnonzero(self.ratios == blend_ratio)[0])
+        j = int(np.flatnonzero(self.abs_values == blend_abs)[0])
+        rates = self.label_rates()[i, j]
+        return {BLEND_LABELS[k]: float(rates[k]) for k in np.flatnonzero(self.label_counts[i, j])}
+
+    def write_csv(self, path: str) -> None:
+        """Una fila por (blend_ratio, blend_abs): % por cantidad de secundarios y por etiqueta."""
+        used = np.flatnonzero(self.label_counts.sum(axis=(0, 1)))
+        rates = self.label_rates()
+        sec = self.secondary_rates()
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(["blend_ratio", "blend_abs", "pct_pure", "pct_sec1", "pct_sec2", "pct_sec3"]
+                       + [f"pct_{BLEND_LABELS[k]}" for k in used])
+            for i, r in enumerate(self.ratios.tolist()):
+                for j, a in enumerate(self.abs_values.tolist()):
+                    w.writerow([_fmt(r), _fmt(a)] + np.round(sec[i, j], 4).tolist() + np.round(rates[i, j, used], 4).tolist())
+
+def sweep(tally: SumsTally, ratios: Sequence[float], abs_values: Sequence[float],
+          thresholds: Sequence[float] = ()) -> SweepResult:
+    ratios = np.unique(np.asarray(ratios, dtype=np.float64))
+    abs_values = np.unique(np.asarray(abs_values, dtype=np.float64))
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if not len(ratios) or not len(abs_values):
+        raise ValueError("La grilla necesita al menos un blend_ratio y un blend_abs")
+
+    # Validez: personas con puntaje >= umbral, leídas de la suma acumulada desde arriba
+    tail = np.concatenate([np.cumsum(tally.validity_hist[::-1])[::-1], [0]])
+    flagged = tail[np.clip(np.ceil(thresholds).astype(np.int64), 0, len(tail) - 1)]
+
+    raw, counts = tally.unique()
+    R, A = len(ratios), len(abs_values)
+    label_counts = np.zeros(R * A * len(BLEND_LABELS), dtype=np.int64)
+    if len(raw):
+        order = np.argsort(-raw, axis=1, kind="stable")     # mismo orden que score_disc
+        ranked = np.take_along_axis(raw, order, axis=1)
+        top = ranked[:, :1]
+        perm = order @ np.array([64, 16, 4, 1])
+
+        # K: cuántos ratios de la grilla (los primeros) cumplen s >= top * ratio; se evalúa
+        # sobre los pares (top, s) posibles, que son pocos, con la misma cuenta que score_disc
+        vals = np.arange(tally.lo, tally.hi + 1)
+        k_table = (vals[None, :, None] >= vals[:, None, None] * ratios).sum(axis=2)
+        K = k_table[top - tally.lo, ranked[:, 1:] - tally.lo]
+        # G: primer abs de la grilla que cumple top - s <= abs
+        G = np.searchsorted(abs_values, top - ranked[:, 1:], side="left")
+
+        groups, inv = np.unique(np.column_stack([perm, K, G]), axis=0, return_inverse=True)
+        weight = np.bincount(inv.reshape(-1), weights=counts, minlength=len(groups))
+        g_perm, g_K, g_G = groups[:, 0], groups[:, 1:4], groups[:, 4:7]
+
+        ri = np.arange(R)[:, None, None]
+        ai = np.arange(A)[None, :, None]
+        cell = (np.arange(R * A).reshape(R, A, 1) * len(BLEND_LABELS))
+        step = max(1, _CHUNK_CELLS // (R * A))
+        for s in range(0, len(groups), step):
+            sl = slice(s, s + step)
+            nsec = np.zeros((R, A, len(groups[sl])), dtype=np.uint8)
+            for j in range(3):
+                nsec += (ri < g_K[sl, j]) | (ai >= g_G[sl, j])
+            codes = cell + _LABEL[g_perm[sl], nsec]
+            label_counts += np.bincount(codes.reshape(-1), minlength=len(label_counts),
+                                        weights=np.broadcast_to(weight[sl], codes.shape).reshape(-1)
+                                        ).astype(np.int64)
+
+    return SweepResult(ratios, abs_values, thresholds, tally.n,
+                       label_counts.reshape(R, A, len(BLEND_LABELS)), flagged)
+
+def check(tally: SumsTally, result: SweepResult, points: int = 10, seed: int = 0) -> int:
+    """
+    Recalcula `points` puntos de la grilla al azar con score_sums_batch sobre los
+    crudos distintos y devuelve cuántos no coinciden (debería ser 0).
+    """
+    raw, counts = tally.unique()
+    rng = np.random.default_rng(seed)
+    bad = 0
+    for _ in range(points):
+        i = int(rng.integers(len(result.ratios)))
+        j = int(rng.integers(len(result.abs_values)))
+        res = score_sums_batch(raw, np.zeros(len(raw), dtype=np.int64),
+                               float(result.ratios[i]), float(result.abs_values[j]))
+        labels, inv = res.blend_index()
+        got = np.zeros(len(BLEND_LABELS), dtype=np.int64)
+        np.add.at(got, np.array([BLEND_LABELS.index(l) for l in labels])[inv], counts)
+        bad += int(not np.array_equal(got, result.label_counts[i, j]))
+    return bad
+
+# -----------------------------
+# CLI
+# -----------------------------
+def parse_grid(spec: str) -> np.ndarray:
+    """"0.80:0.99:0.01" (extremos incluidos; paso 1 si se omite) o lista "0.85,0.9"."""
+    if ":" in spec:
+        parts = [float(x) for x in spec.split(":")]
+        if len(parts) not in (2, 3):
+            raise argparse.ArgumentTypeError(f"Rango inválido: {spec!r} (usar inicio:fin[:paso])")
+        start, stop = parts[:2]
+        step = parts[2] if len(parts) == 3 else 1.0
+        if step <= 0:
+            raise argparse.ArgumentTypeError(f"Paso inválido en {spec!r}")
+        n = int(np.floor((stop - start) / step + 1e-9)) + 1
+        # redondeo: 0.9 de la grilla es el mismo float que el 0.90 por defecto
+        return np.round(start + step * np.arange(n), 10)
+    return np.array([float(x) for x in spec.split(",")])
+
+def _fmt(x: float) -> str:
+    return f"{x:g}"
+
+def main(argv=None) -> None:
+    p = argparse.ArgumentParser(description="Barrido de blend_ratio, blend_abs y validity_threshold.")
+    p.add_argument("source", help="Respuestas (.discr, CSV, JSONL), almacén .sqlite o carpeta de export.")
+    p.add_argument("--input-format", choices=["csv", "jsonl"])
+    p.add_argument("--ratio", type=parse_grid, default=parse_grid("0.70:1.00:0.01"),
+                   help="blend_ratio: inicio:fin[:paso] o lista separada por comas.")
+    p.add_argument("--abs", dest="abs_values", type=parse_grid, default=parse_grid("0:8"),
+                   help="blend_abs: inicio:fin[:paso] o lista.")
+    p.add_argument("--validity", type=parse_grid, default=None,
+                   help="validity_threshold: inicio:fin[:paso] o lista (por defecto todos los puntajes posibles).")
+    p.add_argument("--output", metavar="ARCHIVO.csv", help="Tasas por etiqueta en cada punto de la grilla.")
+    p.add_argument("--check", type=int, default=0, metavar="N",
+                   help="Verifica N puntos al azar contra score_sums_batch.")
+    args = p.parse_args(argv)
+
+    items = get_items()
+    t0 = time.perf_counter()
+    tally = tally_source(args.source, items, args.input_format)
+    t_sums = time.perf_counter() - t0
+    n_v = sum(1 for it in items if it.dim == "V")
+    thresholds = args.validity if args.validity is not None else np.arange(n_v, LIKERT_MAX * n_v + 1)
+
+    t0 = time.perf_counter()
+    res = sweep(tally, args.ratio, args.abs_values, thresholds)
+    t_sweep = time.perf_counter() - t0
+    print(f"{res.n:,} personas, {int((tally.raw_counts > 0).sum()):,} crudos distintos; "
+          f"{len(res.ratios) * len(res.abs_values):,} combinaciones de blend. "
+          f"Sumas {t_sums:.2f} s, barrido {t_sweep:.2f} s", file=sys.stderr)
+
+    print("\nValidez: % con alerta por umbral")
+    for t, r in zip(res.thresholds.tolist(), res.validity_rates().tolist()):
+        print(f"  >= {_fmt(t):>4}  {r:6.2f}%")
+
+    pure = res.secondary_rates()[:, :, 0]
+    if len(res.ratios) <= 40 and len(res.abs_values) <= 12:
+        print("\n% con al menos un secundario (filas: blend_ratio, columnas: blend_abs)")
+        print("       " + "".join(f"{_fmt(a):>7}" for a in res.abs_values.tolist()))
+        for i, r in enumerate(res.ratios.tolist()):
+            print(f"{_fmt(r):>6} " + "".join(f"{100 - v:>7.1f}" for v in pure[i].tolist()))
+    elif not args.output:
+        print("\nGrilla grande: usar --output para ver las tasas por combinación.", file=sys.stderr)
+
+    if args.output:
+        res.write_csv(args.output)
+        print(f"\nTasas por combinación -> {args.output}", file=sys.stderr)
+    if args.check:
+        bad = check(tally, res, args.check)
+        print(f"Verificación: {args.check - bad}/{args.check} puntos coinciden con score_sums_batch",
+              file=sys.stderr)
+        if bad:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Informe agregado de un equipo/cohorte.
+
+En vez de un punto por persona, el mapa conductual es un histograma 2D de las
+coordenadas del cuadrante (mismo esquema que charts.quadrant_chart) calculado
+por bloques con np.histogram2d y dibujado con imshow: el costo de dibujar
+depende de la grilla (GRID × GRID), no de la cantidad de personas.
+
+Todo se acumula por bloques de DiscBatchResult (frecuencias de blend y de
+estilo primario, normas por dimensión con norms.NormTable y la grilla del
+cuadrante), así que el archivo de entrada se recorre en streaming.
+
+    python app_cli.py --team-report respuestas.csv --output equipo.pdf
+"""
+import io
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from norms import NormTable
+from questionnaire import Item
+from scoring import DIMS, DiscBatchResult, DiscResult
+
+GRID = 40
+EXTENT = 4.0   # el cuadrante va de -4 a 4 en ambos ejes, como en charts.py
+
+def quadrant_xy(z: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """z (N, 4) D/I/S/C -> coordenadas X = (D+I)-(S+C), Y = (D+C)-(I+S)."""
+    x = (z[:, 0] + z[:, 1]) - (z[:, 2] + z[:, 3])
+    y = (z[:, 0] + z[:, 3]) - (z[:, 1] + z[:, 2])
+    return x, y
+
+@dataclass
+class TeamSummary:
+    norms: NormTable
+    grid: int = GRID
+    blends: Counter = field(default_factory=Counter)
+    primaries: Counter = field(default_factory=Counter)
+    validity_flags: int = 0
+    density: np.ndarray = None   # (grid, grid) conteos; fila = eje Y, columna = eje X
+
+    def __post_init__(self):
+        if self.density is None:
+            self.density = np.zeros((self.grid, self.grid), dtype=np.int64)
+
+    @classmethod
+    def for_items(cls, items: Sequence[Item], grid: int = GRID) -> "TeamSummary":
+        return cls(norms=NormTable.for_items(items), grid=grid)
+
+    @property
+    def n(self) -> int:
+        return self.norms.n
+
+    def update(self, res: DiscBatchResult) -> "TeamSummary":
+        if len(res) == 0:
+            return self
+        self.norms.update(res.raw)
+        self.blends.update(res.blend_labels())
+        self.primaries.update(DIMS[p] for p in res.primary.tolist())
+        self.validity_flags += int(res.validity_flag.sum())
+        x, y = quadrant_xy(res.z)
+        # los valores fuera de [-4, 4] se acumulan en el borde, como el clip del gráfico individual
+        x = np.clip(x, -EXTENT, EXTENT)
+        y = np.clip(y, -EXTENT, EXTENT)
+        h, _, _ = np.histogram2d(y, x, bins=self.grid, range=[[-EXTENT, EXTENT], [-EXTENT, EXTENT]])
+        self.density += h.astype(np.int64)
+        return self
+
+    def merge(self, other: "TeamSummary") -> "TeamSummary":
+        if other.grid != self.grid:
+            raise ValueError("Los resúmenes tienen distinta grilla")
+        self.norms.merge(other.norms)
+        self.blends.update(other.blends)
+        self.primaries.update(other.primaries)
+        self.validity_flags += other.validity_flags
+        self.density += other.density
+        return self
+
+    def blend_table(self, top: Optional[int] = None) -> List[Tuple[str, int, float]]:
+        """[(blend, cantidad, %)] de mayor a menor."""
+        return [(b, c, c / self.n * 100.0) for b, c in self.blends.most_common(top)]
+
+    def profile(self) -> List[Tuple[str, float, float, int, int, int]]:
+        """[(dim, media, sd, p10, p50, p90)] de los puntajes crudos."""
+        desc = self.norms.describe()
+        return [(d, desc[d]["mean"], desc[d]["sd"], desc[d]["p10"], desc[d]["p50"], desc[d]["p90"])
+                for d in DIMS]
+
+def summarize(scored: Iterable[DiscBatchResult], items: Sequence[Item], grid: int = GRID) -> TeamSummary:
+    summary = TeamSummary.for_items(items, grid)
+    for res in scored:
+        summary.update(res)
+    return summary
+
+def summarize_results(results: Iterable[DiscResult], items: Sequence[Item], grid: int = GRID) -> TeamSummary:
+    """Atajo para una lista de DiscResult ya calculados (p. ej. de la app)."""
+    from scoring import score_sums_batch
+    results = list(results)
+    raw = np.array([[r.raw[d] for d in DIMS] for r in results], dtype=np.int64).reshape(-1, 4)
+    validity = np.array([r.validity_score for r in results], dtype=np.int64)
+    return summarize([score_sums_batch(raw, validity)], items, grid)
+
+# -----------------------------
+# Gráficos
+# -----------------------------
+def density_png(summary: TeamSummary) -> bytes:
+    """Mapa de densidad del cuadrante como PNG (imshow sobre la grilla)."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(5.5, 4.5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.set_title(f"Mapa conductual del equipo (n={summary.n})")
+    dens = np.ma.masked_equal(summary.density, 0)
+    im = ax.imshow(dens, origin="lower", extent=[-EXTENT, EXTENT, -EXTENT, EXTENT],
+                   cmap="viridis", interpolation="nearest", aspect="auto")
+    ax.axhline(0, color="grey", linewidth=0.8)
+    ax.axvline(0, color="grey", linewidth=0.8)
+    ax.set_xlabel("Activo/Rápido  ←→  Estable/Metódico")
+    ax.set_ylabel("Orientado a tarea  ←→  Orientado a personas")
+    fig.colorbar(im, ax=ax, label="Personas")
+    fig.tight_layout()
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", dpi=200)
+    return buf.getvalue()
+
+# -----------------------------
+# PDF
+# -----------------------------
+def build_team_pdf(out_pdf: str, summary: TeamSummary, title: str = "Informe DISC de equipo",
+                   top_blends: int = 12) -> None:
+    from reportlab.graphics import renderPDF
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    from interpretation import DIM_NAMES
+    from vector_charts import bar_drawing
+
+    c = canvas.Canvas(out_pdf, pagesize=A4)
+    width, height = A4
+    y = height - 2*cm
+
+    def line(txt, dy=0.7*cm, size=11, bold=False, x=2*cm):
+        nonlocal y
+        c.setFont("Helvetica-Bold" if bold else "Helvetica", size)
+        c.drawString(x, y, txt)
+        y -= dy
+
+    line(f"{title} (uso interno)", size=16, bold=True, dy=1.0*cm)
+    line(f"Personas: {summary.n}", bold=True)
+    if summary.n:
+        line(f"Alertas de validez: {summary.validity_flags} "
+             f"({summary.validity_flags / summary.n * 100:.1f}%)")
+
+    y -= 0.3*cm
+    line("Estilo primario:", bold=True)
+    for d in DIMS:
+        k = summary.primaries.get(d, 0)
+        share = k / summary.n * 100 if summary.n else 0.0
+        line(f"{d} ({DIM_NAMES[d]}): {k}  ({share:.1f}%)", size=10, dy=0.5*cm)
+
+    if summary.n:
+        y -= 0.3*cm
+        line("Perfil de puntajes crudos: media, sd, p10 / p50 / p90", bold=True)
+        for d, mean, sd, p10, p50, p90 in summary.profile():
+            line(f"{d}: {mean:5.1f}  sd {sd:4.1f}   {p10} / {p50} / {p90}", size=10, dy=0.5*cm)
+
+        y -= 0.2*cm
+        means = {d: int(round(m)) for d, m, *_ in summary.profile()}
+        renderPDF.draw(bar_drawing(means, width=16*cm, height=5*cm, title="Media de puntajes crudos"),
+                       c, 2*cm, y - 5*cm)
+        y -= 5.6*cm
+
+    line(f"Blends más frecuentes (top {top_blends}):", bold=True)
+    c.setFont("Helvetica", 10)
+    for blend, k, share in summary.blend_table(top_blends):
+        c.drawString(2*cm, y, blend)
+        c.drawRightString(6*cm, y, str(k))
+        c.drawRightString(8*cm, y, f"{share:.1f}%")
+        y -= 0.45*cm
+    c.showPage()
+
+    if summary.n:
+        y = height - 2*cm
+        line("Mapa conductual (densidad)", size=14, bold=True, dy=0.8*cm)
+        img = ImageReader(io.BytesIO(density_png(summary)))
+        c.drawImage(img, 2*cm, y - 14*cm, width=17*cm, height=14*cm, preserveAspectRatio=True, anchor="nw")
+        c.showPage()
+    c.save()
+
+def run_team_report(in_path: str, out_pdf: str,
+                    in_format: Optional[str] = None,
+                    chunk_size: Optional[int] = None,
+                    items: Optional[List[Item]] = None) -> TeamSummary:
+    """Lee CSV/JSONL/.discr en streaming, resume y escribe el PDF del equipo."""
+    from contextlib import nullcontext
+    from batch import (DEFAULT_CHUNK_SIZE, guess_format, iter_chunks, open_text,
+                       read_rows, score_chunks, store_chunks)
+    from questionnaire import get_items
+
+    items = items or get_items()
+    in_format = in_format or guess_format(in_path)
+    chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+    with (nullcontext() if in_format == "store" else open_text(in_path, "r")) as f:
+        if in_format == "store":
+            chunks = store_chunks(in_path, items, chunk_size)
+        else:
+            chunks = iter_chunks(read_rows(f, items, in_format), chunk_size)
+        summary = summarize((res for _, res in score_chunks(chunks, items)), items)
+    build_team_pdf(out_pdf, summary)
+    return summary
@@ -0,0 +1,7 @@
+import pytest
+
+from questionnaire import get_items
+
+@pytest.fixture(scope="session")
+def items():
+    return get_items()
@@ -0,0 +1,11 @@
+"""Arranque liviano: ningún punto de entrada carga módulos pesados antes de la primera pregunta."""
+import pytest
+
+from benchmarks.import_budget import ENTRY_POINTS, measure
+
+@pytest.mark.parametrize("module", ENTRY_POINTS)
+def test_entry_point_imports_no_heavy_modules(module):
+    total, streamlit_ms, heavy = measure(module)
+    # el tiempo solo se informa (pytest -s): un umbral fijo depende de la máquina
+    print(f"{module}: {total - streamlit_ms:.1f} ms (+{streamlit_ms:.0f} ms streamlit)")
+    assert heavy == []
@@ -0,0 +1,99 @@
+"""Casos que ya fallaron una vez: lectura de bloques, índice con ids repetidos, caché y carpeta PDF."""
+import numpy as np
+import pytest
+
+from batch import _to_matrix
+from benchmarks.synthetic import answer_dicts, answer_matrix
+from cache import ContentCache, cached_score_disc
+from profile_index import ProfileIndex
+from scoring import score_disc
+
+def test_to_matrix_fast_path():
+    np.testing.assert_array_equal(_to_matrix([["1", "2", "3"], ["5", "4", "3"]]), [[1, 2, 3], [5, 4, 3]])
+
+@pytest.mark.parametrize("vals", [
+    [["1", "3.5", "2"]],
+    [["1", "nan", "2"]],
+    [["", "12", "3"]],           # mismo largo total que tres dígitos
+    [["1", "2", "3"], ["4", "5"]],
+    [["1", "x", "3"]],
+])
+def test_to_matrix_rejects_non_integral(vals):
+    with pytest.raises(ValueError):
+        _to_matrix(vals)
+
+def test_to_matrix_mixed_cells():
+    np.testing.assert_array_equal(_to_matrix([["1", 2, "3"]]), [[1, 2, 3]])
+
+def _brute_knn(points: dict, q, k):
+    ids = list(points)
+    d = np.linalg.norm(np.array([points[i] for i in ids]) - q, axis=1)
+    order = np.argsort(d, kind="stable")[:k]
+    return sorted(d[order].tolist())
+
+def test_index_readded_ids_count_once():
+    rng = np.random.default_rng(0)
+    index = ProfileIndex(min_rebuild=64)
+    points = {}
+    for step in range(6):
+        ids = [f"p{i}" for i in rng.integers(0, 150, size=80)]
+        vecs = rng.uniform(0, 50, size=(len(ids), 4))
+        index.add_batch(ids, vecs)
+        points.update(zip(ids, vecs))
+        assert len(index) == len(points)
+        for q in rng.uniform(0, 50, size=(5, 4)):
+            got = index.knn(q, k=10)
+            assert len({i for i, _ in got}) == len(got) == min(10, len(points))
+            np.testing.assert_allclose([d for _, d in got], _brute_knn(points, q, 10))
+            for i, d in got:
+                assert np.linalg.norm(points[i] - q) == pytest.approx(d)
+
+def test_index_many_readds_of_nearest():
+    # todas las copias viejas del vecino más cercano quedan más cerca que el resto
+    index = ProfileIndex(min_rebuild=10_000)
+    index.add_batch([f"far{i}" for i in range(20)], np.full((20, 4), 40.0) + np.arange(20)[:, None])
+    for r in range(50):
+        index.add("near", [1.0 + r * 1e-3] * 4)
+    got = index.knn([0, 0, 0, 0], k=3)
+    assert [i for i, _ in got] == ["near", "far0", "far1"]
+    assert len(index) == 21
+
+def test_cached_result_is_a_copy(items):
+    cache = ContentCache()
+    answers = answer_dicts(items, 1, seed=1)[0]
+    first = cached_score_disc(items, answers, cache=cache)
+    first.raw["D"] = -1
+    first.secondary.append("X")
+    again = cached_score_disc(items, answers, cache=cache)
+    assert again == score_disc(items, answers)
+    assert cache.counters["misses"] == 1 and cache.counters["mem_hits"] == 1
+
+def test_binder_pages_and_shared_charts(items, tmp_path):
+    pymupdf = pytest.importorskip("pymupdf")
+    pytest.importorskip("reportlab")
+    from binder import build_binder
+    from cohort_reports import ReportJob
+
+    ids = [it.id for it in items]
+    rows = answer_matrix(items, 3, seed=7).tolist()
+    jobs = [ReportJob(f"r{i}", f"Persona {i}", "Ventas", dict(zip(ids, rows[i % 3]))) for i in range(7)]
+    out = str(tmp_path / "binder.pdf")
+    stats = build_binder(out, jobs, vector=True, part_size=2)
+    assert (stats.pages, stats.unique_profiles) == (7, 3)
+    with pymupdf.open(out) as doc:
+        assert doc.page_count == 7
+        assert [t[1:] for t in doc.get_toc()] == [[f"Persona {i} (r{i})", i + 1] for i in range(7)]
+        # cada perfil repetido apunta al mismo gráfico que su primera página
+        forms = [sorted(x[0] for x in doc[p].get_xobjects() if x[2] == 0) for p in range(7)]
+        for p in range(3, 7):
+            assert forms[p] == forms[p % 3]
+
+def test_binder_empty_cohort(tmp_path):
+    pymupdf = pytest.importorskip("pymupdf")
+    pytest.importorskip("reportlab")
+    from binder import build_binder
+
+    out = str(tmp_path / "vacio.pdf")
+    assert build_binder(out, []).pages == 0
+    with pymupdf.open(out) as doc:
+        assert "Sin respuestas." in doc[0].get_text()
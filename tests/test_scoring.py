@@ -0,0 +1,44 @@
+"""Scoring por lotes, tabla precalculada y cuestionario adaptativo contra score_disc."""
+import numpy as np
+import pytest
+
+from adaptive import AdaptiveSession
+from benchmarks.synthetic import answer_dicts, answer_matrix
+from lookup import get_table
+from norms import NormTable
+from scoring import get_scoring_plan, score_disc, score_disc_batch
+
+@pytest.mark.parametrize("profile", ["latent", "uniform"])
+def test_batch_matches_scalar(items, profile):
+    x = answer_matrix(items, 300, seed=1, profile=profile)
+    norms = NormTable.for_items(items).update(score_disc_batch(items, x).raw)
+    ids = [it.id for it in items]
+    for kw in ({}, {"norms": norms}, {"lookup": get_table(items)}):
+        res = score_disc_batch(items, x, **kw)
+        for i, row in enumerate(x.tolist()):
+            assert res.row(i) == score_disc(items, dict(zip(ids, row)), **kw)
+
+def test_lookup_matches_score_disc(items):
+    table = get_table(items)
+    for answers in answer_dicts(items, 500, seed=2, profile="uniform"):
+        res = score_disc(items, answers)
+        assert score_disc(items, answers, lookup=table) == res
+        primary, secondary, _ = table.classify(res.raw)
+        assert (primary, secondary) == (res.primary, res.secondary)
+
+def test_adaptive_matches_full_questionnaire(items):
+    for answers in answer_dicts(items, 200, seed=3):
+        session = AdaptiveSession(items)
+        while (it := session.next_item()) is not None:
+            session.answer(it.id, answers[it.id])
+        full = score_disc(items, answers)
+        short = score_disc(items, session.completed_answers())
+        assert (short.primary, short.secondary, short.validity_flag) == \
+               (full.primary, full.secondary, full.validity_flag)
+
+@pytest.mark.parametrize("bad", [np.nan, 3.5, 0, 6])
+def test_sums_matrix_rejects_invalid_answers(items, bad):
+    x = answer_matrix(items, 4, seed=4).astype(np.float64)
+    x[2, 5] = bad
+    with pytest.raises(ValueError):
+        get_scoring_plan(items).sums_matrix(x)
@@ -0,0 +1,89 @@
+"""Ida y vuelta de los formatos de almacenamiento, normas acumuladas y barrido de parámetros."""
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+import export
+from benchmarks.synthetic import answer_matrix
+from norms import NormTable, merge_all
+from response_store import ResponseStore, pack_answers, pack_one, unpack_answers, unpack_one
+from scoring import score_disc, score_disc_batch
+from storage import ResultStore
+from sweep import SumsTally, check, sweep
+
+def test_pack_round_trip(items):
+    x = answer_matrix(items, 50, seed=1, profile="uniform")
+    np.testing.assert_array_equal(unpack_answers(pack_answers(x), len(items)), x)
+    answers = dict(zip([it.id for it in items], x[0].tolist()))
+    assert unpack_one(items, pack_one(items, answers)) == answers
+
+def test_response_store_round_trip(items, tmp_path):
+    path = str(tmp_path / "r.discr")
+    x = answer_matrix(items, 250, seed=2)
+    store = ResponseStore(path, items)
+    assert store.append(x[:100]) == 0
+    assert ResponseStore(path, items).append(x[100:]) == 100
+    np.testing.assert_array_equal(store.read(), x)
+    np.testing.assert_array_equal(np.vstack(list(store.iter_chunks(64))), x)
+
+def test_result_store_round_trip(items, tmp_path):
+    x = answer_matrix(items, 40, seed=3)
+    ids = [it.id for it in items]
+    res = score_disc_batch(items, x)
+    answers = dict(zip(ids, x[0].tolist()))
+    one = score_disc(items, answers)
+    with ResultStore(str(tmp_path / "r.db"), items) as db:
+        rid = db.add(one, answers, person_name="Ana", role="Ventas",
+                     respondent_id="p0", created_at=datetime(2026, 3, 1))
+        db.add_batch([f"p{i}" for i in range(len(x))], res, x, role="Soporte", created_at=0)
+
+        stored = db.get(rid)
+        assert stored.to_result() == one
+        assert db.answers(rid) == answers
+        assert db.count(role="Soporte") == len(x)
+        # epoch 0 es una fecha válida, no "sin fecha"
+        assert {r.created_at for r in db.query(role="Soporte")} == {0}
+        assert db.count(until=1) == len(x)
+        assert db.count(since=datetime(2026, 1, 1)) == 1
+        assert [r.id for r in db.query(respondent_id="p0")] == [rid, rid + 1]
+        for i, r in enumerate(sorted(db.query(role="Soporte"), key=lambda r: r.id)):
+            assert r.to_result() == res.row(i)
+        raw = np.vstack([a for a, _ in db.iter_sums()])
+        np.testing.assert_array_equal(raw[1:], res.raw)
+
+def test_export_round_trip(items, tmp_path):
+    path = str(tmp_path / "export")
+    blocks = [answer_matrix(items, n, seed=4 + n) for n in (70, 45)]
+    with export.ColumnarWriter(path, items, row_group=50) as w:
+        for k, x in enumerate(blocks):
+            w.append([f"id{k}-{i}" for i in range(len(x))], score_disc_batch(items, x), role=f"r{k}")
+    res = score_disc_batch(items, np.vstack(blocks))
+    got = export.load(path)
+    assert len(got) == len(res)
+    np.testing.assert_array_equal(got["raw"], res.raw)
+    np.testing.assert_allclose(got["pct"], res.pct, rtol=1e-6)
+    np.testing.assert_array_equal(got["primary"], res.primary)
+    np.testing.assert_array_equal(got.labels("blend"), res.blend_labels())
+    np.testing.assert_array_equal(got["validity_score"], res.validity_score)
+    assert got.labels("role").tolist() == ["r0"] * 70 + ["r1"] * 45
+    assert got["id"][-1] == b"id1-44"
+
+def test_norm_merge_equals_single_update(items):
+    raw = score_disc_batch(items, answer_matrix(items, 900, seed=5)).raw
+    whole = NormTable.for_items(items).update(raw)
+    parts = [NormTable.for_items(items).update(raw[s:s + 300]) for s in range(0, 900, 300)]
+    merged = merge_all(parts)
+    assert merged.n == whole.n
+    np.testing.assert_allclose(merged.mean, whole.mean)
+    np.testing.assert_allclose(merged.m2, whole.m2)
+    np.testing.assert_array_equal(merged.hist, whole.hist)
+
+def test_sweep_matches_rescoring(items):
+    res = score_disc_batch(items, answer_matrix(items, 2000, seed=6, profile="uniform"))
+    tally = SumsTally.for_items(items)
+    tally.add(res.raw, res.validity_score)
+    result = sweep(tally, np.linspace(0.8, 0.95, 4), [1, 2, 3], thresholds=[24])
+    assert check(tally, result, points=12) == 0
+    assert sum(result.at(0.90, 2).values()) == pytest.approx(100)
+    assert result.flagged[0] == int(res.validity_flag.sum())
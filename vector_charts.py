@@ -0,0 +1,150 @@
+"""
+Gráficos DISC como dibujos vectoriales de reportlab (reportlab.graphics).
+
+Alternativa a los PNG de 200 dpi para los PDF: no pasa por matplotlib ni por
+codificar/decodificar PNG, y el PDF resultante es mucho más liviano.
+Los Drawing devueltos son Flowables (platypus) y también se pueden dibujar
+sobre un canvas con renderPDF.draw. Para pantalla se siguen usando los PNG.
+
+Nota: las fuentes estándar del PDF no tienen flechas, por eso los ejes usan "<->".
+"""
+import math
+from typing import Dict, Optional
+
+from reportlab.graphics.shapes import (
+    Circle, Drawing, Group, Line, PolyLine, Polygon, Rect, String, Wedge
+)
+from reportlab.lib import colors
+
+DIMS = ["D", "I", "S", "C"]
+DEFAULT_COLOR = "#1F77B4"   # azul por defecto de matplotlib, como en charts.py
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+
+def _color(colors_by_dim: Optional[Dict[str, str]], d: str) -> colors.Color:
+    return colors.HexColor((colors_by_dim or {}).get(d, DEFAULT_COLOR))
+
+def _title(dr: Drawing, text: str, width: float, height: float) -> None:
+    dr.add(String(width / 2, height - 12, text, fontName=FONT_BOLD, fontSize=10, textAnchor="middle"))
+
+def _vertical_label(text: str, x: float, y: float, size: float) -> Group:
+    # rotación de 90° alrededor de (x, y)
+    return Group(String(0, 0, text, fontName=FONT, fontSize=size, textAnchor="middle"),
+                 transform=(0, 1, -1, 0, x, y))
+
+def _nice_max(v: float, step: int = 5) -> int:
+    return max(step, int(math.ceil(v * 1.05 / step)) * step)
+
+def bar_drawing(raw: Dict[str, int], width: float = 450, height: float = 155,
+                title: str = "DISC - Puntajes crudos",
+                colors_by_dim: Optional[Dict[str, str]] = None) -> Drawing:
+    dr = Drawing(width, height)
+    _title(dr, title, width, height)
+    x0, y0 = 34, 26
+    w, h = width - x0 - 10, height - y0 - 22
+    top = _nice_max(max(raw[d] for d in DIMS))
+    step = 5 if top <= 30 else 10
+
+    for t in range(0, top + 1, step):
+        y = y0 + h * t / top
+        dr.add(Line(x0 - 3, y, x0, y, strokeWidth=0.5))
+        dr.add(String(x0 - 5, y - 3, str(t), fontName=FONT, fontSize=7, textAnchor="end"))
+    dr.add(Rect(x0, y0, w, h, fillColor=None, strokeColor=colors.black, strokeWidth=0.6))
+
+    slot = w / len(DIMS)
+    for i, d in enumerate(DIMS):
+        bh = h * raw[d] / top
+        bx = x0 + slot * (i + 0.1)
+        dr.add(Rect(bx, y0, slot * 0.8, bh, fillColor=_color(colors_by_dim, d), strokeColor=None))
+        dr.add(String(x0 + slot * (i + 0.5), y0 - 10, d, fontName=FONT, fontSize=8, textAnchor="middle"))
+
+    dr.add(String(x0 + w / 2, 2, "Dimensión", fontName=FONT, fontSize=8, textAnchor="middle"))
+    dr.add(_vertical_label("Puntaje", 8, y0 + h / 2, 8))
+    return dr
+
+def radar_drawing(pct: Dict[str, float], width: float = 225, height: float = 155,
+                  title: str = "DISC - Diagrama de araña (0–100%)",
+                  color: str = DEFAULT_COLOR) -> Drawing:
+    dr = Drawing(width, height)
+    _title(dr, title, width, height)
+    cx, cy = width / 2, (height - 16) / 2
+    r = min(width, height - 16) / 2 - 14
+
+    # ángulos como matplotlib polar: D a la derecha, en sentido antihorario
+    angles = [i * math.pi / 2 for i in range(len(DIMS))]
+    pts = []
+    for a, d in zip(angles, DIMS):
+        v = r * pct[d] / 100
+        pts += [cx + v * math.cos(a), cy + v * math.sin(a)]
+
+    # Relleno opaco ya mezclado con el fondo blanco (15%) y dibujado debajo de
+    # la grilla: sin transparencia el dibujo no necesita ExtGState y puede
+    # reutilizarse como Form XObject (report_pdf._place)
+    c = colors.HexColor(color)
+    fill = colors.Color(*(1 - 0.15 * (1 - v) for v in (c.red, c.green, c.blue)))
+    dr.add(Polygon(pts, fillColor=fill, strokeColor=None))
+
+    for ring in (20, 40, 60, 80, 100):
+        rr = r * ring / 100
+        dr.add(Circle(cx, cy, rr, fillColor=None,
+                      strokeColor=colors.black if ring == 100 else colors.lightgrey,
+                      strokeWidth=0.6 if ring == 100 else 0.4))
+    for a, d in zip(angles, DIMS):
+        ex, ey = cx + r * math.cos(a), cy + r * math.sin(a)
+        dr.add(Line(cx, cy, ex, ey, strokeColor=colors.lightgrey, strokeWidth=0.4))
+        dr.add(String(cx + (r + 8) * math.cos(a), cy + (r + 8) * math.sin(a) - 3, d,
+                      fontName=FONT, fontSize=8, textAnchor="middle"))
+
+    dr.add(PolyLine(pts + pts[:2], strokeColor=c, strokeWidth=1.2))
+    return dr
+
+def quadrant_drawing(z: Dict[str, float], width: float = 225, height: float = 155,
+                     title: str = "Mapa conductual (esquema)",
+                     color: str = DEFAULT_COLOR) -> Drawing:
+    """Mismo esquema que charts.quadrant_chart: X = (D+I)-(S+C), Y = (D+C)-(I+S), en [-4, 4]."""
+    x = (z["D"] + z["I"]) - (z["S"] + z["C"])
+    y = (z["D"] + z["C"]) - (z["I"] + z["S"])
+
+    dr = Drawing(width, height)
+    _title(dr, title, width, height)
+    x0, y0 = 26, 22
+    w, h = width - x0 - 8, height - y0 - 20
+    sx = lambda v: x0 + w * (max(-4.0, min(4.0, v)) + 4) / 8
+    sy = lambda v: y0 + h * (max(-4.0, min(4.0, v)) + 4) / 8
+
+    dr.add(Rect(x0, y0, w, h, fillColor=None, strokeColor=colors.black, strokeWidth=0.6))
+    dr.add(Line(sx(0), y0, sx(0), y0 + h, strokeColor=colors.HexColor(DEFAULT_COLOR), strokeWidth=0.8))
+    dr.add(Line(x0, sy(0), x0 + w, sy(0), strokeColor=colors.HexColor(DEFAULT_COLOR), strokeWidth=0.8))
+    for t in (-4, -2, 0, 2, 4):
+        dr.add(String(sx(t), y0 - 8, str(t), fontName=FONT, fontSize=6, textAnchor="middle"))
+        dr.add(String(x0 - 3, sy(t) - 2, str(t), fontName=FONT, fontSize=6, textAnchor="end"))
+    dr.add(Circle(sx(x), sy(y), 4, fillColor=colors.HexColor(color), strokeColor=None))
+
+    dr.add(String(x0 + w / 2, 2, "Activo/Rápido  <->  Estable/Metódico",
+                  fontName=FONT, fontSize=6.5, textAnchor="middle"))
+    dr.add(_vertical_label("Tarea  <->  Personas", 6, y0 + h / 2, 6.5))
+    return dr
+
+def donut_drawing(pct: Dict[str, float], width: float = 225, height: float = 155,
+                  title: str = "DISC — Composición (%)",
+                  colors_by_dim: Optional[Dict[str, str]] = None) -> Drawing:
+    dr = Drawing(width, height)
+    _title(dr, title, width, height)
+    r = min(width * 0.6, height - 16) / 2 - 6
+    cx, cy = r + 12, (height - 16) / 2
+
+    total = sum(pct[d] for d in DIMS) or 1.0
+    start = 90.0   # como plt.pie(startangle=90), sentido antihorario
+    for d in DIMS:
+        extent = 360.0 * pct[d] / total
+        if extent > 0:
+            dr.add(Wedge(cx, cy, r, start, start + extent, radius1=r * 0.65,
+                         fillColor=_color(colors_by_dim, d), strokeColor=colors.white, strokeWidth=0.5))
+        start += extent
+
+    lx = cx + r + 16
+    for i, d in enumerate(DIMS):
+        ly = cy + 18 - i * 12
+        dr.add(Rect(lx, ly, 8, 8, fillColor=_color(colors_by_dim, d), strokeColor=None))
+        dr.add(String(lx + 12, ly + 1, f"{d}  {pct[d]:.1f}%", fontName=FONT, fontSize=8))
+    return dr